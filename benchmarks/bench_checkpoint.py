@@ -0,0 +1,74 @@
+"""Бенчмарк: цена контрольных точек для цикла шагов и скорость восстановления.
+
+Модель и браузер без задержек сети, так что любая добавка от записи
+контрольных точек видна в чистом виде. Замеряется время запуска с точками
+и без, размер файла и время загрузки состояния для --resume.
+
+    python -m benchmarks.bench_checkpoint
+"""
+
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from src import agent as agent_module
+from src.agent import Agent
+from src.checkpoint import CheckpointStore
+from src.fake_llm import FakeLLM
+from benchmarks.fakes import SleepBrowser
+
+
+STEPS = 60
+REPEATS = 5
+
+
+def script() -> list[list[dict]]:
+    turns = []
+    for i in range(STEPS // 2):
+        turns.append(
+            [{"type": "tool_use", "name": "goto", "input": {"url": f"https://example.com/{i}"}}]
+        )
+        turns.append([{"type": "tool_use", "name": "analyze_page", "input": {}}])
+    turns.append([{"type": "tool_use", "name": "done", "input": {"summary": "Готово"}}])
+    return turns
+
+
+async def measure(checkpoint_dir: str | None) -> float:
+    agent = Agent(
+        api_key=None,
+        browser=SleepBrowser(0.002),
+        client=FakeLLM(script(), ttft=0, tokens_per_second=1e9),
+        checkpoint_dir=checkpoint_dir,
+    )
+    started = time.perf_counter()
+    await agent.run("обойди страницы")
+    return time.perf_counter() - started
+
+
+async def main():
+    agent_module.console.quiet = True
+    with tempfile.TemporaryDirectory() as directory:
+        plain = statistics.median([await measure(None) for _ in range(REPEATS)])
+        saved = statistics.median([await measure(directory) for _ in range(REPEATS)])
+
+        store = CheckpointStore(directory)
+        path = next(Path(directory).glob("*.jsonl"))
+        started = time.perf_counter()
+        state = store.load(path.stem)
+        load_ms = (time.perf_counter() - started) * 1000
+        size_kb = path.stat().st_size / 1024
+
+    print(f"шагов: {STEPS + 1}")
+    print(f"без контрольных точек: {plain * 1000:8.1f} мс")
+    print(
+        f"с контрольными точками: {saved * 1000:7.1f} мс "
+        f"(+{(saved - plain) / (STEPS + 1) * 1000:.2f} мс на шаг)"
+    )
+    print(f"файл: {size_kb:.1f} КБ, сообщений: {len(state.messages)}")
+    print(f"загрузка для --resume: {load_ms:.1f} мс")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""Бенчмарк холодного старта: импорт модулей и запуск браузера с клиентом.
+
+Импорт замеряется в свежих интерпретаторах: `import main` в текущем виде
+против прежнего поведения, когда anthropic и playwright грузились сразу.
+Запуск — последовательный (клиент, затем браузер) против параллельного,
+как в main.py; браузер headless, окно через CDP не позиционируется.
+
+    python -m benchmarks.bench_cold_start
+"""
+
+import asyncio
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.agent import create_client
+from src.browser import BrowserController
+
+
+REPEATS = 5
+
+IMPORTS = {
+    "import main": "import main",
+    "прежний импорт": "import anthropic, playwright.async_api, main",
+    "клиент --submit": "import main, sys; assert 'anthropic' not in sys.modules",
+}
+
+
+def import_time(code: str) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+async def launch(overlap: bool) -> float:
+    with tempfile.TemporaryDirectory() as user_data_dir:
+        browser = BrowserController(user_data_dir=user_data_dir, headless=True)
+        started = time.perf_counter()
+        if overlap:
+            await asyncio.gather(
+                asyncio.to_thread(create_client, "bench"), browser.start()
+            )
+        else:
+            create_client("bench")
+            await browser.start()
+        elapsed = time.perf_counter() - started
+        await browser.close()
+    return elapsed * 1000
+
+
+def launch_time(overlap: bool) -> float:
+    # Каждый замер — в свежем интерпретаторе, чтобы anthropic не был в кэше
+    code = (
+        "import asyncio; from benchmarks.bench_cold_start import launch; "
+        f"print(asyncio.run(launch({overlap})))"
+    )
+    timings = [
+        float(
+            subprocess.run(
+                [sys.executable, "-c", code], check=True, capture_output=True, text=True
+            ).stdout
+        )
+        for _ in range(REPEATS)
+    ]
+    return statistics.median(timings)
+
+
+def main():
+    print(f"{'импорт (интерпретатор целиком)':36}{'мс':>10}")
+    for name, code in IMPORTS.items():
+        print(f"{name:36}{import_time(code):10.0f}")
+
+    print(f"\n{'запуск браузера и клиента':36}{'мс':>10}")
+    for name, overlap in (("последовательно", False), ("параллельно", True)):
+        print(f"{name:36}{launch_time(overlap):10.0f}")
+
+
+if __name__ == "__main__":
+    main()
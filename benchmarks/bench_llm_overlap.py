@@ -0,0 +1,55 @@
+"""Бенчмарк: блокирующий вызов модели против стриминга с перекрытием инструментов.
+
+Работает без сети и без браузера: модель — src.fake_llm.FakeLLM,
+действия браузера имитируются задержками.
+
+    python -m benchmarks.bench_llm_overlap
+"""
+
+import asyncio
+import time
+
+from src import agent as agent_module
+from src.agent import Agent
+from src.fake_llm import FakeLLM
+from benchmarks.fakes import SleepBrowser
+
+
+SCRIPT = [
+    [
+        {"type": "text", "text": "Открываю поиск и ввожу запрос."},
+        {"type": "tool_use", "name": "goto", "input": {"url": "https://example.com"}},
+        {"type": "tool_use", "name": "fill", "input": {"selector": "#q", "text": "погода"}},
+        {"type": "tool_use", "name": "press", "input": {"key": "Enter"}},
+    ],
+    [
+        {"type": "tool_use", "name": "scroll", "input": {"direction": "down"}},
+        {"type": "tool_use", "name": "click", "input": {"selector": "a.result"}},
+    ],
+    [{"type": "tool_use", "name": "done", "input": {"summary": "Готово"}}],
+]
+
+
+async def measure(streaming: bool, ttft: float, tps: float, delay: float) -> float:
+    llm = FakeLLM(SCRIPT, ttft=ttft, tokens_per_second=tps)
+    agent = Agent(api_key=None, browser=SleepBrowser(delay), client=llm, streaming=streaming)
+    started = time.perf_counter()
+    await agent.run("бенчмарк")
+    return time.perf_counter() - started
+
+
+async def main():
+    agent_module.console.quiet = True
+    ttft, tps, delay = 0.5, 40.0, 0.3
+
+    blocking = await measure(False, ttft, tps, delay)
+    streaming = await measure(True, ttft, tps, delay)
+
+    print(f"ttft={ttft}s, {tps} ток/с, действие браузера {delay}s")
+    print(f"без стриминга:          {blocking:.2f}s")
+    print(f"стриминг + перекрытие:  {streaming:.2f}s")
+    print(f"выигрыш:                {blocking - streaming:.2f}s ({(1 - streaming / blocking):.0%})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
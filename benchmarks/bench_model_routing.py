@@ -0,0 +1,84 @@
+"""Бенчмарк: одна большая модель на все шаги против маршрутизации по уровням.
+
+Сценарная модель отвечает одинаково независимо от модели, но задержки у
+моделей свои: большая медленнее, быстрая — быстрее. На одном шаге быстрая
+модель «теряется» и отвечает текстом, чтобы было видно переспрашивание.
+
+    python -m benchmarks.bench_model_routing
+"""
+
+import asyncio
+import statistics
+import time
+
+from src import agent as agent_module
+from src.agent import MODEL, Agent
+from src.fake_llm import FakeLLM
+from benchmarks.fakes import SleepBrowser
+
+
+FAST_MODEL = "fast-model"
+SPEEDS = {MODEL: (0.8, 60.0), FAST_MODEL: (0.25, 200.0)}
+
+
+def tool(name: str, **args) -> list[dict]:
+    return [{"type": "tool_use", "name": name, "input": args}]
+
+
+SCRIPT = [
+    tool("goto", url="https://example.com/search"),
+    tool("fill", selector="#q", text="ноутбуки"),
+    tool("press", key="Enter"),
+    tool("scroll", direction="down"),
+    tool("scroll", direction="down"),
+    tool("click", selector="a.result"),
+    tool("scroll", direction="down"),
+    tool("press", key="End"),
+    tool("done", summary="Открыл первый результат"),
+]
+CONFUSED_STEP = 6
+
+
+def script(request: dict) -> list[dict]:
+    step = sum(m["role"] == "assistant" for m in request["messages"])
+    if step == CONFUSED_STEP and request["model"] == FAST_MODEL:
+        return [{"type": "text", "text": "Не уверен, что делать дальше."}]
+    return SCRIPT[step]
+
+
+async def measure(fast_model: str | None) -> tuple[float, list[float], Agent]:
+    llm = FakeLLM(script, speeds=SPEEDS)
+    agent = Agent(
+        api_key=None, browser=SleepBrowser(0.05), client=llm, fast_model=fast_model
+    )
+    steps = []
+    original = agent._call_llm
+
+    async def timed(*args):
+        started = time.perf_counter()
+        result = await original(*args)
+        steps.append(time.perf_counter() - started)
+        return result
+
+    agent._call_llm = timed
+    started = time.perf_counter()
+    await agent.run("Найди ноутбуки и открой первый результат")
+    return time.perf_counter() - started, steps, agent
+
+
+async def main():
+    agent_module.console.quiet = True
+
+    print(f"{'':16}{'всего':>8}{'медиана шага':>15}")
+    for name, fast_model in (("одна модель", None), ("маршрутизация", FAST_MODEL)):
+        total, steps, agent = await measure(fast_model)
+        print(f"{name:16}{total:>7.2f}s{statistics.median(steps):>14.2f}s")
+
+    print("\nРешения маршрутизатора:")
+    for number, (tier, reason) in enumerate(agent.router.decisions, start=1):
+        print(f"  {number:>2}. {tier:10} {reason}")
+    print(f"\n{agent.router.report()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""Бенчмарк: стоимость представлений страницы для модели.
+
+Сравнивает текстовый снимок analyze_page, дерево доступности observe_page
+и дерево со скриншотом при разных лимитах размера: объём полезной нагрузки,
+оценку в токенах (текст ~4 символа на токен, картинка ~ширина×высота/750)
+и время получения на больших локальных страницах.
+
+    python -m benchmarks.bench_observation
+"""
+
+import asyncio
+import statistics
+import time
+
+from playwright.async_api import async_playwright
+
+from src.browser import BrowserController
+from src.memory import estimate_tokens
+from src.page_analyzer import PageAnalyzer
+from benchmarks.fixtures import large_page
+
+
+REPEATS = 5
+IMAGE_BUDGETS_KB = (30, 60, 120)
+
+
+async def measure(observe) -> tuple[float, int, int]:
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        chars, tokens = await observe()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000, chars, tokens
+
+
+async def main():
+    async with async_playwright() as pw:
+        chromium = await pw.chromium.launch(headless=True)
+        context = await chromium.new_context(viewport={"width": 1280, "height": 800})
+        browser = BrowserController(headless=True)
+        page = await browser.attach(context)
+
+        async def text_mode():
+            analyzer = PageAnalyzer()
+            text = analyzer.format_for_llm(await analyzer.analyze(page))
+            return len(text), estimate_tokens(text)
+
+        async def ax_mode():
+            analyzer = PageAnalyzer()
+            tree = analyzer.format_accessibility_for_llm(
+                await analyzer.accessibility_tree(page)
+            )
+            return len(tree), estimate_tokens(tree)
+
+        def ax_with_screenshot(budget_kb: int):
+            async def observe():
+                chars, tokens = await ax_mode()
+                shot = await browser.compressed_screenshot(max_bytes=budget_kb * 1024)
+                return (
+                    chars + len(shot.data),
+                    tokens + shot.width * shot.height // 750,
+                )
+
+            return observe
+
+        modes = [("текст (analyze_page)", text_mode), ("дерево доступности", ax_mode)]
+        modes += [
+            (f"дерево + скриншот ≤{kb} КБ", ax_with_screenshot(kb))
+            for kb in IMAGE_BUDGETS_KB
+        ]
+
+        for cards in (200, 2000):
+            await page.set_content(large_page(cards))
+            print(f"\nкарточек: {cards}")
+            print(f"{'':30}{'мс':>8}{'символов':>12}{'токенов':>10}")
+            for name, observe in modes:
+                ms, chars, tokens = await measure(observe)
+                print(f"{name:30}{ms:8.1f}{chars:12}{tokens:10}")
+
+        await chromium.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,189 @@
+"""Бенчмарк: прежний построчный формат снимка против компактной кодировки.
+
+Снимки трёх синтетических страниц (каталог на 600 товаров, выдача вакансий
+с пагинацией и кнопками «Поделиться» на чужой домен, форма регистрации)
+кодируются обоими форматами. Для каждой страницы есть цели: элемент,
+который модель должна найти по тексту или типу поля. Точность считает
+детерминированный «читатель» — он ищет номер цели в снимке так же, как это
+сделала бы модель, включая восстановление номера внутри свёрнутой серии.
+Размер — оценка memory.count_tokens. Браузер и API не нужны.
+
+    python -m benchmarks.bench_observation_encoding
+"""
+
+import re
+
+from src.memory import count_tokens
+from src.page_analyzer import PageAnalyzer
+from benchmarks.bench_relevance import synthetic_page
+
+
+def jobs_page() -> dict:
+    elements, index = [], 0
+
+    def add(tag, text="", href=None, type=None):
+        nonlocal index
+        elements.append({"index": index, "tag": tag, "text": text, "href": href, "type": type})
+        index += 1
+
+    add("input", type="search")
+    add("button", "Найти", type="submit")
+    for k in range(20):
+        add("a", f"Вакансия {k}: Python-разработчик в Компания {k % 9}", f"https://jobs.local/vacancy/{k}")
+        add("button", "Откликнуться", type="button")
+        add("a", "Поделиться", f"https://share.example.net/?u=https://jobs.local/vacancy/{k}")
+    for page in range(1, 41):
+        add("a", str(page), f"https://jobs.local/search?q=python&page={page}")
+    add("a", "Далее", "https://jobs.local/search?q=python&page=2")
+    text = "\n".join(
+        ["Вакансии: python", "Найдено 800 вакансий"]
+        + [
+            f"Вакансия {k}: Python-разработчик в Компания {k % 9}. Опыт от {k % 5 + 1} лет, "
+            f"зарплата от {150 + k * 5} 000 ₽, удалённо."
+            for k in range(20)
+        ]
+    )
+    return {
+        "url": "https://jobs.local/search?q=python",
+        "title": "Вакансии — python",
+        "interactive_elements": elements,
+        "text_content": text,
+    }
+
+
+def form_page() -> dict:
+    fields = [
+        ("input", "", "text"),
+        ("input", "", "email"),
+        ("input", "", "password"),
+        ("input", "", "tel"),
+        ("select", "Москва", "select-one"),
+        ("textarea", "", "textarea"),
+        ("input", "", "checkbox"),
+        ("button", "Зарегистрироваться", "submit"),
+    ]
+    elements = [
+        {"index": i, "tag": tag, "text": text, "href": None, "type": type}
+        for i, (tag, text, type) in enumerate(fields)
+    ]
+    elements += [
+        {
+            "index": 8 + i,
+            "tag": "a",
+            "text": f"Раздел справки {i}",
+            "href": f"https://help.example.org/topic/{i}",
+            "type": None,
+        }
+        for i in range(40)
+    ]
+    return {
+        "url": "https://shop.local/register",
+        "title": "Регистрация",
+        "interactive_elements": elements,
+        "text_content": "Регистрация\nИмя\nЭлектронная почта\nПароль\nТелефон\nГород\nКомментарий",
+    }
+
+
+# (страница, задача, цели: (описание, признак, ожидаемый номер))
+CASES = [
+    (
+        synthetic_page(600),
+        "Открой в каталоге товар модель X{model}",
+        [
+            (f"товар {n}", {"text": f"Товар {n}: модель X{n * 7}"}, 100 + n, {"model": n * 7})
+            for n in (5, 80, 250, 590)
+        ],
+    ),
+    (
+        jobs_page(),
+        "Найди вакансии Python и открой страницу {page} выдачи",
+        [
+            (f"страница {page}", {"text": str(page)}, 61 + page, {"page": page})
+            for page in (2, 27, 40)
+        ]
+        + [("вакансия 13", {"text": "Вакансия 13: Python-разработчик в Компания 4"}, 41, {"page": 1})],
+    ),
+    (
+        form_page(),
+        "Зарегистрируйся: заполни почту и пароль{extra}",
+        [
+            ("поле пароля", {"type": "password"}, 2, {"extra": ""}),
+            ("поле почты", {"type": "email"}, 1, {"extra": ""}),
+            ("кнопка", {"text": "Зарегистрироваться"}, 7, {"extra": " и отправь форму"}),
+        ],
+    ),
+]
+
+
+VERBOSE_RE = re.compile(r'^\[(\d+)\] <(\w+)>(?: "(.*?)")?(?: -> \S+)?(?: \(type=([\w-]+)\))?$')
+COMPACT_RE = re.compile(r'^\[(\d+)\]\w+(?::([\w-]+))?(?: "(.*?)")?(?: \S+)?$')
+RUN_RE = re.compile(r'^\[(\d+)-(\d+)\]\w+ ×\d+ "(.*?)"')
+NUMBER_RE = re.compile(r"\d+")
+
+
+def read_verbose(snapshot: str, target: dict) -> int | None:
+    for line in snapshot.splitlines():
+        match = VERBOSE_RE.match(line)
+        if match and _matches(target, match[3], match[4]):
+            return int(match[1])
+    return None
+
+
+def read_compact(snapshot: str, target: dict) -> int | None:
+    for line in snapshot.splitlines():
+        match = COMPACT_RE.match(line)
+        if match and _matches(target, match[3], match[2]):
+            return int(match[1])
+        run = RUN_RE.match(line)
+        if run and "text" in target:
+            first, last, first_text = int(run[1]), int(run[2]), run[3]
+            wanted = target["text"]
+            if NUMBER_RE.sub("#", wanted) != NUMBER_RE.sub("#", first_text):
+                continue
+            numbers = NUMBER_RE.findall(wanted)
+            if not numbers:
+                continue
+            offset = int(numbers[0]) - int(NUMBER_RE.findall(first_text)[0])
+            if 0 <= offset <= last - first:
+                return first + offset
+    return None
+
+
+def _matches(target: dict, text: str | None, type: str | None) -> bool:
+    if "text" in target:
+        return text == target["text"]
+    return type == target["type"]
+
+
+def main():
+    verbose = PageAnalyzer(compact=False)
+    compact = PageAnalyzer()
+    print(f"{'страница / цель':28}{'прежний: ток.':>14}{'верно':>7}{'компакт: ток.':>15}{'верно':>7}")
+    totals = {"verbose": [0, 0], "compact": [0, 0]}
+    for page, task, targets in CASES:
+        for label, target, expected, params in targets:
+            query = task.format(**params)
+            old = verbose.format_for_llm(page, query)
+            new = compact.format_for_llm(page, query)
+            old_ok = read_verbose(old, target) == expected
+            new_ok = read_compact(new, target) == expected
+            totals["verbose"][0] += count_tokens(old)
+            totals["verbose"][1] += old_ok
+            totals["compact"][0] += count_tokens(new)
+            totals["compact"][1] += new_ok
+            print(
+                f"{page['title'][:14] + ': ' + label:28}{count_tokens(old):>14}"
+                f"{'да' if old_ok else 'нет':>7}{count_tokens(new):>15}"
+                f"{'да' if new_ok else 'нет':>7}"
+            )
+    cases = sum(len(targets) for _, _, targets in CASES)
+    print(
+        f"{'всего':28}{totals['verbose'][0]:>14}{totals['verbose'][1]:>4}/{cases}"
+        f"{totals['compact'][0]:>15}{totals['compact'][1]:>4}/{cases}"
+    )
+    saved = 1 - totals["compact"][0] / totals["verbose"][0]
+    print(f"\nкомпактная кодировка: на {saved:.0%} меньше токенов, бюджет {compact.observation_tokens}")
+
+
+if __name__ == "__main__":
+    main()
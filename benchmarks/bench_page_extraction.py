@@ -0,0 +1,105 @@
+"""Бенчмарк: прежнее извлечение (title + два evaluate + клон body) против
+однопроходного экстрактора PageAnalyzer на больших локальных страницах.
+
+Замеряет задержку и рост памяти рендерера (JS-куча и число DOM-узлов
+по метрикам CDP сразу после извлечения, до сборки мусора).
+
+    python -m benchmarks.bench_page_extraction
+"""
+
+import asyncio
+import statistics
+import time
+
+from playwright.async_api import async_playwright
+
+from src.page_analyzer import PageAnalyzer
+from benchmarks.fixtures import large_page
+
+
+LEGACY_ELEMENTS_JS = """
+() => {
+    const elements = [];
+    const selectors = 'a, button, input, select, textarea, [role="button"], [onclick], [tabindex="0"]';
+    document.querySelectorAll(selectors).forEach((el, idx) => {
+        const rect = el.getBoundingClientRect();
+        if (rect.width === 0 || rect.height === 0) return;
+        if (window.getComputedStyle(el).visibility === 'hidden') return;
+        const text = (el.innerText || el.value || el.placeholder || el.getAttribute('aria-label') || '').trim().slice(0, 100);
+        elements.push({ index: elements.length, tag: el.tagName.toLowerCase(), text: text });
+    });
+    return elements.slice(0, 100);
+}
+"""
+
+LEGACY_TEXT_JS = """
+() => {
+    const clone = document.body.cloneNode(true);
+    ['script', 'style', 'noscript', 'iframe', 'svg'].forEach(tag => {
+        clone.querySelectorAll(tag).forEach(el => el.remove());
+    });
+    return clone.innerText;
+}
+"""
+
+REPEATS = 10
+
+
+async def legacy_extract(page):
+    await page.title()
+    await page.evaluate(LEGACY_ELEMENTS_JS)
+    await page.evaluate(LEGACY_TEXT_JS)
+
+
+async def metrics(cdp) -> dict:
+    result = await cdp.send("Performance.getMetrics")
+    return {m["name"]: m["value"] for m in result["metrics"]}
+
+
+async def measure(page, cdp, extract) -> tuple[float, float, float]:
+    timings, heap, nodes = [], [], []
+    for _ in range(REPEATS):
+        await cdp.send("HeapProfiler.collectGarbage")
+        before = await metrics(cdp)
+        started = time.perf_counter()
+        await extract(page)
+        timings.append(time.perf_counter() - started)
+        after = await metrics(cdp)
+        heap.append(after["JSHeapUsedSize"] - before["JSHeapUsedSize"])
+        nodes.append(after["Nodes"] - before["Nodes"])
+    return (
+        statistics.median(timings) * 1000,
+        statistics.median(heap) / 1024,
+        statistics.median(nodes),
+    )
+
+
+async def main():
+    analyzer = PageAnalyzer()
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=True)
+        page = await browser.new_page()
+        cdp = await page.context.new_cdp_session(page)
+        await cdp.send("Performance.enable")
+
+        for cards in (2000, 5000):
+            await page.set_content(large_page(cards))
+            total_nodes = await page.evaluate(
+                "() => document.getElementsByTagName('*').length"
+            )
+            legacy = await measure(page, cdp, legacy_extract)
+            single = await measure(page, cdp, analyzer.analyze)
+
+            print(f"\nкарточек: {cards}, элементов в DOM: {total_nodes}")
+            print(f"{'':24}{'мс':>10}{'куча, КБ':>12}{'узлов +':>10}")
+            for name, (ms, heap_kb, nodes) in (
+                ("прежнее извлечение", legacy),
+                ("однопроходное", single),
+            ):
+                print(f"{name:24}{ms:10.1f}{heap_kb:12.0f}{nodes:10.0f}")
+
+        await browser.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
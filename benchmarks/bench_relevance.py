@@ -0,0 +1,88 @@
+"""Бенчмарк: отбор содержимого по релевантности против обрезки по порядку DOM.
+
+Синтетическая длинная страница: шапка с навигацией, лента карточек и
+подвал, повторяющий навигацию. Для целей в разных местах ленты задача
+спрашивает о конкретной карточке; сравнивается размер снимка (оценка в
+токенах) и то, попала ли целевая карточка и ссылка на неё в снимок — если
+нет, модели пришлось бы скроллить и вызывать analyze_page ещё раз.
+Браузер не нужен.
+
+    python -m benchmarks.bench_relevance
+"""
+
+import time
+
+from src.memory import estimate_tokens
+from src.page_analyzer import PageAnalyzer
+
+
+CARDS = 600
+TARGETS = (5, 80, 250, 590)
+
+
+def synthetic_page(cards: int) -> dict:
+    nav = [
+        {"index": i, "tag": "a", "text": f"Раздел {i}", "href": f"/section/{i}", "type": None}
+        for i in range(30)
+    ]
+    search = [{"index": 30, "tag": "input", "text": "", "href": None, "type": "search"}]
+    items = [
+        {
+            "index": 100 + i,
+            "tag": "a",
+            "text": f"Товар {i}: модель X{i * 7}",
+            "href": f"/item/{i}",
+            "type": None,
+        }
+        for i in range(cards)
+    ]
+    footer = [dict(el, index=1000 + el["index"]) for el in nav]
+    menu = " ".join(f"Раздел {i}" for i in range(30))
+    text = "\n".join(
+        [menu, "Каталог товаров"]
+        + [f"Товар {i}: модель X{i * 7}, цена {1000 + i * 13} руб." for i in range(cards)]
+        + [menu, "© Магазин, все права защищены"]
+    )
+    return {
+        "url": "http://shop.local/catalog",
+        "title": "Каталог",
+        "interactive_elements": nav + search + items + footer,
+        "text_content": text,
+    }
+
+
+def legacy_format(analysis: dict) -> str:
+    """Прежний format_for_llm: первые 100 элементов и 8000 символов текста."""
+    lines = [f"URL: {analysis['url']}", f"Заголовок: {analysis['title']}", ""]
+    lines += [
+        PageAnalyzer._format_element(el) for el in analysis["interactive_elements"][:100]
+    ]
+    lines += ["", analysis["text_content"][:8000]]
+    return "\n".join(lines)
+
+
+def main():
+    analyzer = PageAnalyzer()
+    page = synthetic_page(CARDS)
+    print(f"{'цель':>6}  {'прежний: ток.':>14}{'найдено':>9}  {'отбор: ток.':>12}{'найдено':>9}{'мс':>7}")
+    for target in TARGETS:
+        query = f"Узнай цену модели X{target * 7} в каталоге"
+        price = f"цена {1000 + target * 13} руб."
+        link = f"/item/{target}"
+
+        legacy = legacy_format(page)
+        started = time.perf_counter()
+        ranked = analyzer.format_for_llm(page, query)
+        ms = (time.perf_counter() - started) * 1000
+
+        def found(snapshot: str) -> str:
+            return "да" if price in snapshot and link in snapshot else "нет"
+
+        print(
+            f"{target:6}  {estimate_tokens(legacy):14}{found(legacy):>9}"
+            f"  {estimate_tokens(ranked):12}{found(ranked):>9}{ms:7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
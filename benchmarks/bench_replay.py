@@ -0,0 +1,63 @@
+"""Бенчмарк: первый запуск задачи с моделью против повтора по записи.
+
+После повтора модель делает один ход: сверяет страницу и вызывает done.
+
+    python -m benchmarks.bench_replay
+"""
+
+import asyncio
+import tempfile
+import time
+
+from src import agent as agent_module
+from src.agent import Agent
+from src.fake_llm import FakeLLM
+from benchmarks.fakes import SleepBrowser
+
+
+SCRIPT = [
+    [{"type": "tool_use", "name": "goto", "input": {"url": "https://example.com"}}],
+    [{"type": "tool_use", "name": "analyze_page", "input": {}}],
+    [{"type": "tool_use", "name": "fill", "input": {"index": 0, "text": "python"}}],
+    [{"type": "tool_use", "name": "press", "input": {"key": "Enter"}}],
+    [{"type": "tool_use", "name": "scroll", "input": {"direction": "down"}}],
+    [{"type": "tool_use", "name": "done", "input": {"summary": "Готово"}}],
+]
+
+
+def script(request: dict) -> list[dict]:
+    messages = request["messages"]
+    if "выполнены автоматически" in str(messages[0]["content"]):
+        return SCRIPT[-1]
+    return SCRIPT[sum(m["role"] == "assistant" for m in messages)]
+
+
+async def measure(recordings_dir: str, ttft: float, delay: float) -> tuple[float, int]:
+    llm = FakeLLM(script, ttft=ttft, tokens_per_second=60.0)
+    agent = Agent(
+        api_key=None,
+        browser=SleepBrowser(delay),
+        client=llm,
+        recordings_dir=recordings_dir,
+    )
+    started = time.perf_counter()
+    await agent.run("найди вакансии python")
+    return time.perf_counter() - started, len(llm.requests)
+
+
+async def main():
+    agent_module.console.quiet = True
+    ttft, delay = 0.8, 0.1
+
+    with tempfile.TemporaryDirectory() as recordings_dir:
+        first, first_calls = await measure(recordings_dir, ttft, delay)
+        replay, replay_calls = await measure(recordings_dir, ttft, delay)
+
+    print(f"ttft={ttft}s, действие браузера {delay}s")
+    print(f"первый запуск:   {first:.2f}s, вызовов модели: {first_calls}")
+    print(f"повтор записи:   {replay:.2f}s, вызовов модели: {replay_calls}")
+    print(f"ускорение:       ×{first / replay:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
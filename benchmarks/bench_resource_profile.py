@@ -0,0 +1,108 @@
+"""Бенчмарк: загрузка тяжёлой локальной страницы с профилем "full" и "light".
+
+Локальный HTTP-сервер отдаёт страницу с картинками, шрифтом, стилем,
+скриптом и "трекером"; каждый ресурс отвечает с задержкой, как удалённый
+сервер. Каждая загрузка идёт в свежем контексте, кэш статики общий, как в
+ContextPool. Замеряется время до networkidle и число запросов к серверу.
+
+    python -m benchmarks.bench_resource_profile
+"""
+
+import asyncio
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from playwright.async_api import async_playwright
+
+from src.resources import ResourceBlocker, StaticCache, resolve_profile
+
+
+DELAY = 0.05
+IMAGES = 40
+REPEATS = 5
+
+PAGE = (
+    "<!doctype html><html><head><title>Тяжёлая страница</title>"
+    '<link rel="stylesheet" href="/static/site.css">'
+    '<script src="/static/app.js"></script>'
+    '<script async src="https://www.google-analytics.com/analytics.js"></script>'
+    "</head><body><h1>Каталог</h1>"
+    + "".join(f'<img src="/img/{i}.png" width="100" height="100">' for i in range(IMAGES))
+    + "</body></html>"
+)
+
+ASSETS = {
+    "/static/site.css": ("text/css", b"@font-face{font-family:F;src:url(/font.woff2)}"
+                         b"body{font-family:F}" + b"/*" + b"x" * 20000 + b"*/"),
+    "/static/app.js": ("application/javascript", b"void 0;" + b" " * 50000),
+    "/font.woff2": ("font/woff2", b"\0" * 40000),
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    requests = 0
+
+    def do_GET(self):
+        Handler.requests += 1
+        time.sleep(DELAY)
+        if self.path == "/":
+            kind, body = "text/html", PAGE.encode()
+        elif self.path in ASSETS:
+            kind, body = ASSETS[self.path]
+        elif self.path.startswith("/img/"):
+            kind, body = "image/png", b"\0" * 30000
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", kind)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "max-age=3600")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+async def measure(browser, url: str, profile: str) -> tuple[float, float, ResourceBlocker | None]:
+    cache = StaticCache()
+    resolved = resolve_profile(profile)
+    blocker = None
+    timings, requests = [], []
+    for _ in range(REPEATS):
+        context = await browser.new_context()
+        if resolved:
+            blocker = ResourceBlocker(resolved, cache)
+            await blocker.install(context)
+        page = await context.new_page()
+        before = Handler.requests
+        started = time.perf_counter()
+        await page.goto(url, wait_until="networkidle")
+        timings.append(time.perf_counter() - started)
+        requests.append(Handler.requests - before)
+        await context.close()
+    return statistics.median(timings) * 1000, statistics.median(requests), blocker
+
+
+async def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/"
+
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=True)
+        print(f"{'профиль':10}{'мс':>10}{'запросов':>10}")
+        for profile in ("full", "light", "text"):
+            ms, requests, blocker = await measure(browser, url, profile)
+            print(f"{profile:10}{ms:10.0f}{requests:10.0f}")
+            if blocker:
+                print(f"  последний прогон: {blocker.report()}")
+        await browser.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
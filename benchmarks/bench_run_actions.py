@@ -0,0 +1,70 @@
+"""Бенчмарк: действия по одному за ход модели против run_actions.
+
+Вход на сайт: открыть страницу, заполнить логин и пароль, нажать кнопку и
+посмотреть результат. В первом сценарии модель делает по вызову за ход и
+проверяет страницу после каждого шага; во втором — те же шаги пачками через
+run_actions с изменениями страницы в ответе.
+
+    python -m benchmarks.bench_run_actions
+"""
+
+import asyncio
+import time
+
+from src import agent as agent_module
+from src.agent import Agent
+from src.fake_llm import FakeLLM
+from benchmarks.fakes import SleepBrowser
+
+
+def tool(name: str, **args) -> list[dict]:
+    return [{"type": "tool_use", "name": name, "input": args}]
+
+
+DONE = tool("done", summary="Вошёл")
+
+STEPWISE = [
+    tool("goto", url="https://example.com/login"),
+    tool("analyze_page"),
+    tool("fill", selector="#login", text="ivan"),
+    tool("fill", selector="#password", text="secret"),
+    tool("click", selector="button.login"),
+    tool("analyze_page"),
+    DONE,
+]
+
+BATCHED = [
+    tool("run_actions", actions=[{"tool": "goto", "url": "https://example.com/login"}]),
+    tool(
+        "run_actions",
+        actions=[
+            {"tool": "fill", "selector": "#login", "text": "ivan"},
+            {"tool": "fill", "selector": "#password", "text": "secret"},
+            {"tool": "click", "selector": "button.login"},
+        ],
+    ),
+    DONE,
+]
+
+
+async def measure(script: list, ttft: float, delay: float) -> tuple[int, float]:
+    llm = FakeLLM(script, ttft=ttft, tokens_per_second=1e6)
+    agent = Agent(api_key=None, browser=SleepBrowser(delay), client=llm)
+    started = time.perf_counter()
+    await agent.run("Войди на сайт")
+    return len(script), time.perf_counter() - started
+
+
+async def main():
+    agent_module.console.quiet = True
+    ttft, delay = 0.8, 0.1
+
+    print(f"ttft={ttft}s, действие браузера {delay}s")
+    print(f"{'':14}{'ходов':>7}{'время':>9}")
+    for name, script in (("по одному", STEPWISE), ("run_actions", BATCHED)):
+        turns, elapsed = await measure(script, ttft, delay)
+        print(f"{name:14}{turns:>7}{elapsed:>8.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""Бенчмарк: последовательное выполнение tool_use-блоков против ToolScheduler.
+
+Сценарная модель выдаёт ходы с несколькими инструментами: заполнение
+нескольких полей формы и снимок страницы вместе со списком вкладок.
+Поля заполняются по очереди и с планировщиком: fill печатает в элемент в
+фокусе, и параллельный ввод на настоящей странице путал бы поля. Выигрыш
+планировщика — параллельные чтения и запуск инструментов по мере прихода
+блоков ответа; SleepBrowser не моделирует фокус, поэтому цифры верны
+только для чтений.
+
+    python -m benchmarks.bench_tool_scheduler
+"""
+
+import asyncio
+import time
+
+from src import agent as agent_module
+from src.agent import Agent
+from src.fake_llm import FakeLLM
+from benchmarks.fakes import SleepBrowser
+
+
+SCRIPT = [
+    [
+        {"type": "tool_use", "name": "fill", "input": {"selector": "#name", "text": "Иван"}},
+        {"type": "tool_use", "name": "fill", "input": {"selector": "#email", "text": "i@example.com"}},
+        {"type": "tool_use", "name": "fill", "input": {"selector": "#city", "text": "Москва"}},
+        {"type": "tool_use", "name": "fill", "input": {"selector": "#phone", "text": "+7 900"}},
+    ],
+    [
+        {"type": "tool_use", "name": "analyze_page", "input": {}},
+        {"type": "tool_use", "name": "list_tabs", "input": {}},
+    ],
+    [
+        {"type": "tool_use", "name": "scroll", "input": {"direction": "down"}},
+        {"type": "tool_use", "name": "fill", "input": {"selector": "#comment", "text": "ок"}},
+        {"type": "tool_use", "name": "fill", "input": {"selector": "#promo", "text": "X1"}},
+    ],
+    [{"type": "tool_use", "name": "done", "input": {"summary": "Форма заполнена"}}],
+]
+
+
+async def measure(parallel: bool, delay: float) -> list[float]:
+    """Возвращает время выполнения инструментов каждого хода."""
+    llm = FakeLLM(SCRIPT, ttft=0, tokens_per_second=1e6)
+    agent = Agent(
+        api_key=None,
+        browser=SleepBrowser(delay),
+        client=llm,
+        parallel_tools=parallel,
+    )
+
+    turns = []
+    original = agent._handle_tool_calls
+
+    async def timed(response, pending):
+        started = time.perf_counter()
+        await original(response, pending)
+        turns.append(time.perf_counter() - started)
+
+    agent._handle_tool_calls = timed
+    await agent.run("бенчмарк")
+    return turns
+
+
+async def main():
+    agent_module.console.quiet = True
+    delay = 0.3
+
+    sequential = await measure(False, delay)
+    parallel = await measure(True, delay)
+
+    print(f"действие браузера {delay}s")
+    print(f"{'ход':>4}{'последовательно':>18}{'планировщик':>14}")
+    for i, (seq, par) in enumerate(zip(sequential, parallel), start=1):
+        print(f"{i:>4}{seq:>17.2f}s{par:>13.2f}s")
+    print(f"{'всего':>4}{sum(sequential):>17.2f}s{sum(parallel):>13.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+"""Имитации браузера для офлайн-бенчмарков агента."""
+
+import asyncio
+
+
+class SleepPage:
+    """Имитация Page для PageAnalyzer: каждый evaluate занимает delay секунд."""
+
+    url = "https://example.com"
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    async def evaluate(self, js: str, arg=None):
+        await asyncio.sleep(self.delay)
+        if "__agentMutations" in js:
+            return {"fresh": True, "dirty": -1, "doc": None, "version": None}
+        return {
+            "title": "Пример",
+            "elements": [
+                {"index": 0, "tag": "input", "text": "", "type": "text", "href": None},
+            ],
+            "text": "Текст страницы",
+        }
+
+
+class SleepBrowser:
+    """Имитация BrowserController: каждое действие занимает фиксированное время."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.page = SleepPage(delay)
+
+    async def _act(self, result: str) -> str:
+        await asyncio.sleep(self.delay)
+        return result
+
+    async def goto(self, url):
+        return await self._act(f"Перешёл на {url}")
+
+    async def click(self, selector):
+        return await self._act(f"Кликнул на элемент: {selector}")
+
+    async def fill(self, selector, text):
+        return await self._act(f"Ввёл текст в {selector}")
+
+    async def press(self, key):
+        return await self._act(f"Нажал клавишу: {key}")
+
+    async def scroll(self, direction="down", amount=500):
+        return await self._act(f"Проскроллил {direction} на {amount}px")
+
+    async def list_tabs(self):
+        return await self._act("Вкладки:\n* [0] about:blank")
+
+    def resource_report(self):
+        return None
+
+    async def storage_state(self):
+        return {"cookies": [], "origins": []}
+
+    async def restore_state(self, storage, url):
+        return await self._act(f"Перешёл на {url}")
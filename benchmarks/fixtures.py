@@ -0,0 +1,27 @@
+"""Генераторы локальных HTML-страниц для офлайн-бенчмарков."""
+
+
+def large_page(cards: int = 2000) -> str:
+    """Тяжёлая страница: шапка, навигация и длинная лента карточек.
+
+    Каждая карточка — около пяти узлов, так что cards=2000 даёт 10k+ узлов.
+    """
+    nav = "".join(f'<a href="/section/{i}">Раздел {i}</a>' for i in range(30))
+    items = "".join(
+        f'<article class="card" data-id="{i}">'
+        f'<h3><a href="/item/{i}">Карточка номер {i}</a></h3>'
+        f"<p>Описание карточки {i}: немного текста для извлечения.</p>"
+        f'<button class="like">Нравится</button>'
+        f"<script>void {i}</script>"
+        f"</article>"
+        for i in range(cards)
+    )
+    hidden = "".join(f"<li>скрытый пункт {i}</li>" for i in range(200))
+    return (
+        "<!doctype html><html><head><title>Большая страница</title>"
+        "<style>.card{padding:4px;border:1px solid #ccc}</style></head><body>"
+        f"<header><nav>{nav}</nav><input name='q' placeholder='Поиск'></header>"
+        f"<ul style='display:none'>{hidden}</ul>"
+        f"<main>{items}</main>"
+        "<footer>Подвал сайта</footer></body></html>"
+    )
@@ -0,0 +1,182 @@
+"""Локальные сайты-фикстуры для офлайн-бенчмарков, отдаваемые по HTTP.
+
+    with LocalSite() as site:
+        site.url("/search")
+
+Страницы: /search (форма поиска и выдача /search?q=...), /mail (SPA с
+роутингом по hash, как веб-почта), /feed (лента с подгрузкой при
+прокрутке), /jobs (выдача вакансий карточками, 3 страницы с «Далее») и /big
+(страница на 10k+ элементов из fixtures.large_page).
+"""
+
+import html
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.fixtures import large_page
+
+
+def search_page(query: str = "") -> str:
+    results = ""
+    if query:
+        safe = html.escape(query)
+        results = "<ol id='results'>" + "".join(
+            f"<li><a class='result' href='/result/{i}'>{safe}: результат {i}</a>"
+            f"<p>Сниппет результата {i} по запросу «{safe}».</p></li>"
+            for i in range(1, 21)
+        ) + "</ol>"
+    return (
+        "<!doctype html><html><head><title>Поиск</title></head><body>"
+        "<form action='/search'><input name='q' placeholder='Что найти?'>"
+        "<button type='submit'>Найти</button></form>"
+        f"{results}</body></html>"
+    )
+
+
+def result_page(number: int) -> str:
+    return (
+        f"<!doctype html><html><head><title>Результат {number}</title></head><body>"
+        f"<h1>Результат {number}</h1>"
+        + "".join(f"<p>Абзац {i} страницы результата {number}.</p>" for i in range(30))
+        + "<a href='/search'>Назад к поиску</a></body></html>"
+    )
+
+
+JOBS_PAGES = 3
+JOBS_PER_PAGE = 20
+JOB_TITLES = ("Python-разработчик", "Frontend-разработчик", "Аналитик данных", "DevOps-инженер")
+
+
+def jobs_page(page: int) -> str:
+    cards = "".join(
+        f"<div class='vacancy-card'><h3 class='vacancy-card__title'>"
+        f"<a href='/vacancy/{n}'>{JOB_TITLES[n % len(JOB_TITLES)]} #{n}</a></h3>"
+        f"<div class='vacancy-card__company'>Компания {n % 9}</div>"
+        f"<div class='vacancy-card__salary'>от {100 + n * 5} 000 ₽</div>"
+        f"<p class='vacancy-card__snippet'>Требования: опыт от {n % 5 + 1} лет, "
+        f"командная работа, код-ревью.</p></div>"
+        for n in range((page - 1) * JOBS_PER_PAGE, page * JOBS_PER_PAGE)
+    )
+    nav = "".join(f"<li><a href='/jobs?page={i}'>{i}</a></li>" for i in range(1, JOBS_PAGES + 1))
+    if page < JOBS_PAGES:
+        nav += f"<li><a rel='next' href='/jobs?page={page + 1}'>Далее</a></li>"
+    return (
+        f"<!doctype html><html><head><title>Вакансии — стр. {page}</title></head><body>"
+        "<header><nav><ul class='menu'><li><a href='/'>Главная</a></li>"
+        "<li><a href='/jobs'>Вакансии</a></li><li><a href='/about'>О нас</a></li>"
+        "</ul></nav></header>"
+        f"<main><h1>Вакансии</h1><section id='results'>{cards}</section>"
+        f"<ul class='pager'>{nav}</ul></main></body></html>"
+    )
+
+
+MAIL_SPA = """<!doctype html><html><head><title>Почта</title></head><body>
+<nav><a href="#/inbox">Входящие</a> <a href="#/spam">Спам</a></nav>
+<main id="app"></main>
+<script>
+const mails = Array.from({length: 60}, (_, i) => ({
+    id: i + 1,
+    from: `sender${i % 7}@example.com`,
+    subject: i % 5 === 0 ? `Выигрыш ${i}! Заберите приз` : `Письмо ${i + 1}: отчёт за неделю`,
+    body: `Текст письма ${i + 1}. `.repeat(20),
+    spam: i % 5 === 0,
+}));
+const app = document.getElementById('app');
+function render() {
+    const route = location.hash || '#/inbox';
+    const open = route.match(/^#\\/mail\\/(\\d+)$/);
+    if (open) {
+        const mail = mails.find(m => m.id === Number(open[1]));
+        app.innerHTML = `<article><h1>${mail.subject}</h1><p>От: ${mail.from}</p>`
+            + `<p>${mail.body}</p><button class="delete" data-id="${mail.id}">Удалить</button>`
+            + `<a href="#/inbox">К списку</a></article>`;
+        return;
+    }
+    const spam = route === '#/spam';
+    app.innerHTML = '<ul>' + mails.filter(m => m.spam === spam).map(m =>
+        `<li><a class="mail" data-id="${m.id}" href="#/mail/${m.id}">${m.from} — ${m.subject}</a></li>`
+    ).join('') + '</ul>';
+}
+app.addEventListener('click', event => {
+    if (!event.target.matches('.delete')) return;
+    const index = mails.findIndex(m => m.id === Number(event.target.dataset.id));
+    mails.splice(index, 1);
+    location.hash = '#/inbox';
+});
+window.addEventListener('hashchange', render);
+render();
+</script></body></html>"""
+
+
+FEED = """<!doctype html><html><head><title>Лента</title></head><body>
+<h1>Лента новостей</h1><div id="feed"></div>
+<script>
+const feed = document.getElementById('feed');
+let next = 0;
+function more(count) {
+    const chunk = document.createDocumentFragment();
+    for (let i = 0; i < count && next < 1000; i++, next++) {
+        const post = document.createElement('article');
+        post.innerHTML = `<h2><a href="/post/${next}">Пост ${next}</a></h2>`
+            + `<p>Текст поста ${next}: новости дня, немного подробностей.</p>`
+            + `<button class="like">Нравится</button>`;
+        chunk.appendChild(post);
+    }
+    feed.appendChild(chunk);
+}
+more(50);
+window.addEventListener('scroll', () => {
+    if (innerHeight + scrollY > document.body.offsetHeight - 800) more(50);
+});
+</script></body></html>"""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        path = parts.path
+        if path == "/search":
+            query = parse_qs(parts.query).get("q", [""])[0]
+            body = search_page(query)
+        elif path.startswith("/result/"):
+            body = result_page(int(path.rsplit("/", 1)[1]))
+        elif path == "/jobs":
+            body = jobs_page(int(parse_qs(parts.query).get("page", ["1"])[0]))
+        elif path == "/mail":
+            body = MAIL_SPA
+        elif path == "/feed":
+            body = FEED
+        elif path == "/big":
+            body = large_page(2000)
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalSite:
+    """HTTP-сервер фикстур на свободном порту в фоновом потоке."""
+
+    def __init__(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}{path}"
+
+    def __enter__(self) -> "LocalSite":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
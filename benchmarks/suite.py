@@ -0,0 +1,285 @@
+"""Офлайн-набор бенчмарков: агент целиком на локальных сайтах-фикстурах.
+
+Каждый сценарий — задача и детерминированный сценарий FakeLLM без задержек
+модели, так что замеряется только наша часть: браузер, анализ страницы,
+планировщик и память. Метрики по сценарию:
+
+    e2e_s         время agent.run от начала до done
+    analyze_ms    медиана PageAnalyzer.analyze
+    action_ms     медиана действий BrowserController (goto, click, ...)
+    payload_tok   оценка токенов во всех результатах инструментов
+    js_heap_mb    JS-куча страницы после задачи
+    dom_nodes     число DOM-узлов после задачи
+
+Результат сравнивается с benchmarks/baseline.json; выход за допуск
+помечается как регрессия, и процесс завершается с кодом 1. Без базовой
+линии для какого-либо сценария сравнение не считается пройденным (код 2).
+Сценарий, не дошедший до done или с ошибкой в одном из шагов, прерывает
+прогон.
+
+    python -m benchmarks.suite                    # прогон и сравнение
+    python -m benchmarks.suite --update-baseline  # записать базовую линию
+    python -m benchmarks.suite -k mail -r 5       # один сценарий, 5 повторов
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from playwright.async_api import async_playwright
+
+import src.agent
+from src.agent import Agent
+from src.browser import BrowserController
+from src.fake_llm import FakeLLM
+from src.memory import result_text
+from src.replay import is_failed_result
+from benchmarks.sites import LocalSite
+
+
+BASELINE = Path(__file__).with_name("baseline.json")
+
+# Допустимый рост метрики относительно базовой линии
+TOLERANCE = {
+    "e2e_s": 0.25,
+    "analyze_ms": 0.25,
+    "action_ms": 0.25,
+    "payload_tok": 0.05,
+    "js_heap_mb": 0.20,
+    "dom_nodes": 0.05,
+}
+
+# Абсолютный порог шума: разница меньше него регрессией не считается
+NOISE = {
+    "e2e_s": 0.05,
+    "analyze_ms": 2.0,
+    "action_ms": 5.0,
+    "payload_tok": 20,
+    "js_heap_mb": 0.5,
+    "dom_nodes": 50,
+}
+
+
+def tool(name: str, **args) -> list[dict]:
+    return [{"type": "tool_use", "name": name, "input": args}]
+
+
+@dataclass
+class Scenario:
+    name: str
+    task: str
+    turns: list[list[dict]]
+
+
+def scenarios(site: LocalSite) -> list[Scenario]:
+    done = tool("done", summary="Готово")
+    return [
+        Scenario(
+            "search",
+            "Найди в поиске ноутбуки и открой первый результат",
+            [
+                tool("goto", url=site.url("/search")),
+                tool("analyze_page"),
+                tool("fill", selector="input[name=q]", text="ноутбуки"),
+                tool("press", key="Enter"),
+                tool("analyze_page"),
+                tool("click", selector="a.result"),
+                tool("analyze_page"),
+                done,
+            ],
+        ),
+        Scenario(
+            "mail",
+            "Открой письмо 3 во входящих, потом удали первое письмо из спама",
+            [
+                tool("goto", url=site.url("/mail")),
+                tool("analyze_page"),
+                tool("click", selector='a.mail[data-id="3"]'),
+                tool("analyze_page"),
+                tool("goto", url=site.url("/mail#/spam")),
+                tool("analyze_page"),
+                tool("click", selector="a.mail"),
+                tool("click", selector="button.delete"),
+                tool("analyze_page"),
+                done,
+            ],
+        ),
+        Scenario(
+            "feed",
+            "Пролистай ленту до поста 200",
+            [
+                tool("goto", url=site.url("/feed")),
+                tool("analyze_page"),
+                *[tool("scroll", direction="down", amount=4000) for _ in range(4)],
+                tool("analyze_page"),
+                done,
+            ],
+        ),
+        Scenario(
+            "harvest",
+            "Собери первые 200 постов ленты",
+            [
+                tool("goto", url=site.url("/feed")),
+                tool("harvest_records", max_items=200),
+                done,
+            ],
+        ),
+        Scenario(
+            "jobs",
+            "Найди 3 вакансии Python-разработчика",
+            [
+                tool("goto", url=site.url("/jobs")),
+                tool("extract_records", limit=50, pages=3),
+                done,
+            ],
+        ),
+        Scenario(
+            "big",
+            "Найди карточку номер 1500",
+            [
+                tool("goto", url=site.url("/big")),
+                tool("analyze_page"),
+                tool("analyze_page", full=True),
+                tool("observe_page"),
+                done,
+            ],
+        ),
+    ]
+
+
+async def approve(*args) -> bool:
+    return True
+
+
+async def no_answer(question: str) -> str:
+    return "(бенчмарк: ответа нет)"
+
+
+async def run_scenario(chromium, scenario: Scenario) -> dict:
+    context = await chromium.new_context(viewport={"width": 1280, "height": 800})
+    browser = BrowserController(headless=True)
+    await browser.attach(context)
+    agent = Agent(
+        api_key=None,
+        browser=browser,
+        client=FakeLLM(scenario.turns, ttft=0, tokens_per_second=1e9),
+        ask_user=no_answer,
+        confirm=approve,
+    )
+
+    started = time.perf_counter()
+    await agent.run(scenario.task)
+    e2e = time.perf_counter() - started
+
+    cdp = await context.new_cdp_session(browser.page)
+    await cdp.send("Performance.enable")
+    page_metrics = {
+        m["name"]: m["value"]
+        for m in (await cdp.send("Performance.getMetrics"))["metrics"]
+    }
+    await context.close()
+
+    spans = agent.tracer.spans
+    analyze = [s.duration_ms for s in spans if s.name == "analyzer.analyze"]
+    actions = [s.duration_ms for s in spans if s.cat == "browser"]
+    result_chars = sum(
+        s.args.get("result_chars", 0) for s in spans if s.name.startswith("tool.")
+    )
+    if agent.summary is None:
+        raise RuntimeError(f"сценарий {scenario.name} не дошёл до done")
+    failed = [
+        text
+        for message in agent.messages
+        if message["role"] == "user" and isinstance(message["content"], list)
+        for block in message["content"]
+        if block.get("type") == "tool_result"
+        and is_failed_result(text := result_text(block["content"]))
+    ]
+    if failed:
+        raise RuntimeError(f"сценарий {scenario.name}: шаг не удался: {failed[0][:200]}")
+    return {
+        "e2e_s": e2e,
+        "analyze_ms": statistics.median(analyze) if analyze else 0.0,
+        "action_ms": statistics.median(actions) if actions else 0.0,
+        "payload_tok": result_chars // 4,
+        "js_heap_mb": page_metrics["JSHeapUsedSize"] / 2**20,
+        "dom_nodes": page_metrics["Nodes"],
+    }
+
+
+def compare(name: str, current: dict, baseline: dict | None) -> list[str]:
+    """Строки отчёта по сценарию; регрессии помечены в начале строки."""
+    lines = []
+    for metric, value in current.items():
+        line = f"  {metric:12}{value:12.2f}"
+        if baseline and metric in baseline:
+            before = baseline[metric]
+            growth = (value - before) / before if before else 0.0
+            line += f"{before:12.2f}{growth:+9.1%}"
+            if value - before > NOISE[metric] and growth > TOLERANCE[metric]:
+                line = "!" + line[1:] + "  РЕГРЕССИЯ"
+        lines.append(line)
+    return [name] + lines
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Офлайн-бенчмарки агента")
+    parser.add_argument("-k", dest="only", help="запустить сценарии с этой подстрокой")
+    parser.add_argument("-r", "--repeats", type=int, default=3)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    # Вывод агента в консоль только мешает таблице результатов
+    src.agent.console.quiet = True
+
+    results = {}
+    with LocalSite() as site:
+        async with async_playwright() as pw:
+            chromium = await pw.chromium.launch(headless=True)
+            for scenario in scenarios(site):
+                if args.only and args.only not in scenario.name:
+                    continue
+                runs = [
+                    await run_scenario(chromium, scenario) for _ in range(args.repeats)
+                ]
+                results[scenario.name] = {
+                    metric: statistics.median(run[metric] for run in runs)
+                    for metric in runs[0]
+                }
+            await chromium.close()
+
+    if args.update_baseline:
+        baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+        baseline.update(results)
+        BASELINE.write_text(json.dumps(baseline, indent=2, ensure_ascii=False) + "\n")
+        print(f"Базовая линия записана в {BASELINE}")
+        return 0
+
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    missing = [name for name in results if name not in baseline]
+    print(f"  {'метрика':12}{'сейчас':>12}{'база':>12}{'рост':>9}")
+    report = []
+    for name, current in results.items():
+        report += compare(name, current, baseline.get(name))
+    print("\n".join(report))
+
+    regressions = sum(line.endswith("РЕГРЕССИЯ") for line in report)
+    if regressions:
+        print(f"\nРегрессий: {regressions}")
+        return 1
+    if missing:
+        print(
+            f"\nНет базовой линии для: {', '.join(missing)} — "
+            f"запишите её с --update-baseline на эталонной машине"
+        )
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -1,24 +1,97 @@
 import os
 import asyncio
+import argparse
 from dotenv import load_dotenv
 from rich.console import Console
 from rich.panel import Panel
 
+# anthropic и playwright импортируются лениво (create_client, start), так что
+# эти импорты дешёвые и клиенту --submit тяжёлые SDK не грузятся
 from src.browser import BrowserController
-from src.agent import Agent
+from src.agent import Agent, create_client
+from src.runner import load_tasks, run_batch
+from src.server import DEFAULT_SOCKET, AgentServer, submit
 
 
 console = Console()
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="AI Browser Agent")
+    parser.add_argument(
+        "--batch", metavar="TASKS.jsonl", help="выполнить задачи из файла JSONL"
+    )
+    parser.add_argument(
+        "-j", "--concurrency", type=int, default=4, help="задач одновременно"
+    )
+    parser.add_argument(
+        "-o", "--output", default="results.jsonl", help="файл результатов JSONL"
+    )
+    parser.add_argument(
+        "--serve", action="store_true", help="запустить сервер задач с тёплым браузером"
+    )
+    parser.add_argument("--submit", metavar="TASK", help="отправить задачу серверу")
+    parser.add_argument(
+        "--socket", default=DEFAULT_SOCKET, help="Unix-сокет сервера задач"
+    )
+    parser.add_argument(
+        "--resume",
+        nargs="?",
+        const="latest",
+        metavar="RUN_ID",
+        help="продолжить прерванный запуск (по умолчанию — последний)",
+    )
+    return parser.parse_args()
+
+
 async def main():
     load_dotenv()
+    args = parse_args()
+
+    if args.submit:
+        await submit(args.submit, path=args.socket)
+        return
 
     api_key = os.getenv("ANTHROPIC_API_KEY")
     if not api_key or api_key == "your_api_key_here":
         console.print("[red]Ошибка: Укажите ANTHROPIC_API_KEY в .env файле[/]")
         return
 
+    if args.batch:
+        await run_batch(
+            load_tasks(args.batch),
+            api_key=api_key,
+            output=args.output,
+            concurrency=args.concurrency,
+            headless=os.getenv("BROWSER_HEADLESS", "true").lower() == "true",
+            load_profile=os.getenv("LOAD_PROFILE") or None,
+            trace_dir=os.getenv("TRACE_DIR"),
+            recordings_dir=os.getenv("RECORDINGS_DIR"),
+            prefetch_pages=int(os.getenv("PREFETCH_PAGES", "0")),
+            checkpoint_dir=os.getenv("CHECKPOINT_DIR") or None,
+            fast_model=os.getenv("FAST_MODEL") or None,
+        )
+        return
+
+    if args.serve:
+        server = AgentServer(
+            api_key=api_key,
+            pool_size=args.concurrency,
+            headless=os.getenv("BROWSER_HEADLESS", "true").lower() == "true",
+            load_profile=os.getenv("LOAD_PROFILE") or None,
+            trace_dir=os.getenv("TRACE_DIR"),
+            recordings_dir=os.getenv("RECORDINGS_DIR"),
+            prefetch_pages=int(os.getenv("PREFETCH_PAGES", "0")),
+            checkpoint_dir=os.getenv("CHECKPOINT_DIR") or None,
+            fast_model=os.getenv("FAST_MODEL") or None,
+        )
+        await server.start(path=args.socket)
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+        return
+
     user_data_dir = os.getenv("USER_DATA_DIR", "./browser_data")
     headless = os.getenv("BROWSER_HEADLESS", "false").lower() == "true"
 
@@ -31,13 +104,36 @@ async def main():
         )
     )
 
-    browser = BrowserController(user_data_dir=user_data_dir, headless=headless)
+    browser = BrowserController(
+        user_data_dir=user_data_dir,
+        headless=headless,
+        load_profile=os.getenv("LOAD_PROFILE") or None,
+    )
 
     try:
-        await browser.start()
+        # Chromium стартует, пока в потоке импортируется SDK и создаётся клиент
+        client, _ = await asyncio.gather(
+            asyncio.to_thread(create_client, api_key), browser.start()
+        )
         console.print("[green]✓ Браузер запущен[/]\n")
 
-        agent = Agent(api_key=api_key, browser=browser)
+        agent = Agent(
+            api_key=api_key,
+            browser=browser,
+            client=client,
+            trace_dir=os.getenv("TRACE_DIR"),
+            recordings_dir=os.getenv("RECORDINGS_DIR"),
+            prefetch_pages=int(os.getenv("PREFETCH_PAGES", "0")),
+            checkpoint_dir=os.getenv("CHECKPOINT_DIR") or None,
+            fast_model=os.getenv("FAST_MODEL") or None,
+        )
+
+        if args.resume:
+            try:
+                await agent.resume(None if args.resume == "latest" else args.resume)
+            except (RuntimeError, ValueError) as e:
+                console.print(f"[red]Ошибка: {e}[/]")
+            console.print("\n" + "─" * 50 + "\n")
 
         while True:
             try:
@@ -1,5 +1,17 @@
-from .browser import BrowserController
-from .agent import Agent
-from .page_analyzer import PageAnalyzer
+# Подмодули импортируются по первому обращению: `import src` не должен
+# тянуть anthropic и playwright, пока они не нужны
+_EXPORTS = {
+    "BrowserController": ".browser",
+    "Agent": ".agent",
+    "PageAnalyzer": ".page_analyzer",
+}
 
-__all__ = ["BrowserController", "Agent", "PageAnalyzer"]
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    return getattr(import_module(_EXPORTS[name], __name__), name)
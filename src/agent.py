@@ -1,8 +1,34 @@
-import anthropic
+import asyncio
+import time
+import uuid
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Awaitable, Callable
 from rich.console import Console
+from rich.markup import escape
 from .browser import BrowserController
+from .checkpoint import CheckpointStore, RunState, append_note
+from .memory import ConversationMemory, TurnUsage
 from .page_analyzer import PageAnalyzer
-from .tools import TOOLS, is_dangerous_action
+from .prefetch import Prefetcher
+from .records import RecordExtractor
+from .replay import (
+    REPLAYABLE_TOOLS,
+    Recorder,
+    RecordingStore,
+    is_failed_result,
+    match_element,
+)
+from .routing import ModelRouter, ModelTier, RoutingRules
+from .scheduler import ToolScheduler
+from .tools import (
+    BATCH_TOOLS,
+    MAX_BATCH_ACTIONS,
+    TOOLS,
+    element_target,
+    is_dangerous_action,
+)
+from .tracing import Tracer, annotate, span
 
 
 console = Console()
@@ -12,113 +38,705 @@ SYSTEM_PROMPT = """Ты — AI-агент, управляющий веб-бра
 
 ПРАВИЛА:
 1. Используй analyze_page чтобы понять, что на странице
-2. Выбирай селекторы из списка интерактивных элементов
+2. Для click и fill указывай index элемента из списка интерактивных элементов
 3. Действуй пошагово, проверяя результат каждого действия
 4. Если что-то не работает — попробуй другой подход
-5. Если нужна информация от пользователя — используй ask_user
-6. Когда задача выполнена — используй done с отчётом
+5. Если текст страницы огромный или важна вёрстка — используй observe_page
+   (дерево доступности, при необходимости со скриншотом)
+6. Если нужны данные из списка, таблицы или выдачи (вакансии, товары,
+   письма) — используй extract_records вместо чтения текста страницы;
+   для бесконечной ленты — harvest_records вместо цикла scroll → analyze_page
+7. Если следующие шаги понятны заранее (заполнить форму и отправить) —
+   выполни их одним вызовом run_actions
+8. Если нужна информация от пользователя — используй ask_user
+9. Когда задача выполнена — используй done с отчётом
 
 ВАЖНО:
-- Не придумывай селекторы — бери их со страницы
+- Не придумывай номера и селекторы — бери их со страницы
 - Перед деструктивными действиями убедись, что это то, что нужно
 - Будь внимателен к контексту и состоянию страницы"""
 
+MODEL = "claude-sonnet-4-20250514"
+MAX_TOKENS = 4096
+# Рутинному шагу хватает одного вызова инструмента
+FAST_MAX_TOKENS = 1024
+# Сколько раз подряд ответ может оборваться на max_tokens до остановки
+MAX_TRUNCATED_TURNS = 2
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+# Точки кэширования промпта: конец списка инструментов и системный промпт.
+# Третья точка ставится на последнее сообщение истории при каждом запросе.
+CACHED_TOOLS = TOOLS[:-1] + [{**TOOLS[-1], "cache_control": CACHE_CONTROL}]
+CACHED_SYSTEM = [
+    {"type": "text", "text": SYSTEM_PROMPT, "cache_control": CACHE_CONTROL}
+]
+
+
+def _block_to_dict(block) -> dict:
+    """Приводит блок ответа модели к словарю для истории сообщений."""
+    if block.type == "tool_use":
+        return {
+            "type": "tool_use",
+            "id": block.id,
+            "name": block.name,
+            "input": block.input,
+        }
+    if block.type == "text":
+        return {"type": "text", "text": block.text}
+    # Блоки серверных инструментов (pause_turn) возвращаются API как есть
+    return block.model_dump(exclude_none=True)
+
+
+def _with_history_breakpoint(messages: list[dict]) -> list[dict]:
+    """Копия истории с точкой кэширования на последнем блоке.
+
+    Сама история не меняется, чтобы метка не копилась в старых сообщениях.
+    """
+    if not messages:
+        return messages
+    last = messages[-1]
+    content = last["content"]
+    if isinstance(content, str):
+        content = [{"type": "text", "text": content}]
+    content = content[:-1] + [{**content[-1], "cache_control": CACHE_CONTROL}]
+    return messages[:-1] + [{**last, "content": content}]
+
+
+def create_client(api_key: str | None):
+    """AsyncAnthropic с отложенным импортом SDK.
+
+    Импорт anthropic — самая долгая часть холодного старта, поэтому он
+    происходит только здесь; вызывающие могут выполнить это в потоке
+    параллельно с запуском браузера.
+    """
+    import anthropic
+
+    return anthropic.AsyncAnthropic(api_key=api_key)
+
+
+# Картинки к результату выполняемого инструмента; у каждого вызова — свой
+# список (инструменты выполняются в отдельных задачах asyncio)
+_tool_images: ContextVar[list[dict] | None] = ContextVar("tool_images", default=None)
+
+
+# Политики взаимодействия с человеком: по умолчанию — консоль, в серверном
+# режиме их подменяют (см. src/server.py)
+AskUserPolicy = Callable[[str], Awaitable[str]]
+ConfirmPolicy = Callable[[str, dict, str], Awaitable[bool]]
+EventSink = Callable[[dict], None]
+
+
+async def console_ask_user(question: str) -> str:
+    console.print(f"\n[bold cyan]❓ Агент спрашивает:[/] {question}")
+    return console.input("[bold]Ваш ответ: [/]")
+
+
+async def console_confirm(tool_name: str, args: dict, reason: str) -> bool:
+    console.print(f"\n[bold red]⚠️  ВНИМАНИЕ: {reason}[/]")
+    console.print(f"Действие: {tool_name} с параметрами {args}")
+    response = console.input("[bold]Выполнить? (y/n): [/]")
+    return response.lower() in ("y", "yes", "да", "д")
+
 
 class Agent:
-    def __init__(self, api_key: str, browser: BrowserController):
-        self.client = anthropic.Anthropic(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str | None,
+        browser: BrowserController,
+        client=None,
+        streaming: bool = True,
+        token_budget: int = 30000,
+        parallel_tools: bool = True,
+        trace_dir: str | None = None,
+        recordings_dir: str | None = None,
+        ask_user: AskUserPolicy | None = None,
+        confirm: ConfirmPolicy | None = None,
+        on_event: EventSink | None = None,
+        prefetch_pages: int = 0,
+        checkpoint_dir: str | None = None,
+        fast_model: str | None = None,
+        routing: RoutingRules | None = None,
+    ):
+        # client можно подменить, например на src.fake_llm.FakeLLM
+        self.client = client or create_client(api_key)
+        self.streaming = streaming
+        # Быстрая модель для рутинных шагов; без неё все шаги идут MODEL
+        self.router = ModelRouter(
+            ModelTier("основная", MODEL, MAX_TOKENS),
+            ModelTier("быстрая", fast_model, FAST_MAX_TOKENS) if fast_model else None,
+            routing,
+        )
+        self.parallel_tools = parallel_tools
+        self.trace_dir = Path(trace_dir) if trace_dir else None
+        self.tracer = Tracer()
+        self.recordings = RecordingStore(recordings_dir) if recordings_dir else None
+        self.recorder = Recorder()
+        self.checkpoints = CheckpointStore(checkpoint_dir) if checkpoint_dir else None
+        self._checkpointer = None
+        self._step_offset = 0
+        self.run_id: str | None = None
+        self.ask_user = ask_user or console_ask_user
+        self.confirm = confirm or console_confirm
+        self.on_event = on_event
         self.browser = browser
         self.analyzer = PageAnalyzer()
+        self.records = RecordExtractor()
+        self.memory = ConversationMemory(token_budget=token_budget)
+        # Предзагрузка вероятных следующих страниц в фоне (0 — выключена)
+        self.prefetcher = (
+            Prefetcher(browser, self.analyzer, prefetch_pages) if prefetch_pages else None
+        )
         self.messages = []
         self.running = False
+        self.summary: str | None = None
+        # Задача и последнее действие: по ним analyze_page отбирает содержимое
+        self.task = ""
+        self.last_action = ""
         self._user_response = None
         self._waiting_for_user = False
 
-    async def run(self, task: str):
+    async def run(self, task: str) -> str | None:
+        """Выполняет задачу. Возвращает итоговый отчёт из done, если он был."""
+        return await self._traced_run(task, self._run(task))
+
+    async def resume(self, run_id: str | None = None) -> str | None:
+        """Продолжает прерванный запуск с последней контрольной точки.
+
+        run_id=None — самый свежий незавершённый запуск.
+        """
+        if self.checkpoints is None:
+            raise RuntimeError("Контрольные точки выключены: задайте checkpoint_dir")
+        run_id = run_id or self.checkpoints.latest_unfinished()
+        state = self.checkpoints.load(run_id) if run_id else None
+        if run_id is None:
+            raise ValueError("Незавершённых запусков нет")
+        if state is None or state.finished:
+            raise ValueError(f"Запуск {run_id} не найден или уже завершён")
+        return await self._traced_run(state.task, self._resume(state))
+
+    async def _traced_run(self, task: str, body) -> str | None:
+        self.tracer = Tracer(task)
+        with self.tracer.activate(), span("agent.run", "agent"):
+            try:
+                await body
+            except BaseException:
+                # Запуск оборвался: файл остаётся незавершённым, его можно продолжить
+                await self._close_checkpoints(finished=False)
+                raise
+            else:
+                await self._close_checkpoints(finished=True)
+            finally:
+                if self.prefetcher:
+                    await self.prefetcher.close()
+        self._emit("finished", summary=self.summary)
+        if self.trace_dir:
+            self._export_trace()
+        return self.summary
+
+    async def _close_checkpoints(self, finished: bool):
+        if self._checkpointer is not None:
+            await self._checkpointer.close(self.summary, finished=finished)
+            self._checkpointer = None
+
+    def _reset_run(self, task: str, messages: list[dict]):
         self.running = True
-        self.messages = [{"role": "user", "content": f"Задача: {task}"}]
+        self.summary = None
+        self.task = task
+        self.last_action = ""
+        self.messages = messages
+        self.memory.reset()
+        self.analyzer.reset()
+        self.records.reset()
+        self.recorder = Recorder()
+        self.router.reset()
+        self._step_offset = 0
+
+    async def _run(self, task: str):
+        self._reset_run(task, [{"role": "user", "content": f"Задача: {task}"}])
 
         console.print(f"\n[bold green]🚀 Начинаю задачу:[/] {task}\n")
+        self._emit("task_started", task=task)
+
+        recording = self.recordings.load(task) if self.recordings else None
+        if recording:
+            note = await self._replay(recording)
+            self.messages[0]["content"] += note
+            # Снимки повтора модель не видела: её первый analyze_page — полный
+            self.analyzer.reset()
+
+        if self.checkpoints:
+            self.run_id, self._checkpointer = self.checkpoints.create(
+                task, self.messages, self.browser
+            )
+            console.print(f"[dim]💾 Контрольные точки: {self.run_id}[/]")
+
+        await self._step_loop()
+        self._report(task)
+
+    async def _resume(self, state: RunState):
+        self._reset_run(state.task, state.messages)
+        # Часть действий уже сделана не по записи: сохранять её нельзя
+        self.recorder.replayable = False
+        self.run_id = state.run_id
+        self._step_offset = state.steps
+
+        console.print(
+            f"\n[bold green]🔁 Продолжаю запуск {state.run_id} с шага "
+            f"{state.steps + 1}:[/] {state.task}\n"
+        )
+        self._emit("task_started", task=state.task, resumed_from=state.steps)
+
+        restored = await self.browser.restore_state(state.storage, state.url)
+        note = (
+            f"[Запуск возобновлён после сбоя. {restored}. Снимки страниц выше "
+            f"могли устареть — начни с analyze_page.]"
+        )
+        self._checkpointer = self.checkpoints.reopen(state, self.browser)
+        self._append_note(note)
+        await self._step_loop()
+        self._report(state.task)
 
+    async def _step_loop(self):
+        truncated = 0
         while self.running:
-            response = self._call_llm()
+            history_tokens = self.memory.compact(self.messages)
+            response, pending, turn = await self._call_llm(history_tokens)
+            console.print(
+                f"[dim]📊 Шаг {turn.step}: вход {turn.input_tokens}, "
+                f"выход {turn.output_tokens}, кэш: чтение {turn.cache_read_tokens}, "
+                f"запись {turn.cache_write_tokens}, "
+                f"история ≈{turn.history_tokens} ток.[/]"
+            )
+            self._emit(
+                "step",
+                step=turn.step,
+                input_tokens=turn.input_tokens,
+                output_tokens=turn.output_tokens,
+            )
+
+            # Инструменты, запущенные до обрыва ответа (max_tokens), уже
+            # изменили страницу: их результаты попадают в историю, а модель
+            # продолжает с учётом сделанного
+            if response.stop_reason == "tool_use" or pending:
+                truncated = 0
+                await self._handle_tool_calls(response, pending)
+                if self._checkpointer is not None:
+                    self._checkpointer.step(self._step_offset + turn.step, self.messages)
+                continue
+
+            if response.stop_reason == "pause_turn":
+                # API прервал длинный ход: отправляем начатое обратно, и
+                # модель продолжит с того же места
+                self.messages.append(self._assistant_turn(response.content))
+                continue
 
-            if response.stop_reason == "end_turn":
+            if response.stop_reason == "max_tokens":
+                truncated += 1
+                if truncated > MAX_TRUNCATED_TURNS:
+                    console.print(
+                        f"\n[bold red]⛔ Ответ модели {truncated} раз подряд "
+                        f"обрывается на лимите токенов, останавливаюсь[/]"
+                    )
+                    self.running = False
+                    break
+                self._keep_partial_answer(response)
+                continue
+
+            if response.stop_reason == "refusal":
                 self._handle_text_response(response)
+                console.print("\n[bold red]⛔ Модель отказалась выполнять задачу[/]")
+                self.running = False
                 break
 
-            if response.stop_reason == "tool_use":
-                await self._handle_tool_calls(response)
+            self._handle_text_response(response)
+            break
 
-    def _call_llm(self):
-        return self.client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=4096,
-            system=SYSTEM_PROMPT,
-            tools=TOOLS,
-            messages=self.messages,
+    def _report(self, task: str):
+        console.print(
+            f"[dim]📊 Итого токенов: вход {self.memory.total_input_tokens}, "
+            f"выход {self.memory.total_output_tokens}, "
+            f"кэш: чтение {self.memory.total_cache_read_tokens}, "
+            f"запись {self.memory.total_cache_write_tokens}[/]"
+        )
+        if self.memory.truncations:
+            console.print(
+                f"[dim]📊 Обрезка истории: {self.memory.truncations} раз, "
+                f"мимо кэша промпта ≈{self.memory.uncached_tokens} ток.[/]"
+            )
+        stats = self.analyzer.cache_stats()
+        console.print(
+            f"[dim]📊 Кэш снимков страниц: попаданий {stats['hits']}, "
+            f"промахов {stats['misses']}[/]"
+        )
+        if self.router.small is not None:
+            console.print(f"[dim]📊 Модели: {self.router.report()}[/]")
+        if resources := self.browser.resource_report():
+            console.print(f"[dim]📊 Профиль загрузки: {resources}[/]")
+
+        if self.recordings and self.summary is not None and self.recorder.replayable:
+            self.recordings.save(task, self.recorder.steps, self.summary)
+
+    async def _replay(self, recording: dict) -> str:
+        """Повторяет записанные шаги без модели.
+
+        Возвращает пояснение для модели: с какого шага продолжать или, если
+        запись выполнена целиком, просьбу сверить страницу и подвести итог —
+        отчёт прошлого запуска мог устареть.
+        """
+        steps = recording["steps"]
+        console.print(f"[bold magenta]⏩ Повтор записи:[/] {len(steps)} шагов")
+
+        for number, step in enumerate(steps, start=1):
+            args = step.args
+            element = None
+            if step.fingerprint is not None:
+                page = self.browser.page
+                await self.analyzer.analyze_diff(page)
+                element = match_element(
+                    step.fingerprint, self.analyzer.latest(page)["interactive_elements"]
+                )
+                if element is None:
+                    error = f"элемент {step.fingerprint} не найден на странице"
+                    return self._replay_failure(number, len(steps), step, error)
+                args = {**args, "index": element["index"]}
+
+            console.print(f"[magenta]⏩ {step.tool}[/]: {args}")
+            self._emit("tool", name=step.tool, input=args, replay=True)
+            result = await self._guarded_execute(step.tool, args)
+            if is_failed_result(result):
+                return self._replay_failure(number, len(steps), step, result)
+            self.recorder.record(step.tool, args, element, result)
+
+        console.print("[magenta]⏩ Запись повторена целиком, итог подведёт модель[/]")
+        # Сверить страницу и вызвать done — рутинный шаг для быстрой модели
+        self.router.prefer_small("итог повтора")
+        return (
+            f"\n\nВсе шаги ({len(steps)}) уже выполнены автоматически по записи "
+            f"прошлого запуска. Отчёт того запуска: «{recording['summary']}» — "
+            f"данные на странице могли измениться. Проверь текущее состояние "
+            f"страницы и вызови done с актуальным итогом."
+        )
+
+    def _replay_failure(self, number: int, total: int, step, error: str) -> str:
+        console.print(f"[yellow]⏩ Шаг {number} не повторился, передаю модели[/]")
+        return (
+            f"\n\nЧасть шагов уже выполнена автоматически по записи прошлого "
+            f"запуска ({number - 1} из {total}). Шаг {number} ({step.tool} "
+            f"{step.args}) не удался: {error}. Продолжи с текущего состояния "
+            f"страницы."
         )
 
+    def _export_trace(self):
+        self.trace_dir.mkdir(parents=True, exist_ok=True)
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self.tracer.export_json(self.trace_dir / f"{stamp}.json")
+        self.tracer.export_chrome(self.trace_dir / f"{stamp}.trace.json")
+        console.print(self.tracer.summary_table())
+        console.print(f"[dim]Трасса сохранена в {self.trace_dir / stamp}.*[/]")
+
+    async def _call_llm(
+        self, history_tokens: int
+    ) -> tuple[object, list[asyncio.Task], TurnUsage]:
+        tier, reason = self.router.choose(self.messages, self.memory.is_snapshot)
+        with span("agent.call_llm", "llm", messages=len(self.messages)):
+            response, pending, turn = await self._timed_request(
+                tier, reason, history_tokens
+            )
+            if escalated := self.router.escalate(tier, response):
+                console.print(
+                    f"[dim]↗ {tier.name} модель не выбрала действие, "
+                    f"переспрашиваю {escalated[0].name}[/]"
+                )
+                if pending:
+                    await self._handle_tool_calls(response, pending)
+                tier, reason = escalated
+                response, pending, turn = await self._timed_request(
+                    tier, reason, history_tokens, retry=True
+                )
+        return response, pending, turn
+
+    async def _timed_request(
+        self, tier: ModelTier, reason: str, history_tokens: int, retry: bool = False
+    ) -> tuple[object, list[asyncio.Task], TurnUsage]:
+        """Один запрос к модели. Задержка и токены учитываются для каждого
+        запроса, в том числе для ответа быстрой модели перед переспросом."""
+        with span("agent.llm_request", "llm", model=tier.model, route=reason):
+            started = time.perf_counter()
+            response, pending = await self._request_llm(tier)
+            turn = self.memory.record_usage(
+                response.usage, history_tokens, tier.model, retry
+            )
+            self.router.record(
+                tier,
+                time.perf_counter() - started,
+                turn.input_tokens,
+                turn.output_tokens,
+            )
+            annotate(
+                input_tokens=turn.input_tokens,
+                output_tokens=turn.output_tokens,
+                cache_read_tokens=turn.cache_read_tokens,
+                cache_write_tokens=turn.cache_write_tokens,
+            )
+        return response, pending, turn
+
+    async def _request_llm(self, tier: ModelTier) -> tuple[object, list[asyncio.Task]]:
+        """Запрашивает модель, запуская инструменты по мере их получения.
+
+        Возвращает итоговый ответ и задачи уже запущенных tool_use-блоков.
+        """
+        request = dict(
+            model=tier.model,
+            max_tokens=tier.max_tokens,
+            system=CACHED_SYSTEM,
+            tools=CACHED_TOOLS,
+            messages=_with_history_breakpoint(self.messages),
+        )
+
+        scheduler = ToolScheduler(parallel=self.parallel_tools)
+
+        if not self.streaming:
+            response = await self.client.messages.create(**request)
+            for block in response.content:
+                if block.type == "tool_use":
+                    self._schedule_tool(scheduler, block)
+            return response, scheduler.tasks
+
+        try:
+            async with self.client.messages.stream(**request) as stream:
+                async for event in stream:
+                    if event.type != "content_block_stop":
+                        continue
+                    block = stream.current_message_snapshot.content[event.index]
+                    if block.type == "tool_use":
+                        self._schedule_tool(scheduler, block)
+                response = await stream.get_final_message()
+        except BaseException:
+            scheduler.cancel()
+            raise
+
+        return response, scheduler.tasks
+
+    def _schedule_tool(self, scheduler: ToolScheduler, block) -> asyncio.Task:
+        return scheduler.schedule(
+            block.name,
+            self._safety_args(block.name, block.input),
+            lambda: self._run_tool_block(block),
+        )
+
+    def _safety_args(self, name: str, args: dict) -> dict:
+        """Аргументы для проверки опасности: номер элемента или ссылка
+        aria-ref=eN дополняются подписью элемента со страницы, иначе "[12]"
+        или "aria-ref=e12" не содержали бы ни одного слова."""
+        selector = str(args.get("selector", ""))
+        if args.get("index") is None and not selector.startswith("aria-ref="):
+            return args
+        try:
+            page = self.browser.page
+            if args.get("index") is not None:
+                label = self.analyzer.describe_element(page, args["index"])
+            else:
+                label = self.analyzer.describe_ref(page, selector.removeprefix("aria-ref="))
+        except Exception:
+            label = ""
+        return {**args, "element": label}
+
+    def _keep_partial_answer(self, response):
+        """Ответ оборвался на max_tokens без запущенных инструментов:
+        начатый текст остаётся в истории, а модель просят ответить короче.
+        Без этого тот же запрос повторялся бы с тем же обрывом."""
+        note = (
+            "[Ответ оборвался на лимите токенов. Не повторяй его целиком — "
+            "коротко продолжи и вызови нужный инструмент.]"
+        )
+        texts = [b for b in response.content if b.type == "text" and b.text.strip()]
+        if texts:
+            self.messages.append(self._assistant_turn(texts))
+            self.messages.append({"role": "user", "content": note})
+        else:
+            self._append_note(note)
+
+    def _append_note(self, note: str):
+        """Дописывает служебную заметку к последнему сообщению пользователя —
+        и в историю, и в контрольные точки, чтобы повторное продолжение
+        увидело то же, что видела модель."""
+        append_note(self.messages, note)
+        if self._checkpointer is not None:
+            self._checkpointer.note(self.messages, note)
+
+    @staticmethod
+    def _assistant_turn(blocks) -> dict:
+        return {"role": "assistant", "content": [_block_to_dict(b) for b in blocks]}
+
     def _handle_text_response(self, response):
         for block in response.content:
             if hasattr(block, "text"):
                 console.print(f"\n[bold blue]💭 Агент:[/] {block.text}")
 
-    async def _handle_tool_calls(self, response):
-        self.messages.append({"role": "assistant", "content": response.content})
-
-        tool_results = []
-        for block in response.content:
-            if block.type != "tool_use":
-                continue
+    async def _handle_tool_calls(self, response, pending: list[asyncio.Task]):
+        """Дожидается запущенных инструментов и записывает ход в историю.
+
+        Если ответ оборвался, недописанный tool_use не запускался: он не
+        попадает в историю, иначе у него не было бы tool_result.
+        """
+        tool_results = list(await asyncio.gather(*pending))
+        started = {result["tool_use_id"] for result in tool_results}
+        self.messages.append(
+            {
+                "role": "assistant",
+                "content": [
+                    _block_to_dict(b)
+                    for b in response.content
+                    if b.type != "tool_use" or b.id in started
+                ],
+            }
+        )
+        self.messages.append({"role": "user", "content": tool_results})
 
-            tool_name = block.name
-            tool_input = block.input
+    async def _run_tool_block(self, block) -> dict:
+        tool_name = block.name
+        tool_input = block.input
 
-            console.print(f"[yellow]🔧 {tool_name}[/]: {tool_input}")
+        console.print(f"[yellow]🔧 {tool_name}[/]: {tool_input}")
+        self._emit("tool", name=tool_name, input=tool_input)
 
-            is_dangerous, reason = is_dangerous_action(tool_name, tool_input)
-            if is_dangerous:
-                if not self._confirm_action(tool_name, tool_input, reason):
-                    tool_results.append(
-                        {
-                            "type": "tool_result",
-                            "tool_use_id": block.id,
-                            "content": "Действие отменено пользователем",
-                        }
-                    )
-                    continue
+        element = self._find_element(tool_input)
+        images: list[dict] = []
+        _tool_images.set(images)
+        result = await self._guarded_execute(tool_name, tool_input)
+        self._remember_action(tool_name, tool_input, element, result)
+        self._emit("tool_result", name=tool_name, result=result[:500])
 
-            result = await self._execute_tool(tool_name, tool_input)
+        console.print(
+            f"[dim]→ {escape(result[:200])}...[/]"
+            if len(result) > 200
+            else f"[dim]→ {escape(result)}[/]"
+        )
 
-            console.print(
-                f"[dim]→ {result[:200]}...[/]"
-                if len(result) > 200
-                else f"[dim]→ {result}[/]"
+        content = [{"type": "text", "text": result}, *images] if images else result
+        return {"type": "tool_result", "tool_use_id": block.id, "content": content}
+
+    def _find_element(self, args: dict) -> dict | None:
+        if args.get("index") is None:
+            return None
+        return self.analyzer.find_element(self.browser.page, args["index"])
+
+    def _remember_action(self, name: str, args: dict, element: dict | None, result: str):
+        """Записывает шаг для повтора и запоминает последнее действие для
+        ранжирования следующего снимка."""
+        self.recorder.record(name, args, element, result)
+        if name in REPLAYABLE_TOOLS and not is_failed_result(result):
+            self.last_action = " ".join(
+                [*map(str, args.values()), element["text"] if element else ""]
             )
 
-            tool_results.append(
-                {"type": "tool_result", "tool_use_id": block.id, "content": result}
+    async def _guarded_execute(self, name: str, args: dict) -> str:
+        """Выполняет инструмент, спрашивая подтверждение для опасных действий."""
+        safety_args = self._safety_args(name, args)
+        is_dangerous, reason = is_dangerous_action(name, safety_args)
+        if is_dangerous and not await self.confirm(name, safety_args, reason):
+            return "Действие отменено пользователем"
+        return await self._execute_tool(name, args)
+
+    def _emit(self, event_type: str, **data):
+        if self.on_event is not None:
+            self.on_event({"type": event_type, **data})
+
+    async def _execute_tool(self, name: str, args: dict) -> str:
+        with span(f"tool.{name}", "tool"):
+            result = await self._dispatch_tool(name, args)
+            annotate(result_chars=len(result))
+        return result
+
+    async def _analyze_page(self, full: bool = False, prefix: str = "") -> str:
+        """Снимок страницы или его изменения; prefix — начало результата
+        инструмента (например, отчёт run_actions), оно остаётся и в заглушке."""
+        page = self.browser.page
+        if full:
+            self.analyzer.forget(page)
+        analysis = await self.analyzer.analyze_diff(page)
+        query = f"{self.task} {self.last_action}"
+        result = prefix + self.analyzer.format_diff_for_llm(analysis, query)
+        if analysis["mode"] == "full":
+            self.memory.register_snapshot(
+                result, prefix + self.analyzer.format_stub(analysis)
+            )
+            if self.prefetcher:
+                self.prefetcher.schedule(analysis, query)
+        return result
+
+    async def _extract_records(self, selector: str | None, limit: int, pages: int) -> str:
+        """Записи текущей страницы и, если нужно, следующих страниц выдачи.
+
+        Переход на следующую страницу — обычный goto: он записывается для
+        повтора, а запись ищется по селектору, найденному на первой странице.
+        """
+        limit = max(1, min(limit, self.records.MAX_RECORDS))
+        pages = max(1, min(pages, self.records.MAX_PAGES))
+        collected = None
+        for number in range(1, pages + 1):
+            found = await self.records.extract(self.browser.page, selector, limit)
+            collected = self.records.merge(collected, found)
+            selector = found["selector"]
+            if number == pages or len(collected["records"]) >= limit or not found["next"]:
+                break
+            url = {"url": found["next"]}
+            result = await self._guarded_execute("goto", url)
+            self._remember_action("goto", url, None, result)
+            if is_failed_result(result):
+                break
+        return self.records.format_for_llm(collected, limit)
+
+    async def _run_actions(self, actions: list[dict], observe: bool) -> str:
+        """Выполняет шаги run_actions подряд, без обращения к модели.
+
+        Каждый шаг проходит ту же проверку опасных действий, что и отдельный
+        вызов, и записывается для повтора как отдельный шаг. На первой ошибке
+        или отказе пользователя выполнение останавливается.
+        """
+        if not actions:
+            return "Ошибка выполнения run_actions: список действий пуст"
+        if len(actions) > MAX_BATCH_ACTIONS:
+            return (
+                f"Ошибка выполнения run_actions: не больше {MAX_BATCH_ACTIONS} "
+                f"действий за вызов, передано {len(actions)}"
             )
 
-        self.messages.append({"role": "user", "content": tool_results})
+        lines = []
+        done = 0
+        for number, action in enumerate(actions, 1):
+            step_args = {k: v for k, v in action.items() if k != "tool"}
+            step_tool = action.get("tool")
+            if step_tool not in BATCH_TOOLS:
+                result = f"Ошибка: действие {step_tool!r} нельзя выполнять в run_actions"
+            else:
+                element = self._find_element(step_args)
+                result = await self._guarded_execute(step_tool, step_args)
+                self._remember_action(step_tool, step_args, element, result)
+            lines.append(f"{number}. {step_tool} {step_args} → {result}")
+            if is_failed_result(result):
+                break
+            done += 1
 
-    def _confirm_action(self, tool_name: str, args: dict, reason: str) -> bool:
-        console.print(f"\n[bold red]⚠️  ВНИМАНИЕ: {reason}[/]")
-        console.print(f"Действие: {tool_name} с параметрами {args}")
-        response = console.input("[bold]Выполнить? (y/n): [/]")
-        return response.lower() in ("y", "yes", "да", "д")
+        header = f"Выполнено шагов: {done} из {len(actions)}"
+        if done < len(actions):
+            header += f"; остановлено на шаге {done + 1}, остальные не выполнялись"
+        result = "\n".join([header, *lines])
+        if observe:
+            return await self._analyze_page(prefix=result + "\n\n")
+        return result
 
-    async def _execute_tool(self, name: str, args: dict) -> str:
+    async def _dispatch_tool(self, name: str, args: dict) -> str:
         try:
             if name == "goto":
                 return await self.browser.goto(args["url"])
 
             elif name == "click":
-                return await self.browser.click(args["selector"])
+                return await self.browser.click(element_target(args))
 
             elif name == "fill":
-                return await self.browser.fill(args["selector"], args["text"])
+                return await self.browser.fill(element_target(args), args["text"])
 
             elif name == "press":
                 return await self.browser.press(args["key"])
@@ -129,14 +747,85 @@ class Agent:
                 )
 
             elif name == "analyze_page":
-                analysis = await self.analyzer.analyze(self.browser.page)
-                return self.analyzer.format_for_llm(analysis)
+                return await self._analyze_page(full=bool(args.get("full")))
 
-            elif name == "ask_user":
-                console.print(
-                    f"\n[bold cyan]❓ Агент спрашивает:[/] {args['question']}"
+            elif name == "extract_records":
+                return await self._extract_records(
+                    args.get("selector"),
+                    int(args.get("limit", 20)),
+                    int(args.get("pages", 1)),
+                )
+
+            elif name == "harvest_records":
+                max_items = int(args.get("max_items", 50))
+                offset = max(0, int(args.get("offset", 0)))
+                page = self.browser.page
+                harvested = (
+                    self.records.harvested(page, args.get("selector")) if offset else None
+                )
+                if harvested is None:
+                    harvested = await self.records.harvest(
+                        page,
+                        args.get("selector"),
+                        offset + max_items,
+                        args.get("stop_text"),
+                        int(args.get("max_scrolls", self.records.MAX_SCROLLS)),
+                    )
+                return self.records.format_for_llm(
+                    harvested,
+                    max_items,
+                    offset,
+                    more="harvest_records с offset={offset} (без повторной прокрутки)",
+                )
+
+            elif name == "run_actions":
+                return await self._run_actions(
+                    args.get("actions") or [], args.get("observe", True)
                 )
-                answer = console.input("[bold]Ваш ответ: [/]")
+
+            elif name == "observe_page":
+                page = self.browser.page
+                tree = await self.analyzer.accessibility_tree(page)
+                result = self.analyzer.format_accessibility_for_llm(tree)
+                images = _tool_images.get()
+                if args.get("screenshot") and images is not None:
+                    shot = await self.browser.compressed_screenshot(
+                        max_bytes=args.get("max_image_kb", 60) * 1024
+                    )
+                    images.append(
+                        {
+                            "type": "image",
+                            "source": {
+                                "type": "base64",
+                                "media_type": "image/jpeg",
+                                "data": shot.data,
+                            },
+                        }
+                    )
+                    result += (
+                        f"\n\n[скриншот {shot.width}x{shot.height}, "
+                        f"JPEG q{shot.quality}, {shot.size / 1024:.1f} КБ]"
+                    )
+                self.memory.register_snapshot(
+                    result, self.analyzer.format_accessibility_stub(tree)
+                )
+                return result
+
+            elif name == "list_tabs":
+                return await self.browser.list_tabs()
+
+            elif name == "new_tab":
+                return await self.browser.new_tab(args.get("url"))
+
+            elif name == "switch_tab":
+                return await self.browser.switch_tab(int(args["tab"]))
+
+            elif name == "close_tab":
+                tab = args.get("tab")
+                return await self.browser.close_tab(int(tab) if tab is not None else None)
+
+            elif name == "ask_user":
+                answer = await self.ask_user(args["question"])
                 return f"Пользователь ответил: {answer}"
 
             elif name == "done":
@@ -144,6 +833,7 @@ class Agent:
                     f"\n[bold green]✅ Задача выполнена![/]\n{args['summary']}"
                 )
                 self.running = False
+                self.summary = args["summary"]
                 return "Задача завершена"
 
             else:
@@ -1,19 +1,205 @@
+import asyncio
+import base64
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+from typing import TYPE_CHECKING
 from .config import load_config, save_config
+from .resources import LoadProfile, ResourceBlocker, StaticCache, resolve_profile
+from .tracing import annotate, traced
+
+# Playwright импортируется в start(): клиенту --submit и офлайн-бенчмаркам он не нужен
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Page
+
+
+# Потолок ожидания стабилизации страницы после действия, мс
+DEFAULT_SETTLE_TIMEOUTS = {
+    "goto": 5000,
+    "click": 3000,
+    "press": 2000,
+    "scroll": 1000,
+}
+
+# Сколько DOM должен простоять без мутаций, чтобы считаться стабильным, мс
+SETTLE_QUIET_MS = 100
+
+# Резолвится, когда DOM не менялся quiet мс подряд, или по потолку
+DOM_QUIET_JS = """
+([quiet, ceiling]) => new Promise(resolve => {
+    let timer;
+    const done = (reason) => {
+        observer.disconnect();
+        clearTimeout(timer);
+        clearTimeout(cap);
+        resolve(reason);
+    };
+    const observer = new MutationObserver(() => {
+        clearTimeout(timer);
+        timer = setTimeout(() => done('dom'), quiet);
+    });
+    observer.observe(document.documentElement, {
+        subtree: true, childList: true, attributes: true, characterData: true,
+    });
+    timer = setTimeout(() => done('dom'), quiet);
+    const cap = setTimeout(() => done('timeout'), ceiling);
+})
+"""
+
+
+# Находит элемент по номеру из последнего analyze_page: null, если номер
+# неизвестен (например, после навигации) или элемент уже удалён из DOM
+RESOLVE_ELEMENT_JS = """
+(id) => {
+    const ids = window.__agentIds;
+    if (!ids) return null;
+    const el = ids.current.get(id) || document.querySelector(`[data-agent-id="${id}"]`);
+    return el && el.isConnected ? el : null;
+}
+"""
+
+
+# Сжатый скриншот для модели: ступени качества JPEG и минимальная ширина,
+# ниже которой картинку уже не уменьшаем
+SCREENSHOT_QUALITIES = (70, 50, 35)
+SCREENSHOT_MIN_WIDTH = 320
+
+# Сколько секунд предзагруженная страница считается свежей
+PREFETCH_TTL = 60.0
+
+VIEWPORT_JS = """
+() => [window.scrollX, window.scrollY, window.innerWidth, window.innerHeight]
+"""
+
+
+class StaleElementError(Exception):
+    pass
+
+
+@dataclass
+class SettleReport:
+    action: str
+    ms: float
+    reason: str
+
+
+@dataclass
+class Screenshot:
+    data: str  # base64
+    size: int  # байт JPEG
+    width: int
+    height: int
+    quality: int
+
+
+class ActivityWatch:
+    """Запросы и навигации страницы, начатые после действия.
+
+    Ставится до действия: networkidle загруженной страницы наступил раньше
+    и ничего не говорит о запросах, которые вызвало само действие.
+    Учитываются документ главного фрейма и xhr/fetch — картинки, шрифты и
+    долгие соединения (websocket, eventsource) ожидание не держат.
+    """
+
+    TRACKED_TYPES = {"document", "xhr", "fetch"}
+
+    def __init__(self, page: "Page"):
+        self.page = page
+        self.inflight: set = set()
+        self.navigated = False
+        self._changed = asyncio.Event()
+        self._listeners = [
+            ("request", self._on_request),
+            ("requestfinished", self._on_finished),
+            ("requestfailed", self._on_finished),
+            ("framenavigated", self._on_navigated),
+        ]
+
+    def __enter__(self) -> "ActivityWatch":
+        for event, handler in self._listeners:
+            self.page.on(event, handler)
+        return self
+
+    def __exit__(self, *exc):
+        for event, handler in self._listeners:
+            self.page.remove_listener(event, handler)
+
+    @property
+    def navigating(self) -> bool:
+        """Запрошен новый документ главного фрейма, но он ещё не пришёл."""
+        return any(r.resource_type == "document" for r in self.inflight)
+
+    async def wait_change(self, timeout: float):
+        """Ждёт следующего запроса, ответа или навигации (секунды)."""
+        self._changed.clear()
+        try:
+            await asyncio.wait_for(self._changed.wait(), max(timeout, 0.001))
+        except asyncio.TimeoutError:
+            pass
+
+    def _on_request(self, request):
+        if request.resource_type not in self.TRACKED_TYPES:
+            return
+        if request.resource_type == "document" and not self._in_main_frame(request):
+            return
+        self.inflight.add(request)
+        self._changed.set()
+
+    def _on_finished(self, request):
+        if request in self.inflight:
+            self.inflight.discard(request)
+            self._changed.set()
+
+    def _on_navigated(self, frame):
+        if frame == self.page.main_frame:
+            self.navigated = True
+            self._changed.set()
+
+    def _in_main_frame(self, request) -> bool:
+        try:
+            return request.frame == self.page.main_frame
+        except Exception:
+            # Запросы service worker не привязаны к фрейму
+            return False
 
 
 class BrowserController:
-    def __init__(self, user_data_dir: str = "./browser_data", headless: bool = False):
+    def __init__(
+        self,
+        user_data_dir: str = "./browser_data",
+        headless: bool = False,
+        settle_timeouts: dict[str, int] | None = None,
+        load_profile: str | LoadProfile | None = None,
+        static_cache: StaticCache | None = None,
+    ):
+        """load_profile — "full", "light", "text" или свой LoadProfile;
+        static_cache можно разделить между несколькими контроллерами."""
         self.user_data_dir = Path(user_data_dir)
         self.headless = headless
         self.config = load_config()
+        self.settle_timeouts = {**DEFAULT_SETTLE_TIMEOUTS, **(settle_timeouts or {})}
+        self.settle_log: list[SettleReport] = []
+        profile = resolve_profile(load_profile)
+        self.resources = (
+            ResourceBlocker(profile, static_cache or StaticCache()) if profile else None
+        )
         self._playwright = None
-        self._browser: Browser | None = None
-        self._context: BrowserContext | None = None
-        self._page: Page | None = None
+        self._browser: "Browser | None" = None
+        self._context: "BrowserContext | None" = None
+        self._page: "Page | None" = None
+        self._owns_context = True
+        # Реестр вкладок: номер -> страница; номера не переиспользуются
+        self._tabs: dict[int, "Page"] = {}
+        self._next_tab = 1
+        # Фоновые страницы предзагрузки: URL -> (время загрузки, страница)
+        self._prefetched: dict[str, tuple[float, "Page"]] = {}
+        # Все страницы предзагрузки, в том числе ещё загружающиеся: в реестр
+        # вкладок они не попадают
+        self._background: set["Page"] = set()
+
+    async def start(self) -> "Page":
+        from playwright.async_api import async_playwright
 
-    async def start(self) -> Page:
         self.user_data_dir.mkdir(parents=True, exist_ok=True)
 
         cfg = self.config
@@ -21,16 +207,29 @@ class BrowserController:
         self._context = await self._playwright.chromium.launch_persistent_context(
             user_data_dir=str(self.user_data_dir),
             headless=self.headless,
-            viewport=None,  # Отключаем фиксированный viewport
+            # В окне размер задаёт окно, без окна — сохранённый viewport
+            viewport=(
+                {"width": cfg["viewport_width"], "height": cfg["viewport_height"]}
+                if self.headless
+                else None
+            ),
             locale="ru-RU",
             args=["--disable-infobars"],
         )
+        if self.resources:
+            await self.resources.install(self._context)
+        self._track_tabs(self._context)
 
         self._page = (
             self._context.pages[0]
             if self._context.pages
             else await self._context.new_page()
         )
+        self._tab_id(self._page)
+
+        # Без окна позиционировать нечего — лишний раунд CDP на старте
+        if self.headless:
+            return self._page
 
         # Устанавливаем позицию и размер окна через CDP
         cdp = await self._context.new_cdp_session(self._page)
@@ -50,6 +249,59 @@ class BrowserController:
 
         return self._page
 
+    async def attach(self, context: "BrowserContext") -> "Page":
+        """Работает в уже созданном контексте, например из ContextPool.
+
+        Контекст остаётся во владении вызывающего: close() его не закрывает.
+        """
+        self._context = context
+        self._owns_context = False
+        if self.resources:
+            await self.resources.install(context)
+        self._track_tabs(context)
+        self._page = context.pages[0] if context.pages else await context.new_page()
+        self._tab_id(self._page)
+        return self._page
+
+    def _track_tabs(self, context: "BrowserContext"):
+        """Регистрирует открытые и все будущие вкладки контекста, включая
+        открытые страницей (target=_blank, window.open)."""
+        for page in context.pages:
+            self._tab_id(page)
+        context.on("page", self._on_new_page)
+
+    def _on_new_page(self, page: "Page"):
+        if page in self._background:
+            # Страница предзагрузки: модели она не видна
+            return
+        self._tab_id(page)
+
+    def _hide_tab(self, page: "Page"):
+        """Убирает страницу предзагрузки из реестра вкладок, если событие
+        "page" успело зарегистрировать её раньше, чем вернулся new_page()."""
+        self._background.add(page)
+        for tab_id, known in list(self._tabs.items()):
+            if known is page:
+                del self._tabs[tab_id]
+                page.remove_listener("close", self._on_tab_closed)
+
+    def _tab_id(self, page: "Page") -> int:
+        for tab_id, known in self._tabs.items():
+            if known is page:
+                return tab_id
+        tab_id = self._next_tab
+        self._next_tab += 1
+        self._tabs[tab_id] = page
+        page.on("close", self._on_tab_closed)
+        return tab_id
+
+    def _on_tab_closed(self, page: "Page"):
+        for tab_id, known in list(self._tabs.items()):
+            if known is page:
+                del self._tabs[tab_id]
+        if page is self._page:
+            self._page = self._tabs[max(self._tabs)] if self._tabs else None
+
     async def save_window_position(self) -> str:
         """Сохраняет текущую позицию и размер окна браузера."""
         js_code = """
@@ -79,44 +331,347 @@ class BrowserController:
         return f"Сохранено: позиция ({pos['x']}, {pos['y']}), размер {pos['width']}x{pos['height']}"
 
     @property
-    def page(self) -> Page:
+    def page(self) -> "Page":
         if not self._page:
             raise RuntimeError("Браузер не запущен. Вызовите start() сначала.")
         return self._page
 
-    async def goto(self, url: str) -> str:
-        await self.page.goto(url, wait_until="domcontentloaded")
-        await self.page.wait_for_timeout(500)
-        return f"Перешёл на {self.page.url}"
+    async def _settle(
+        self, action: str, activity: ActivityWatch, timeout: int | None = None
+    ) -> SettleReport:
+        """Ждёт, пока страница успокоится после действия.
+
+        Главный признак — DOM не меняется SETTLE_QUIET_MS. Если действие
+        начало навигацию, сначала дожидается нового документа, если начало
+        xhr/fetch — их ответов, после чего снова ждёт тишины DOM.
+        activity ставится до действия. timeout — потолок ожидания в мс,
+        по умолчанию из settle_timeouts.
+        """
+        ceiling = timeout if timeout is not None else self.settle_timeouts[action]
+        started = time.perf_counter()
+        deadline = started + ceiling / 1000
+        page = self.page
+        reason = "dom"
+
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                reason = "timeout"
+                break
+            if activity.navigating:
+                await activity.wait_change(remaining)
+                continue
+            if activity.navigated:
+                activity.navigated = False
+                reason = "navigation"
+                try:
+                    await page.wait_for_load_state(
+                        "domcontentloaded", timeout=remaining * 1000
+                    )
+                except Exception:
+                    continue
+            try:
+                quiet = await page.evaluate(
+                    DOM_QUIET_JS, [SETTLE_QUIET_MS, remaining * 1000]
+                )
+            except Exception:
+                # Контекст уничтожен — действие вызвало навигацию
+                if page.is_closed():
+                    break
+                await activity.wait_change(min(remaining, SETTLE_QUIET_MS / 1000))
+                continue
+            if quiet == "timeout":
+                reason = "timeout"
+                break
+            if activity.navigated:
+                continue
+            if not activity.inflight:
+                break
+            while activity.inflight and time.perf_counter() < deadline:
+                await activity.wait_change(deadline - time.perf_counter())
+            if reason == "dom":
+                reason = "network"
+
+        report = SettleReport(action, (time.perf_counter() - started) * 1000, reason)
+        self.settle_log.append(report)
+        annotate(settle_ms=round(report.ms, 1), settle_reason=reason)
+        return report
+
+    @staticmethod
+    def _format_settle(report: SettleReport) -> str:
+        return f" [ожидание {report.ms:.0f} мс: {report.reason}]"
 
-    async def click(self, selector: str) -> str:
+    @traced("browser.goto", "browser")
+    async def goto(self, url: str, settle_timeout: int | None = None) -> str:
+        prefetched = self._take_prefetched(url)
+        if prefetched is not None:
+            # Страница уже загружена в фоне: подменяем ею текущую вкладку
+            # (история "назад" текущей вкладки при этом теряется)
+            old, tab_id = self.page, self._tab_id(self.page)
+            self._background.discard(prefetched)
+            self._tabs[tab_id] = prefetched
+            self._page = prefetched
+            prefetched.on("close", self._on_tab_closed)
+            if not self.headless:
+                await prefetched.bring_to_front()
+            await old.close()
+            annotate(prefetched=True)
+            return f"Перешёл на {prefetched.url} [из предзагрузки]"
+
+        with ActivityWatch(self.page) as activity:
+            await self.page.goto(url, wait_until="domcontentloaded")
+            report = await self._settle("goto", activity, settle_timeout)
+        return f"Перешёл на {self.page.url}" + self._format_settle(report)
+
+    async def _locate(self, target: str | int):
+        """Номер элемента из analyze_page -> ElementHandle, строка -> Locator."""
+        if isinstance(target, str):
+            return self.page.locator(target).first
+
+        handle = await self.page.evaluate_handle(RESOLVE_ELEMENT_JS, target)
+        element = handle.as_element()
+        if element is None:
+            await handle.dispose()
+            raise StaleElementError(
+                f"элемента [{target}] больше нет на странице, вызовите analyze_page"
+            )
+        return element
+
+    @staticmethod
+    def _describe_target(target: str | int) -> str:
+        return f"[{target}]" if isinstance(target, int) else target
+
+    @traced("browser.click", "browser")
+    async def click(
+        self, target: str | int, settle_timeout: int | None = None
+    ) -> str:
+        """target — номер элемента из analyze_page или CSS-селектор."""
         try:
-            await self.page.click(selector, timeout=5000)
-            await self.page.wait_for_timeout(500)
-            return f"Кликнул на элемент: {selector}"
+            element = await self._locate(target)
+            tabs_before = set(self._tabs)
+            with ActivityWatch(self.page) as activity:
+                await element.click(timeout=5000)
+                report = await self._settle("click", activity, settle_timeout)
+            result = (
+                f"Кликнул на элемент: {self._describe_target(target)}"
+                + self._format_settle(report)
+            )
+            opened = [tab_id for tab_id in self._tabs if tab_id not in tabs_before]
+            if opened:
+                await self._activate(opened[-1])
+                result += f"; открылась новая вкладка [{opened[-1]}], она теперь активна"
+            return result
         except Exception as e:
             return f"Ошибка клика: {e}"
 
-    async def fill(self, selector: str, text: str) -> str:
+    @traced("browser.fill", "browser")
+    async def fill(self, target: str | int, text: str) -> str:
+        """target — номер элемента из analyze_page или CSS-селектор."""
         try:
-            await self.page.fill(selector, text, timeout=5000)
-            return f"Ввёл текст в {selector}"
+            element = await self._locate(target)
+            await element.fill(text, timeout=5000)
+            return f"Ввёл текст в {self._describe_target(target)}"
         except Exception as e:
             return f"Ошибка ввода: {e}"
 
-    async def press(self, key: str) -> str:
-        await self.page.keyboard.press(key)
-        return f"Нажал клавишу: {key}"
+    @traced("browser.press", "browser")
+    async def press(self, key: str, settle_timeout: int | None = None) -> str:
+        with ActivityWatch(self.page) as activity:
+            await self.page.keyboard.press(key)
+            report = await self._settle("press", activity, settle_timeout)
+        return f"Нажал клавишу: {key}" + self._format_settle(report)
 
-    async def scroll(self, direction: str = "down", amount: int = 500) -> str:
+    @traced("browser.scroll", "browser")
+    async def scroll(
+        self,
+        direction: str = "down",
+        amount: int = 500,
+        settle_timeout: int | None = None,
+    ) -> str:
         delta = amount if direction == "down" else -amount
-        await self.page.mouse.wheel(0, delta)
-        await self.page.wait_for_timeout(300)
-        return f"Проскроллил {direction} на {amount}px"
+        with ActivityWatch(self.page) as activity:
+            await self.page.mouse.wheel(0, delta)
+            report = await self._settle("scroll", activity, settle_timeout)
+        return f"Проскроллил {direction} на {amount}px" + self._format_settle(report)
+
+    async def _activate(self, tab_id: int):
+        self._page = self._tabs[tab_id]
+        await self._page.wait_for_load_state("domcontentloaded")
+        if not self.headless:
+            await self._page.bring_to_front()
+
+    async def _describe_tab(self, tab_id: int) -> str:
+        page = self._tabs[tab_id]
+        marker = " (активная)" if page is self._page else ""
+        try:
+            title = await page.title()
+        except Exception:
+            title = ""
+        return f"[{tab_id}]{marker} {title} — {page.url}"
+
+    @traced("browser.list_tabs", "browser")
+    async def list_tabs(self) -> str:
+        lines = [await self._describe_tab(tab_id) for tab_id in self._tabs]
+        return "Открытые вкладки:\n" + "\n".join(lines)
+
+    @traced("browser.new_tab", "browser")
+    async def new_tab(self, url: str | None = None) -> str:
+        page = await self._context.new_page()
+        tab_id = self._tab_id(page)
+        await self._activate(tab_id)
+        if url:
+            await self.goto(url)
+        return f"Открыл вкладку [{tab_id}]" + (f": {self.page.url}" if url else "")
+
+    @traced("browser.switch_tab", "browser")
+    async def switch_tab(self, tab_id: int) -> str:
+        if tab_id not in self._tabs:
+            return f"Ошибка: вкладки [{tab_id}] нет. " + await self.list_tabs()
+        await self._activate(tab_id)
+        return "Переключился на вкладку " + await self._describe_tab(tab_id)
+
+    @traced("browser.close_tab", "browser")
+    async def close_tab(self, tab_id: int | None = None) -> str:
+        tab_id = tab_id if tab_id is not None else self._tab_id(self.page)
+        if tab_id not in self._tabs:
+            return f"Ошибка: вкладки [{tab_id}] нет"
+        if len(self._tabs) == 1:
+            return "Ошибка: нельзя закрыть последнюю вкладку"
+        await self._tabs[tab_id].close()
+        return f"Закрыл вкладку [{tab_id}], активная: " + await self._describe_tab(
+            self._tab_id(self.page)
+        )
+
+    async def storage_state(self) -> dict:
+        """Куки и localStorage контекста (формат Playwright storage_state)."""
+        return await self.page.context.storage_state()
+
+    @traced("browser.restore_state", "browser")
+    async def restore_state(self, storage: dict | None, url: str | None) -> str:
+        """Восстанавливает куки и localStorage, затем открывает url."""
+        if storage:
+            if storage.get("cookies"):
+                await self.page.context.add_cookies(storage["cookies"])
+            for origin in storage.get("origins", []):
+                if not origin.get("localStorage"):
+                    continue
+                await self.page.goto(origin["origin"], wait_until="domcontentloaded")
+                await self.page.evaluate(
+                    "items => items.forEach(i => localStorage.setItem(i.name, i.value))",
+                    origin["localStorage"],
+                )
+        if url and url != "about:blank":
+            return await self.goto(url)
+        return "Состояние браузера восстановлено"
+
+    @traced("browser.prefetch", "browser")
+    async def prefetch(self, url: str) -> "Page":
+        """Загружает url в фоновой странице, невидимой в списке вкладок.
+
+        Следующий goto на этот url заберёт страницу вместо загрузки.
+        В видимом браузере новая страница открывается вкладкой поверх
+        текущей, поэтому активная вкладка сразу возвращается на передний план.
+        """
+        page = await self._context.new_page()
+        self._hide_tab(page)
+        try:
+            if not self.headless:
+                await self.page.bring_to_front()
+            await page.goto(url, wait_until="domcontentloaded")
+            try:
+                await page.wait_for_load_state(
+                    "networkidle", timeout=self.settle_timeouts["goto"]
+                )
+            except Exception:
+                pass
+        except BaseException:
+            self._background.discard(page)
+            await page.close()
+            raise
+        loaded = time.monotonic()
+        self._prefetched[url] = (loaded, page)
+        if page.url != url:
+            self._prefetched[page.url] = (loaded, page)
+        return page
+
+    def is_prefetched(self, url: str) -> bool:
+        entry = self._prefetched.get(url)
+        return entry is not None and time.monotonic() - entry[0] < PREFETCH_TTL
+
+    def _take_prefetched(self, url: str) -> "Page | None":
+        if not self.is_prefetched(url):
+            return None
+        _, page = self._prefetched[url]
+        self._prefetched = {
+            key: entry for key, entry in self._prefetched.items() if entry[1] is not page
+        }
+        if page.is_closed():
+            self._background.discard(page)
+            return None
+        return page
+
+    async def drop_prefetched(self, keep: set[str] = frozenset()):
+        """Закрывает фоновые страницы, кроме загруженных по адресам из keep."""
+        kept = {page for url, (_, page) in self._prefetched.items() if url in keep}
+        for page in {page for _, page in self._prefetched.values()} - kept:
+            self._background.discard(page)
+            await page.close()
+        self._prefetched = {
+            url: entry for url, entry in self._prefetched.items() if entry[1] in kept
+        }
+
+    def resource_report(self) -> str | None:
+        """Сводка профиля загрузки: что заблокировано и что взято из кэша."""
+        return self.resources.report() if self.resources else None
 
     async def screenshot(self) -> bytes:
         return await self.page.screenshot()
 
+    @traced("browser.compressed_screenshot", "browser")
+    async def compressed_screenshot(
+        self, max_bytes: int = 60_000, max_width: int = 1024
+    ) -> Screenshot:
+        """JPEG видимой области, уменьшенный до max_width и уложенный в max_bytes.
+
+        Сначала снижается качество, затем масштаб — по 0.75 за шаг до
+        SCREENSHOT_MIN_WIDTH; если и так не влезло, отдаётся последний кадр.
+        Масштабирует сам Chromium (clip.scale в CDP), без декодирования в Python.
+        """
+        x, y, width, height = await self.page.evaluate(VIEWPORT_JS)
+        scale = min(1.0, max_width / width)
+        cdp = await self.page.context.new_cdp_session(self.page)
+        try:
+            while True:
+                for quality in SCREENSHOT_QUALITIES:
+                    shot = await cdp.send(
+                        "Page.captureScreenshot",
+                        {
+                            "format": "jpeg",
+                            "quality": quality,
+                            "clip": {
+                                "x": x,
+                                "y": y,
+                                "width": width,
+                                "height": height,
+                                "scale": scale,
+                            },
+                        },
+                    )
+                    size = len(base64.b64decode(shot["data"]))
+                    if size <= max_bytes:
+                        break
+                if size <= max_bytes or width * scale * 0.75 < SCREENSHOT_MIN_WIDTH:
+                    break
+                scale *= 0.75
+        finally:
+            await cdp.detach()
+
+        result = Screenshot(
+            shot["data"], size, round(width * scale), round(height * scale), quality
+        )
+        annotate(image_bytes=size, image_width=result.width, image_quality=quality)
+        return result
+
     async def get_url(self) -> str:
         return self.page.url
 
@@ -124,7 +679,7 @@ class BrowserController:
         return await self.page.title()
 
     async def close(self):
-        if self._context:
+        if self._context and self._owns_context:
             await self._context.close()
         if self._playwright:
             await self._playwright.stop()
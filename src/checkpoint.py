@@ -0,0 +1,173 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from .browser import BrowserController
+
+
+@dataclass
+class RunState:
+    """Состояние запуска, восстановленное из контрольных точек."""
+
+    run_id: str
+    task: str
+    messages: list[dict]
+    url: str | None
+    storage: dict | None
+    steps: int
+    finished: bool
+    size: int = 0  # байт целых строк: хвост после падения отрезается
+
+
+def append_note(messages: list[dict], note: str):
+    """Дописывает служебную заметку к последнему сообщению истории."""
+    last = messages[-1]
+    if isinstance(last["content"], str):
+        last["content"] += "\n\n" + note
+    else:
+        last["content"].append({"type": "text", "text": note})
+
+
+def _line(meta: dict, messages_json: str) -> str:
+    # Сообщения сериализуются заранее, в цикле шагов: дальше история может
+    # меняться (сжатие памяти), а в файл должна попасть именно эта версия
+    return json.dumps(meta, ensure_ascii=False)[:-1] + f', "messages": {messages_json}}}\n'
+
+
+class Checkpointer:
+    """Дописывает контрольные точки одного запуска в фоне.
+
+    Файл — JSONL только на дозапись: первая строка с задачей, дальше по
+    строке на шаг с новыми сообщениями (не всей историей), URL и состоянием
+    хранилища (куки и localStorage — только если они изменились). Шаг лишь
+    сериализует новые сообщения и ставит запись в очередь; состояние
+    браузера и запись на диск делает фоновая задача.
+    """
+
+    def __init__(self, path: Path, browser: BrowserController, written: int = 0):
+        self.path = path
+        self.browser = browser
+        # Сколько сообщений истории уже в файле
+        self._written = written
+        self._storage_digest: str | None = None
+        self._queue: asyncio.Queue[tuple[dict, str] | None] = asyncio.Queue()
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def _delta(self, messages: list[dict]) -> str:
+        delta = messages[self._written :]
+        self._written = len(messages)
+        return json.dumps(delta, ensure_ascii=False)
+
+    def start(self, run_id: str, task: str, messages: list[dict]):
+        meta = {"type": "start", "run_id": run_id, "task": task, "time": time.time()}
+        self._queue.put_nowait((meta, self._delta(messages)))
+
+    def step(self, step: int, messages: list[dict]):
+        self._queue.put_nowait(({"type": "step", "step": step}, self._delta(messages)))
+
+    def note(self, messages: list[dict], note: str):
+        """Записывает заметку к последнему сообщению истории. Если оно ещё
+        не в файле, заметка попадёт туда вместе с ним на следующем шаге."""
+        if len(messages) > self._written:
+            return
+        self._queue.put_nowait(({"type": "note", "note": note}, "[]"))
+
+    async def close(self, summary: str | None = None, finished: bool = True):
+        if finished:
+            meta = {"type": "finished", "summary": summary, "time": time.time()}
+            self._queue.put_nowait((meta, "[]"))
+        self._queue.put_nowait(None)
+        await self._writer
+
+    async def _write_loop(self):
+        while (item := await self._queue.get()) is not None:
+            meta, messages_json = item
+            if meta["type"] == "step":
+                await self._add_browser_state(meta)
+            await asyncio.to_thread(self._append, _line(meta, messages_json))
+
+    async def _add_browser_state(self, meta: dict):
+        try:
+            meta["url"] = self.browser.page.url
+            storage = await self.browser.storage_state()
+        except Exception:
+            return
+        digest = hashlib.sha1(
+            json.dumps(storage, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        if digest != self._storage_digest:
+            self._storage_digest = digest
+            meta["storage"] = storage
+
+    def _append(self, line: str):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+class CheckpointStore:
+    """Контрольные точки запусков: один JSONL-файл на запуск."""
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+
+    def _path(self, run_id: str) -> Path:
+        return self.directory / f"{run_id}.jsonl"
+
+    def create(
+        self, task: str, messages: list[dict], browser: BrowserController
+    ) -> tuple[str, Checkpointer]:
+        """Заводит файл нового запуска, первой строкой — задача."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        run_id = time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        checkpointer = Checkpointer(self._path(run_id), browser)
+        checkpointer.start(run_id, task, messages)
+        return run_id, checkpointer
+
+    def reopen(self, state: RunState, browser: BrowserController) -> Checkpointer:
+        """Продолжает файл восстановленного запуска."""
+        path = self._path(state.run_id)
+        os.truncate(path, state.size)
+        return Checkpointer(path, browser, len(state.messages))
+
+    def load(self, run_id: str) -> RunState | None:
+        path = self._path(run_id)
+        if not path.exists():
+            return None
+        state = RunState(run_id, "", [], None, None, 0, False)
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # Недописанная строка после падения процесса
+                if not line.endswith(b"\n"):
+                    break
+                state.size += len(line)
+                state.messages.extend(record.get("messages", []))
+                kind = record["type"]
+                if kind == "start":
+                    state.task = record["task"]
+                elif kind == "step":
+                    state.steps = record["step"]
+                    state.url = record.get("url", state.url)
+                    state.storage = record.get("storage", state.storage)
+                elif kind == "note":
+                    append_note(state.messages, record["note"])
+                elif kind == "finished":
+                    state.finished = True
+        return state
+
+    def latest_unfinished(self) -> str | None:
+        """Самый свежий незавершённый запуск."""
+        paths = sorted(
+            self.directory.glob("*.jsonl"), key=lambda p: p.stat().st_mtime, reverse=True
+        )
+        for path in paths:
+            state = self.load(path.stem)
+            if state is not None and not state.finished:
+                return path.stem
+        return None
@@ -0,0 +1,140 @@
+"""Локальная замена anthropic.AsyncAnthropic для офлайн-бенчмарков.
+
+FakeLLM воспроизводит заранее заданный сценарий ответов и имитирует задержки
+модели: время до первого токена и скорость генерации, при желании свои для
+каждой модели (чтобы проверять маршрутизацию между быстрой и большой
+моделью без сети). Поддерживает тот же интерфейс, что использует Agent:
+messages.create() и messages.stream().
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+
+def _estimate_tokens(value) -> int:
+    return max(1, len(json.dumps(value, ensure_ascii=False, default=str)) // 4)
+
+
+class _FakeStream:
+    def __init__(self, llm: "FakeLLM", turn: list[dict], request: dict):
+        self._llm = llm
+        self._turn = turn
+        self._request = request
+        self._ttft, self._tokens_per_second = llm.speed(request.get("model"))
+        self.current_message_snapshot = SimpleNamespace(
+            type="message",
+            role="assistant",
+            content=[],
+            stop_reason=None,
+            usage=SimpleNamespace(
+                input_tokens=_estimate_tokens(request.get("messages", [])),
+                output_tokens=0,
+            ),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self._events()
+
+    async def _events(self):
+        snapshot = self.current_message_snapshot
+        yield SimpleNamespace(type="message_start", message=snapshot)
+        await asyncio.sleep(self._ttft)
+
+        for index, spec in enumerate(self._turn):
+            block = self._llm._make_block(spec)
+            snapshot.content.append(block)
+            yield SimpleNamespace(
+                type="content_block_start", index=index, content_block=block
+            )
+            tokens = _estimate_tokens(spec)
+            await asyncio.sleep(tokens / self._tokens_per_second)
+            snapshot.usage.output_tokens += tokens
+            yield SimpleNamespace(
+                type="content_block_stop", index=index, content_block=block
+            )
+
+        snapshot.stop_reason = self._llm._stop_reason(snapshot.content)
+        yield SimpleNamespace(type="message_delta", usage=snapshot.usage)
+        yield SimpleNamespace(type="message_stop", message=snapshot)
+
+    async def get_final_message(self):
+        if self.current_message_snapshot.stop_reason is None:
+            async for _ in self:
+                pass
+        return self.current_message_snapshot
+
+
+class _FakeMessages:
+    def __init__(self, llm: "FakeLLM"):
+        self._llm = llm
+
+    def stream(self, **request) -> _FakeStream:
+        self._llm.requests.append(request)
+        return _FakeStream(self._llm, self._llm._next_turn(request), request)
+
+    async def create(self, **request):
+        self._llm.requests.append(request)
+        stream = _FakeStream(self._llm, self._llm._next_turn(request), request)
+        return await stream.get_final_message()
+
+
+class FakeLLM:
+    """Сценарная модель: каждый ход — список блоков text/tool_use.
+
+    script — список ходов, либо функция (request) -> ход, если ответ
+    должен зависеть от истории сообщений или от модели (request["model"]).
+    speeds — задержки отдельных моделей: {model: (ttft, tokens_per_second)}.
+    """
+
+    def __init__(
+        self,
+        script,
+        ttft: float = 0.8,
+        tokens_per_second: float = 60.0,
+        speeds: dict[str, tuple[float, float]] | None = None,
+    ):
+        self.script = script
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.speeds = speeds or {}
+        self.requests: list[dict] = []
+        self.messages = _FakeMessages(self)
+        self._turn_index = 0
+        self._id_counter = 0
+
+    def speed(self, model: str | None) -> tuple[float, float]:
+        return self.speeds.get(model, (self.ttft, self.tokens_per_second))
+
+    def _next_turn(self, request: dict) -> list[dict]:
+        if callable(self.script):
+            turn = self.script(request)
+        elif self._turn_index < len(self.script):
+            turn = self.script[self._turn_index]
+        else:
+            turn = [{"type": "text", "text": "Сценарий закончился"}]
+        self._turn_index += 1
+        return turn
+
+    def _make_block(self, spec: dict):
+        if spec["type"] == "tool_use":
+            self._id_counter += 1
+            return SimpleNamespace(
+                type="tool_use",
+                id=spec.get("id", f"toolu_fake_{self._id_counter}"),
+                name=spec["name"],
+                input=spec.get("input", {}),
+            )
+        return SimpleNamespace(type="text", text=spec.get("text", ""))
+
+    @staticmethod
+    def _stop_reason(content: list) -> str:
+        if any(block.type == "tool_use" for block in content):
+            return "tool_use"
+        return "end_turn"
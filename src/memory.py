@@ -0,0 +1,195 @@
+import re
+from dataclasses import dataclass
+
+
+def estimate_tokens(text: str) -> int:
+    """Грубая оценка числа токенов без токенизатора (~4 символа на токен)."""
+    return max(1, len(text) // 4) if text else 0
+
+
+TOKEN_PIECE_RE = re.compile(r"[A-Za-z]+|\d+|[^\W\d_]+|\S")
+
+
+def count_tokens(text: str) -> int:
+    """Оценка ближе к BPE-токенизатору, чем estimate_tokens: слова, числа и
+    знаки считаются по отдельности, длинные слова — примерно по 4 символа
+    латиницы и по 3 символа кириллицы, числа — по 3 цифры. Кириллица и
+    пунктуация по ней не занижаются, поэтому годится для жёстких бюджетов."""
+    total = 0
+    for piece in TOKEN_PIECE_RE.findall(text):
+        if piece.isdigit():
+            total += (len(piece) + 2) // 3
+        elif piece.isascii():
+            total += (len(piece) + 3) // 4
+        else:
+            total += (len(piece) + 2) // 3
+    return total
+
+
+# Оценка токенов на одну картинку: потолок для изображений до ~1.15 Мпикс
+IMAGE_TOKENS = 1600
+
+
+def result_text(content: str | list[dict]) -> str:
+    """Текст результата инструмента, даже если к нему приложены картинки."""
+    if isinstance(content, str):
+        return content
+    return "\n".join(b["text"] for b in content if b.get("type") == "text")
+
+
+@dataclass
+class TurnUsage:
+    step: int
+    input_tokens: int
+    output_tokens: int
+    history_tokens: int
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    model: str = ""
+
+
+class ConversationMemory:
+    """Держит историю сообщений агента в пределах бюджета токенов.
+
+    Старые снимки страниц (результаты analyze_page и observe_page вместе со
+    скриншотами) заменяются однострочными заглушками, последний снимок
+    остаётся целиком. Если история всё ещё
+    больше бюджета, самые старые длинные результаты инструментов обрезаются
+    сразу с запасом — до COMPACT_TARGET бюджета. Каждая обрезка меняет
+    начало истории и сбрасывает кэш промпта, поэтому лучше один раз убрать
+    больше, чем по одному результату на каждом шаге.
+    """
+
+    TRUNCATED_RESULT_LENGTH = 500
+    COMPACT_TARGET = 0.7
+
+    def __init__(self, token_budget: int = 30000):
+        self.token_budget = token_budget
+        self.usage: list[TurnUsage] = []
+        self._snapshot_stubs: dict[str, str] = {}
+        # Сколько раз обрезалась история и сколько токенов после первого
+        # изменённого блока пришлось заново записывать в кэш
+        self.truncations = 0
+        self.uncached_tokens = 0
+
+    def register_snapshot(self, content: str, stub: str):
+        """Запоминает заглушку, которой можно заменить снимок страницы."""
+        self._snapshot_stubs[content] = stub
+
+    def is_snapshot(self, content: str) -> bool:
+        """Полный снимок страницы, ещё не заменённый заглушкой."""
+        return content in self._snapshot_stubs
+
+    def reset(self):
+        self.usage = []
+        self._snapshot_stubs = {}
+        self.truncations = 0
+        self.uncached_tokens = 0
+
+    def compact(self, messages: list[dict]) -> int:
+        """Сжимает историю на месте. Возвращает оценку её размера в токенах."""
+        results = [
+            (position, block)
+            for position, message in enumerate(messages)
+            if message["role"] == "user" and isinstance(message["content"], list)
+            for block in message["content"]
+            if block.get("type") == "tool_result"
+        ]
+
+        snapshots = [
+            block
+            for _, block in results
+            if result_text(block["content"]) in self._snapshot_stubs
+        ]
+        latest = snapshots[-1] if snapshots else None
+        for block in snapshots[:-1]:
+            block["content"] = self._snapshot_stubs[result_text(block["content"])]
+        self._snapshot_stubs = {
+            content: stub
+            for content, stub in self._snapshot_stubs.items()
+            if latest is not None and content == result_text(latest["content"])
+        }
+
+        total = self.estimate(messages)
+        if total <= self.token_budget:
+            return total
+
+        first_changed = None
+        for position, block in results:
+            if total <= self.token_budget * self.COMPACT_TARGET:
+                break
+            content = block["content"]
+            if (
+                block is latest
+                or not isinstance(content, str)
+                or len(content) <= self.TRUNCATED_RESULT_LENGTH
+            ):
+                continue
+            block["content"] = (
+                content[: self.TRUNCATED_RESULT_LENGTH] + "\n[...обрезано...]"
+            )
+            total -= estimate_tokens(content) - estimate_tokens(block["content"])
+            if first_changed is None:
+                first_changed = position
+
+        if first_changed is not None:
+            self.truncations += 1
+            self.uncached_tokens += self.estimate(messages[first_changed:])
+        return total
+
+    def estimate(self, messages: list[dict]) -> int:
+        total = 0
+        for message in messages:
+            content = message["content"]
+            if isinstance(content, str):
+                total += estimate_tokens(content)
+                continue
+            for block in content:
+                if block.get("type") == "tool_use":
+                    total += estimate_tokens(str(block["input"]))
+                elif isinstance(block.get("content"), list):
+                    total += estimate_tokens(result_text(block["content"]))
+                    total += IMAGE_TOKENS * sum(
+                        1 for b in block["content"] if b.get("type") == "image"
+                    )
+                else:
+                    total += estimate_tokens(block.get("content") or block.get("text", ""))
+        return total
+
+    def record_usage(
+        self, usage, history_tokens: int, model: str = "", retry: bool = False
+    ) -> TurnUsage:
+        """Учитывает токены одного запроса к модели. retry — повторный запрос
+        того же шага (переспрос большой модели): токены считаются, номер
+        шага остаётся прежним."""
+        turn = TurnUsage(
+            step=self.steps + (0 if retry else 1),
+            input_tokens=getattr(usage, "input_tokens", 0) or 0,
+            output_tokens=getattr(usage, "output_tokens", 0) or 0,
+            history_tokens=history_tokens,
+            cache_read_tokens=getattr(usage, "cache_read_input_tokens", 0) or 0,
+            cache_write_tokens=getattr(usage, "cache_creation_input_tokens", 0) or 0,
+            model=model,
+        )
+        self.usage.append(turn)
+        return turn
+
+    @property
+    def steps(self) -> int:
+        return self.usage[-1].step if self.usage else 0
+
+    @property
+    def total_input_tokens(self) -> int:
+        return sum(turn.input_tokens for turn in self.usage)
+
+    @property
+    def total_output_tokens(self) -> int:
+        return sum(turn.output_tokens for turn in self.usage)
+
+    @property
+    def total_cache_read_tokens(self) -> int:
+        return sum(turn.cache_read_tokens for turn in self.usage)
+
+    @property
+    def total_cache_write_tokens(self) -> int:
+        return sum(turn.cache_write_tokens for turn in self.usage)
@@ -1,6 +1,15 @@
 import re
+import weakref
+from collections import OrderedDict
 from dataclasses import dataclass
-from playwright.async_api import Page
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+from .memory import count_tokens
+from .relevance import dedupe, pack, rank
+from .tracing import annotate, traced
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
 
 
 @dataclass
@@ -15,98 +24,431 @@ class InteractiveElement:
 class PageAnalyzer:
     """Извлекает и сжимает контент страницы для отправки в LLM."""
 
-    MAX_TEXT_LENGTH = 15000
+    # Лимиты извлечения — это пул кандидатов; модели уходит только то, что
+    # прошло отбор по релевантности в бюджет TEXT_BUDGET / ELEMENT_BUDGET
+    MAX_TEXT_LENGTH = 40000
+    TEXT_BUDGET = 6000
+    ELEMENT_BUDGET = 80
 
-    async def analyze(self, page: Page) -> dict:
-        url = page.url
-        title = await page.title()
+    # Поля ввода почти всегда нужны для задачи: надбавка к их оценке
+    FIELD_BONUS = 1.0
 
-        elements = await self._extract_interactive_elements(page)
-        text_content = await self._extract_text_content(page)
+    # Сколько снимков (по всем вкладкам) держать в LRU-кэше
+    CACHE_SIZE = 8
 
-        return {
-            "url": url,
-            "title": title,
-            "text_content": text_content[: self.MAX_TEXT_LENGTH],
-            "interactive_elements": elements,
+    # Компактная кодировка снимка: жёсткий бюджет в токенах (по оценке
+    # memory.count_tokens), однобуквенные коды тегов, ссылки своего сайта
+    # без домена, серии однотипных элементов подряд — одной строкой
+    OBSERVATION_TOKENS = 2500
+    TAG_CODES = {"a": "a", "button": "b", "input": "i", "select": "s", "textarea": "t"}
+    RUN_MIN = 4
+    NUMBER_RE = re.compile(r"\d+")
+    # Пояснение кодировки — в описании analyze_page (tools.py), которое
+    # кэшируется вместе с промптом, а не в каждом снимке
+    CLAMP_MARKER = "… обрезано по бюджету"
+
+    # Ставит MutationObserver (один раз на документ) и отдаёт идентификатор
+    # документа, версию DOM (растёт с каждой пачкой мутаций) и число
+    # изменённых поддеревьев с прошлого вызова. fresh=true — новый документ.
+    # Собственные пометки экстрактора (data-agent-id) изменением не считаются.
+    # Свойства полей (value после fill, checked, selected) мутаций не дают,
+    # поэтому их изменения ловятся событиями input/change на фазе перехвата.
+    OBSERVER_JS = """
+    () => {
+        const state = window.__agentMutations;
+        if (!state) {
+            const created = {
+                doc: Math.random().toString(36).slice(2),
+                version: 0,
+                dirty: new Set(),
+                overflow: false,
+            };
+            const mark = (node) => {
+                if (created.overflow) return;
+                if (created.dirty.size >= 500) { created.overflow = true; return; }
+                created.dirty.add(node.nodeType === 1 ? node : node.parentNode);
+            };
+            new MutationObserver(records => {
+                let counted = false;
+                for (const r of records) {
+                    if (r.type === 'attributes' && r.attributeName === 'data-agent-id') continue;
+                    counted = true;
+                    mark(r.target);
+                }
+                if (counted) created.version++;
+            }).observe(document.documentElement, {
+                subtree: true, childList: true, attributes: true, characterData: true,
+            });
+            const onInput = (event) => {
+                if (!(event.target instanceof Element)) return;
+                mark(event.target);
+                created.version++;
+            };
+            document.addEventListener('input', onInput, true);
+            document.addEventListener('change', onInput, true);
+            window.__agentMutations = created;
+            return { fresh: true, doc: created.doc, version: 0, dirty: 0 };
         }
+        const dirty = state.overflow ? -1 : state.dirty.size;
+        state.dirty.clear();
+        state.overflow = false;
+        return { fresh: false, doc: state.doc, version: state.version, dirty: dirty };
+    }
+    """
+
+    MAX_ELEMENTS = 300
 
-    async def _extract_interactive_elements(self, page: Page) -> list[dict]:
-        js_code = """
-        () => {
+    # Однопроходный экстрактор: один обход DOM через TreeWalker собирает и
+    # интерактивные элементы, и текст, останавливаясь на лимитах. Скрипт
+    # ставится в страницу один раз на документ, дальше вызывается функция.
+    # Каждый элемент получает стабильный в пределах документа номер
+    # (атрибут data-agent-id), по которому BrowserController находит его
+    # без повторного поиска по селектору.
+    EXTRACTOR_JS = """
+    () => {
+        if (window.__agentExtract) return;
+
+        const INTERACTIVE = 'a, button, input, select, textarea, [role="button"], [onclick], [tabindex="0"]';
+        const SKIP = new Set(['script', 'style', 'noscript', 'iframe', 'svg', 'template']);
+        const BLOCK = new Set([
+            'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt',
+            'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4',
+            'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section',
+            'table', 'tr', 'ul',
+        ]);
+
+        const isHidden = (el) =>
+            el.getClientRects().length === 0 && getComputedStyle(el).display !== 'contents';
+
+        const ids = { next: 0, byElement: new WeakMap(), current: new Map() };
+        window.__agentIds = ids;
+
+        const elementId = (el) => {
+            let id = ids.byElement.get(el);
+            if (id === undefined) {
+                id = ids.next++;
+                ids.byElement.set(el, id);
+                el.setAttribute('data-agent-id', id);
+            }
+            ids.current.set(id, el);
+            return id;
+        };
+
+        window.__agentExtract = (maxElements, maxText) => {
             const elements = [];
-            const selectors = 'a, button, input, select, textarea, [role="button"], [onclick], [tabindex="0"]';
-            
-            document.querySelectorAll(selectors).forEach((el, idx) => {
-                const rect = el.getBoundingClientRect();
-                if (rect.width === 0 || rect.height === 0) return;
-                if (window.getComputedStyle(el).visibility === 'hidden') return;
-                
-                const text = (el.innerText || el.value || el.placeholder || el.getAttribute('aria-label') || '').trim().slice(0, 100);
-                
-                let selector = '';
-                if (el.id) {
-                    selector = '#' + el.id;
-                } else if (el.name) {
-                    selector = `${el.tagName.toLowerCase()}[name="${el.name}"]`;
-                } else if (el.className && typeof el.className === 'string') {
-                    const classes = el.className.split(' ').filter(c => c && !c.includes(':') && c.length < 30).slice(0, 2);
-                    if (classes.length) {
-                        selector = el.tagName.toLowerCase() + '.' + classes.join('.');
+            const text = [];
+            let textLength = 0;
+            ids.current = new Map();
+
+            if (!document.body) return { title: document.title, elements, text: '' };
+
+            const walker = document.createTreeWalker(
+                document.body,
+                NodeFilter.SHOW_ELEMENT | NodeFilter.SHOW_TEXT,
+                {
+                    acceptNode(node) {
+                        if (node.nodeType === Node.TEXT_NODE) return NodeFilter.FILTER_ACCEPT;
+                        if (SKIP.has(node.localName) || isHidden(node)) return NodeFilter.FILTER_REJECT;
+                        return NodeFilter.FILTER_ACCEPT;
+                    },
+                },
+            );
+
+            let node;
+            while ((node = walker.nextNode())) {
+                if (node.nodeType === Node.TEXT_NODE) {
+                    if (textLength < maxText) {
+                        const value = node.nodeValue.replace(/\\s+/g, ' ');
+                        if (value.trim()) {
+                            text.push(value);
+                            textLength += value.length;
+                        }
                     }
-                }
-                
-                if (!selector) {
-                    const tag = el.tagName.toLowerCase();
-                    if (text) {
-                        selector = `${tag}:has-text("${text.slice(0, 30)}")`;
-                    } else {
-                        selector = `${tag}:nth-of-type(${idx + 1})`;
+                } else {
+                    if (textLength < maxText && BLOCK.has(node.localName)) {
+                        text.push('\\n');
+                        textLength += 1;
+                    }
+                    if (elements.length < maxElements && node.matches(INTERACTIVE)) {
+                        const rect = node.getBoundingClientRect();
+                        if (rect.width > 0 && rect.height > 0 && getComputedStyle(node).visibility !== 'hidden') {
+                            const label = (node.innerText || node.value || node.placeholder || node.getAttribute('aria-label') || '').trim().slice(0, 100);
+                            elements.push({
+                                index: elementId(node),
+                                tag: node.tagName.toLowerCase(),
+                                text: label,
+                                type: node.type || null,
+                                href: node.href || null,
+                            });
+                        }
                     }
                 }
-                
-                elements.push({
-                    index: elements.length,
-                    tag: el.tagName.toLowerCase(),
-                    selector: selector,
-                    text: text,
-                    type: el.type || null,
-                    href: el.href || null,
-                });
-            });
-            
-            return elements.slice(0, 100);
-        }
-        """
+                if (elements.length >= maxElements && textLength >= maxText) break;
+            }
+
+            return { title: document.title, elements, text: text.join('').slice(0, maxText) };
+        };
+    }
+    """
+
+    # Дерево доступности: сколько строк отдавать и максимальная длина строки
+    MAX_AX_LINES = 300
+    MAX_AX_LINE = 120
+
+    # Безымянные контейнеры и картинки без подписи: их дети остаются,
+    # поднимаясь на уровень выше
+    AX_SKIP_RE = re.compile(
+        r"^- (generic|group|none|presentation|img)( \[ref=e\d+\])?:?$"
+    )
+    AX_NOISE_RE = re.compile(r" \[cursor=pointer\]")
+    AX_REF_RE = re.compile(r"\[ref=(e\d+)\]")
+    AX_REF_CHILDREN = 3
+
+    EXTRACT_CALL_JS = """
+    ([maxElements, maxText]) =>
+        window.__agentExtract ? window.__agentExtract(maxElements, maxText) : null
+    """
+
+    def __init__(self, compact: bool = True, observation_tokens: int | None = None):
+        self.compact = compact
+        self.observation_tokens = observation_tokens or self.OBSERVATION_TOKENS
+        self._snapshots: weakref.WeakKeyDictionary["Page", dict] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._cache: OrderedDict[tuple, dict] = OrderedDict()
+        # Строки последнего дерева доступности вкладки по ссылкам eN — для
+        # проверки опасности click/fill с селектором aria-ref=eN
+        self._ax_refs: weakref.WeakKeyDictionary["Page", dict[str, str]] = (
+            weakref.WeakKeyDictionary()
+        )
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @traced("analyzer.analyze", "analyzer")
+    async def analyze(self, page: "Page") -> dict:
+        url = page.url
 
         try:
-            return await page.evaluate(js_code)
+            extracted = await page.evaluate(
+                self.EXTRACT_CALL_JS, [self.MAX_ELEMENTS, self.MAX_TEXT_LENGTH]
+            )
+            if extracted is None:
+                await page.evaluate(self.EXTRACTOR_JS)
+                extracted = await page.evaluate(
+                    self.EXTRACT_CALL_JS, [self.MAX_ELEMENTS, self.MAX_TEXT_LENGTH]
+                )
         except Exception:
-            return []
-
-    async def _extract_text_content(self, page: Page) -> str:
-        js_code = """
-        () => {
-            const elementsToRemove = ['script', 'style', 'noscript', 'iframe', 'svg'];
-            const clone = document.body.cloneNode(true);
-            
-            elementsToRemove.forEach(tag => {
-                clone.querySelectorAll(tag).forEach(el => el.remove());
-            });
-            
-            return clone.innerText;
+            extracted = {"title": "", "elements": [], "text": ""}
+
+        annotate(
+            elements=len(extracted["elements"]), text_chars=len(extracted["text"])
+        )
+        return {
+            "url": url,
+            "title": extracted["title"],
+            "text_content": self._normalize_text(extracted["text"]),
+            "interactive_elements": extracted["elements"],
         }
-        """
 
+    @traced("analyzer.analyze_diff", "analyzer")
+    async def analyze_diff(self, page: "Page") -> dict:
+        """Анализ относительно прошлого снимка этой вкладки.
+
+        Полный снимок (mode="full") отдаётся после навигации или при первом
+        вызове; иначе — только изменения (mode="diff") или mode="unchanged",
+        если MutationObserver не видел изменений DOM.
+
+        Снимки кэшируются по (документ, версия DOM, URL): повторный анализ
+        неизменённой страницы не запускает извлечение заново.
+        """
         try:
-            text = await page.evaluate(js_code)
-            text = re.sub(r"\n{3,}", "\n\n", text)
-            text = re.sub(r" {2,}", " ", text)
-            return text.strip()
+            mutations = await page.evaluate(self.OBSERVER_JS)
         except Exception:
-            return ""
+            mutations = {"fresh": True, "dirty": -1, "doc": None, "version": None}
+
+        previous = self._snapshots.get(page)
+        navigated = (
+            previous is None or mutations["fresh"] or previous["url"] != page.url
+        )
+
+        key = (mutations["doc"], mutations["version"], page.url)
+        analysis = self._cache_get(key) if mutations["doc"] else None
+        annotate(cache="hit" if analysis is not None else "miss")
+        if analysis is None:
+            analysis = await self.analyze(page)
+            if mutations["doc"]:
+                self._cache_put(key, analysis)
+
+        self._snapshots[page] = analysis
+        if navigated:
+            return {"mode": "full", **analysis}
+        if analysis is previous:
+            return {"mode": "unchanged", "url": page.url, "title": previous["title"]}
+
+        return {
+            "mode": "diff",
+            "url": analysis["url"],
+            "title": analysis["title"],
+            "dirty_subtrees": mutations["dirty"],
+            **self._diff_elements(
+                previous["interactive_elements"], analysis["interactive_elements"]
+            ),
+            **self._diff_text(previous["text_content"], analysis["text_content"]),
+        }
+
+    @traced("analyzer.prefetch", "analyzer")
+    async def prefetch(self, page: "Page"):
+        """Заранее кладёт снимок фоновой вкладки в кэш.
+
+        Снимок вкладки не запоминается: когда вкладка станет активной,
+        первый analyze_diff вернёт полный снимок, но уже из кэша.
+        """
+        mutations = await page.evaluate(self.OBSERVER_JS)
+        analysis = await self.analyze(page)
+        self._cache_put((mutations["doc"], mutations["version"], page.url), analysis)
+
+    def _cache_get(self, key: tuple) -> dict | None:
+        analysis = self._cache.get(key)
+        if analysis is None:
+            self.cache_misses += 1
+            return None
+        self._cache.move_to_end(key)
+        self.cache_hits += 1
+        return analysis
+
+    def _cache_put(self, key: tuple, analysis: dict):
+        self._cache[key] = analysis
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def cache_stats(self) -> dict:
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "size": len(self._cache),
+        }
+
+    def forget(self, page: "Page"):
+        """Сбрасывает сохранённый снимок: следующий анализ будет полным."""
+        self._snapshots.pop(page, None)
+
+    def reset(self):
+        """Забывает снимки всех вкладок (кэш по версиям DOM остаётся)."""
+        self._snapshots.clear()
+        self._ax_refs.clear()
+
+    def latest(self, page: "Page") -> dict | None:
+        """Последний полный снимок вкладки, к которому относятся диффы."""
+        return self._snapshots.get(page)
+
+    def find_element(self, page: "Page", index: int) -> dict | None:
+        """Элемент с этим номером из последнего снимка вкладки."""
+        snapshot = self.latest(page)
+        for el in snapshot["interactive_elements"] if snapshot else []:
+            if el["index"] == index:
+                return el
+        return None
 
-    def format_for_llm(self, analysis: dict) -> str:
+    def describe_element(self, page: "Page", index: int) -> str:
+        """Подпись элемента из последнего снимка вкладки (для проверок безопасности)."""
+        el = self.find_element(page, index)
+        return self._format_element(el) if el else ""
+
+    def describe_ref(self, page: "Page", ref: str) -> str:
+        """Подпись элемента по ссылке eN из последнего дерева доступности."""
+        return self._ax_refs.get(page, {}).get(ref, "")
+
+    def _diff_elements(self, old: list[dict], new: list[dict]) -> dict:
+        # Номера элементов стабильны в пределах документа и служат ключом
+        old_by_key = {el["index"]: el for el in old}
+        new_keys = set()
+        added, changed = [], []
+        for el in new:
+            key = el["index"]
+            new_keys.add(key)
+            before = old_by_key.get(key)
+            if before is None:
+                added.append(el)
+            elif (before["text"], before.get("href")) != (el["text"], el.get("href")):
+                changed.append(el)
+        removed = [el for key, el in old_by_key.items() if key not in new_keys]
+        return {
+            "added_elements": added,
+            "removed_elements": removed,
+            "changed_elements": changed,
+        }
+
+    @staticmethod
+    def _diff_text(old: str, new: str) -> dict:
+        old_blocks = [b for b in old.split("\n") if b.strip()]
+        new_blocks = [b for b in new.split("\n") if b.strip()]
+        old_set, new_set = set(old_blocks), set(new_blocks)
+        return {
+            "added_text": [b for b in new_blocks if b not in old_set],
+            "removed_text": [b for b in old_blocks if b not in new_set],
+        }
+
+    @staticmethod
+    def _normalize_text(text: str) -> str:
+        text = re.sub(r"\n{3,}", "\n\n", text)
+        text = re.sub(r" {2,}", " ", text)
+        return text.strip()
+
+    def select_elements(
+        self, elements: list[dict], query: str, limit: int | None = None
+    ) -> list[dict]:
+        """Самые релевантные запросу элементы (не больше limit) в порядке DOM.
+
+        Ссылки с одинаковыми текстом и адресом (меню в шапке и подвале)
+        остаются в одном экземпляре. Без запроса — первые по порядку.
+        """
+        limit = limit or self.ELEMENT_BUDGET
+        elements = dedupe(
+            elements,
+            lambda el: (
+                (el["tag"], el["text"], el["href"]) if el.get("href") else el["index"]
+            ),
+        )
+        if len(elements) <= limit:
+            return elements
+        scores = rank(
+            [f"{el['text']} {el.get('href') or ''}" for el in elements],
+            query,
+            [
+                self.FIELD_BONUS if el["tag"] in ("input", "select", "textarea") else 0.0
+                for el in elements
+            ],
+        )
+        return [elements[i] for i in pack([1] * len(elements), scores, limit)]
+
+    def select_text(self, blocks: list[str], query: str, budget: int) -> str:
+        """Текстовые блоки, лучшие по запросу, уложенные в budget символов.
+
+        Повторяющиеся блоки выбрасываются, пропуски между выбранными
+        блоками помечаются "…", чтобы модель знала, что текст неполный.
+        """
+        blocks = dedupe([b.strip() for b in blocks if b.strip()], lambda b: b.lower())
+        sizes = [len(b) + 1 for b in blocks]
+        if sum(sizes) <= budget:
+            return "\n".join(blocks)
+        chosen = pack(sizes, rank(blocks, query), budget)
+        parts, previous = [], -1
+        for i in chosen:
+            if i != previous + 1:
+                parts.append("…")
+            parts.append(blocks[i])
+            previous = i
+        if previous != len(blocks) - 1:
+            parts.append("…")
+        return "\n".join(parts)
+
+    def format_for_llm(self, analysis: dict, query: str = "") -> str:
+        """query — задача и последнее действие, по ним отбираются текст и
+        элементы, если страница не влезает в бюджет."""
+        if self.compact:
+            return self._format_compact(analysis, query)
+        elements = self.select_elements(analysis["interactive_elements"], query)
         lines = [
             f"URL: {analysis['url']}",
             f"Заголовок: {analysis['title']}",
@@ -114,22 +456,280 @@ class PageAnalyzer:
             "=== Интерактивные элементы ===",
         ]
 
-        for el in analysis["interactive_elements"]:
-            el_info = f"[{el['index']}] <{el['tag']}>"
-            if el.get("text"):
-                el_info += f" \"{el['text'][:50]}\""
-            if el.get("href"):
-                el_info += f" -> {el['href'][:60]}"
-            if el.get("type"):
-                el_info += f" (type={el['type']})"
-            lines.append(el_info)
-
-        lines.extend(
-            [
-                "",
-                "=== Текст страницы ===",
-                analysis["text_content"][:8000],
-            ]
+        for el in elements:
+            lines.append(self._format_element(el))
+        hidden = len(analysis["interactive_elements"]) - len(elements)
+        if hidden > 0:
+            lines.append(
+                f"... не показано элементов: {hidden} (повторы и менее нужные для задачи)"
+            )
+
+        text = self.select_text(
+            analysis["text_content"].split("\n"), query, self.TEXT_BUDGET
         )
+        annotate(shown_elements=len(elements), shown_text_chars=len(text))
+        lines.extend(["", "=== Текст страницы ===", text])
+
+        return "\n".join(lines)
+
+    def _format_compact(self, analysis: dict, query: str) -> str:
+        """Снимок в компактной кодировке, не больше observation_tokens токенов.
+
+        Текст получает не больше 40% бюджета; элементов берётся столько
+        лучших по запросу, сколько влезает в остальное.
+        """
+        budget = self.observation_tokens
+        head = [f"URL: {analysis['url']}", f"Заголовок: {analysis['title']}"]
+        blocks = analysis["text_content"].split("\n")
+        text = self.select_text(blocks, query, self.TEXT_BUDGET)
+        reserve = min(count_tokens(text), int(budget * 0.4))
+
+        everything = analysis["interactive_elements"]
+        limit = self.ELEMENT_BUDGET
+        while True:
+            elements = self.select_elements(everything, query, limit)
+            element_lines = self._encode_elements(elements, analysis["url"])
+            used = count_tokens("\n".join(head + element_lines))
+            if used + reserve <= budget or limit <= 5:
+                break
+            limit = int(limit * 0.75)
+        hidden = len(everything) - len(elements)
+        if hidden > 0:
+            element_lines.append(f"+ скрыто элементов: {hidden}")
+
+        lines = head + element_lines + ["# Текст"]
+        text = self._fit_text(blocks, query, text, budget - count_tokens("\n".join(lines)))
+        lines = self._clamp(lines + [text], budget)
+        annotate(shown_elements=len(elements), observation_tokens=count_tokens("\n".join(lines)))
+        return "\n".join(lines)
+
+    def _fit_text(self, blocks: list[str], query: str, text: str, tokens: int) -> str:
+        """Сужает отбор текста, пока он не уложится в tokens."""
+        chars = self.TEXT_BUDGET
+        while text and count_tokens(text) > tokens:
+            ratio = len(text) / count_tokens(text)
+            chars = min(int(chars * 0.9), int(tokens * ratio))
+            text = self.select_text(blocks, query, chars) if chars > 0 else ""
+        return text
 
+    @classmethod
+    def _clamp(cls, lines: list[str], budget: int) -> list[str]:
+        """Последняя страховка бюджета: отбрасывает строки с конца."""
+        if count_tokens("\n".join(lines)) <= budget:
+            return lines
+        lines = list(lines)
+        limit = budget - count_tokens(cls.CLAMP_MARKER)
+        while len(lines) > 2 and count_tokens("\n".join(lines)) > limit:
+            lines.pop()
+        return lines + [cls.CLAMP_MARKER]
+
+    def _encode_elements(
+        self, elements: list[dict], page_url: str, hosts: dict[str, str] | None = None
+    ) -> list[str]:
+        """Строки элементов в компактной кодировке; перед ними — псевдонимы
+        чужих доменов (если hosts не передан — своих для этого списка)."""
+        own_hosts = hosts is None
+        hosts = {} if hosts is None else hosts
+        base = urlsplit(page_url)
+        origin = f"{base.scheme}://{base.netloc}"
+
+        def link(href: str | None) -> str:
+            if not href:
+                return ""
+            parts = urlsplit(href)
+            if parts.scheme not in ("http", "https"):
+                return href[:60]
+            host = f"{parts.scheme}://{parts.netloc}"
+            path = href[len(host) :] or "/"
+            if host != origin:
+                if host not in hosts:
+                    n = len(hosts)
+                    hosts[host] = "@" + (chr(ord("a") + n) if n < 26 else f"h{n}")
+                path = hosts[host] + path
+            return path[:60]
+
+        rows = []
+        for el in elements:
+            code = self.TAG_CODES.get(el["tag"], el["tag"])
+            if el["tag"] == "input" and el.get("type") not in (None, "text"):
+                code += f":{el['type']}"
+            text = f"\"{el['text'][:50]}\"" if el.get("text") else ""
+            label = " ".join(part for part in (text, link(el.get("href"))) if part)
+            rows.append((el["index"], code, label))
+
+        lines = []
+        start = 0
+        while start < len(rows):
+            end = start + 1
+            while end < len(rows) and self._continues_run(rows[end - 1], rows[end]):
+                end += 1
+            if end - start >= self.RUN_MIN:
+                (first, code, first_label), (last, _, last_label) = rows[start], rows[end - 1]
+                lines.append(
+                    f"[{first}-{last}]{code} ×{end - start} {first_label} … {last_label}"
+                )
+            else:
+                lines.extend(
+                    f"[{index}]{code} {label}".rstrip() for index, code, label in rows[start:end]
+                )
+            start = end
+
+        if not own_hosts:
+            return lines
+        return [f"{alias}={host}" for host, alias in hosts.items()] + lines
+
+    def _continues_run(self, previous: tuple, current: tuple) -> bool:
+        """Элемент продолжает серию, если номер на 1 больше, тег тот же, а
+        подпись отличается только числами, и каждое выросло ровно на 1
+        (страницы 1, 2, 3…) — тогда любой элемент серии восстанавливается
+        по первому. Подписи без чисел должны совпадать целиком."""
+        index, code, label = previous
+        next_index, next_code, next_label = current
+        if next_index != index + 1 or next_code != code:
+            return False
+        if self.NUMBER_RE.sub("#", label) != self.NUMBER_RE.sub("#", next_label):
+            return False
+        numbers = [int(n) for n in self.NUMBER_RE.findall(label)]
+        next_numbers = [int(n) for n in self.NUMBER_RE.findall(next_label)]
+        if not numbers:
+            return label == next_label
+        return all(b == a + 1 for a, b in zip(numbers, next_numbers))
+
+    @staticmethod
+    def _format_element(el: dict) -> str:
+        el_info = f"[{el['index']}] <{el['tag']}>"
+        if el.get("text"):
+            el_info += f" \"{el['text'][:50]}\""
+        if el.get("href"):
+            el_info += f" -> {el['href'][:60]}"
+        if el.get("type"):
+            el_info += f" (type={el['type']})"
+        return el_info
+
+    def format_diff_for_llm(self, diff: dict, query: str = "") -> str:
+        if diff["mode"] == "full":
+            return self.format_for_llm(diff, query)
+
+        lines = [f"URL: {diff['url']}", f"Заголовок: {diff['title']}", ""]
+        if diff["mode"] == "unchanged":
+            lines.append("Страница не изменилась с прошлого анализа.")
+            return "\n".join(lines)
+
+        lines.append("=== Изменения с прошлого анализа ===")
+        # Псевдонимы доменов общие для всех секций диффа
+        hosts: dict[str, str] = {}
+        sections = [
+            ("+ Новые элементы", self.select_elements(diff["added_elements"], query)),
+            (
+                "~ Изменённые элементы",
+                self.select_elements(diff["changed_elements"], query),
+            ),
+            ("- Исчезнувшие элементы", diff["removed_elements"]),
+        ]
+        for header, elements in sections:
+            if not elements:
+                continue
+            lines.append(header + ":")
+            if self.compact:
+                lines.extend(self._encode_elements(elements, diff["url"], hosts))
+            else:
+                lines.extend(self._format_element(el) for el in elements)
+
+        text_budget = 4000
+        for header, blocks in (
+            ("+ Новый текст", diff["added_text"]),
+            ("- Исчезнувший текст", diff["removed_text"]),
+        ):
+            if not blocks or text_budget <= 0:
+                continue
+            text = self.select_text(blocks, query, text_budget)
+            text_budget -= len(text)
+            lines.extend([header + ":", text])
+
+        if len(lines) == 4:
+            lines.append("Видимых изменений элементов и текста нет.")
+        if self.compact:
+            if hosts:
+                lines[4:4] = [f"{alias}={host}" for host, alias in hosts.items()]
+            lines = self._clamp(lines, self.observation_tokens)
         return "\n".join(lines)
+
+    @traced("analyzer.accessibility_tree", "analyzer")
+    async def accessibility_tree(self, page: "Page") -> dict:
+        """Сокращённое дерево доступности страницы.
+
+        Строки в формате aria-снимка Playwright; ссылки [ref=eN] можно
+        передавать в click/fill как селектор aria-ref=eN.
+        """
+        snapshot = await page.locator("body").aria_snapshot(mode="ai")
+        self._ax_refs[page] = self._index_refs(snapshot)
+        lines = self._prune_ax(snapshot)
+        annotate(ax_lines=len(lines), ax_chars=len(snapshot))
+        return {
+            "url": page.url,
+            "title": await page.title(),
+            "lines": lines[: self.MAX_AX_LINES],
+            "omitted": max(0, len(lines) - self.MAX_AX_LINES),
+        }
+
+    def _index_refs(self, snapshot: str) -> dict[str, str]:
+        """Ссылка eN -> её строка вместе с вложенными строками: имя кнопки
+        без подписи в кавычках лежит в дочернем тексте."""
+        lines = snapshot.splitlines()
+        refs = {}
+        for number, line in enumerate(lines):
+            match = self.AX_REF_RE.search(line)
+            if not match:
+                continue
+            indent = len(line) - len(line.lstrip())
+            label = [line.strip()]
+            for child in lines[number + 1 : number + 1 + self.AX_REF_CHILDREN]:
+                if len(child) - len(child.lstrip()) <= indent:
+                    break
+                label.append(child.strip())
+            refs[match[1]] = " ".join(label)[: self.MAX_AX_LINE]
+        return refs
+
+    def _prune_ax(self, snapshot: str) -> list[str]:
+        lines = []
+        skipped: list[int] = []  # отступы выброшенных контейнеров-предков
+        for line in snapshot.splitlines():
+            stripped = line.lstrip()
+            indent = len(line) - len(stripped)
+            while skipped and skipped[-1] >= indent:
+                skipped.pop()
+            stripped = self.AX_NOISE_RE.sub("", stripped.rstrip())
+            if self.AX_SKIP_RE.match(stripped):
+                skipped.append(indent)
+                continue
+            if len(stripped) > self.MAX_AX_LINE:
+                stripped = stripped[: self.MAX_AX_LINE] + "…"
+            lines.append(" " * (indent - 2 * len(skipped)) + stripped)
+        return lines
+
+    def format_accessibility_for_llm(self, tree: dict) -> str:
+        lines = [
+            f"URL: {tree['url']}",
+            f"Заголовок: {tree['title']}",
+            "",
+            "=== Дерево доступности ===",
+            *tree["lines"],
+        ]
+        if tree["omitted"]:
+            lines.append(f"... ещё {tree['omitted']} строк не показано")
+        return "\n".join(lines)
+
+    @staticmethod
+    def format_accessibility_stub(tree: dict) -> str:
+        return (
+            f"[устаревшее дерево доступности] URL: {tree['url']} | "
+            f"Заголовок: {tree['title']}"
+        )
+
+    def format_stub(self, analysis: dict) -> str:
+        """Однострочная замена устаревшего снимка страницы в истории."""
+        return (
+            f"[устаревший снимок] URL: {analysis['url']} | "
+            f"Заголовок: {analysis['title']} | "
+            f"элементов: {len(analysis['interactive_elements'])}"
+        )
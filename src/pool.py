@@ -0,0 +1,102 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
+from .browser import BrowserController
+from .config import load_config
+from .resources import LoadProfile, StaticCache
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext
+
+
+class ContextPool:
+    """Пул изолированных BrowserContext поверх одного процесса Chromium.
+
+    Контексты создаются заранее и выдаются задачам по одному. После задачи
+    использованный контекст закрывается (куки и storage не переживают
+    задачу), а на его место в фоне готовится свежий.
+    """
+
+    def __init__(
+        self,
+        size: int = 4,
+        headless: bool = True,
+        load_profile: str | LoadProfile | None = None,
+    ):
+        self.size = size
+        self.headless = headless
+        self.load_profile = load_profile
+        # Кэш статики общий для всех контекстов пула
+        self.static_cache = StaticCache()
+        self.config = load_config()
+        self._playwright = None
+        self._browser: "Browser | None" = None
+        self._idle: asyncio.Queue["BrowserContext | None"] = asyncio.Queue()
+        self._warming: set[asyncio.Task] = set()
+
+    async def start(self):
+        from playwright.async_api import async_playwright
+
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(
+            headless=self.headless, args=["--disable-infobars"]
+        )
+        contexts = await asyncio.gather(
+            *(self._new_context() for _ in range(self.size))
+        )
+        for context in contexts:
+            self._idle.put_nowait(context)
+
+    async def _new_context(self) -> "BrowserContext":
+        cfg = self.config
+        context = await self._browser.new_context(
+            viewport={
+                "width": cfg["viewport_width"],
+                "height": cfg["viewport_height"],
+            },
+            locale="ru-RU",
+        )
+        await context.new_page()
+        return context
+
+    async def _replace(self, context: "BrowserContext | None"):
+        """Возвращает слот в пул со свежим контекстом. Если создать его не
+        удалось, слот возвращается пустым (None): контекст попробует создать
+        следующая задача, а пул не уменьшается."""
+        if context is not None:
+            try:
+                await context.close()
+            except Exception:
+                pass
+        try:
+            fresh = await self._new_context()
+        except Exception:
+            fresh = None
+        self._idle.put_nowait(fresh)
+
+    @asynccontextmanager
+    async def lease(self):
+        """Выдаёт BrowserController на свежем контексте на время задачи."""
+        context = await self._idle.get()
+        try:
+            if context is None:
+                context = await self._new_context()
+            browser = BrowserController(
+                headless=self.headless,
+                load_profile=self.load_profile,
+                static_cache=self.static_cache,
+            )
+            await browser.attach(context)
+            yield browser
+        finally:
+            task = asyncio.create_task(self._replace(context))
+            self._warming.add(task)
+            task.add_done_callback(self._warming.discard)
+
+    async def close(self):
+        if self._warming:
+            await asyncio.gather(*self._warming, return_exceptions=True)
+        if self._browser:
+            await self._browser.close()
+        if self._playwright:
+            await self._playwright.stop()
@@ -0,0 +1,93 @@
+import asyncio
+from urllib.parse import urldefrag, urlsplit
+from .browser import BrowserController
+from .page_analyzer import PageAnalyzer
+from .relevance import rank
+
+
+# Ссылки, переход по которым может что-то изменить: их не предзагружаем
+UNSAFE_LINK_WORDS = (
+    "logout",
+    "log-out",
+    "signout",
+    "sign-out",
+    "выход",
+    "выйти",
+    "delete",
+    "remove",
+    "удал",
+    "unsubscribe",
+    "отпис",
+)
+
+
+class Prefetcher:
+    """Предзагружает в фоновых страницах самые вероятные следующие переходы.
+
+    Кандидаты — ссылки того же сайта из последнего полного снимка,
+    ранжированные по задаче (как в PageAnalyzer.select_elements). Страницы
+    грузятся по одной, их снимки сразу кладутся в кэш анализатора, так что
+    goto на такую страницу и следующий analyze_page не ждут сети.
+    """
+
+    def __init__(
+        self, browser: BrowserController, analyzer: PageAnalyzer, max_pages: int = 2
+    ):
+        self.browser = browser
+        self.analyzer = analyzer
+        self.max_pages = max_pages
+        self._task: asyncio.Task | None = None
+
+    def candidates(self, analysis: dict, query: str) -> list[str]:
+        current = urldefrag(analysis["url"]).url
+        origin = urlsplit(current).netloc
+        links, seen = [], {current}
+        for el in analysis["interactive_elements"]:
+            href = el.get("href")
+            if el["tag"] != "a" or not href:
+                continue
+            url = urldefrag(href).url
+            parts = urlsplit(url)
+            label = f"{el['text']} {url}".lower()
+            if (
+                parts.scheme not in ("http", "https")
+                or parts.netloc != origin
+                or url in seen
+                or any(word in label for word in UNSAFE_LINK_WORDS)
+            ):
+                continue
+            seen.add(url)
+            links.append((url, el["text"]))
+
+        scores = rank([f"{text} {url}" for url, text in links], query)
+        best = sorted(range(len(links)), key=lambda i: -scores[i])[: self.max_pages]
+        # Без совпадений с задачей угадывать нечего
+        return [links[i][0] for i in best if scores[i] > 0]
+
+    def schedule(self, analysis: dict, query: str):
+        """Запускает фоновую предзагрузку под свежий снимок страницы."""
+        self.cancel()
+        urls = self.candidates(analysis, query)
+        self._task = asyncio.create_task(self._prefetch(urls))
+
+    async def _prefetch(self, urls: list[str]):
+        await self.browser.drop_prefetched(keep=set(urls))
+        for url in urls:
+            if self.browser.is_prefetched(url):
+                continue
+            try:
+                page = await self.browser.prefetch(url)
+                await self.analyzer.prefetch(page)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                continue
+
+    def cancel(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    async def close(self):
+        self.cancel()
+        await self.browser.drop_prefetched()
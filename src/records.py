@@ -0,0 +1,455 @@
+import json
+import weakref
+from typing import TYPE_CHECKING
+from .memory import count_tokens
+from .tracing import annotate, traced
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
+
+class RecordExtractor:
+    """Достаёт со страницы повторяющиеся записи: строки таблиц, карточки
+    результатов, пункты списков — сразу в виде полей, без плоского текста.
+
+    Скрипт ищет на странице группы соседних элементов с одинаковой
+    структурой (тег и классы), выбирает самую содержательную и разбирает
+    каждую запись на поля: заголовок, ссылку и листовые тексты, названные
+    по itemprop, data-qa/data-testid или BEM-классу элемента.
+    """
+
+    MAX_RECORDS = 50
+    MAX_PAGES = 5
+
+    # Сбор с прокруткой: потолок записей и прокруток за один вызов
+    MAX_HARVEST = 200
+    MAX_SCROLLS = 30
+    # Сколько DOM должен простоять после прокрутки, чтобы считать подгрузку
+    # законченной, мс
+    HARVEST_QUIET_MS = 150
+
+    # Потолок ответа с записями, токенов (по memory.count_tokens): 200 записей
+    # по 12 полей иначе займут десятки тысяч токенов истории
+    RECORDS_TOKENS = 2500
+
+    # Минимум одинаковых соседей, чтобы считать их списком записей
+    MIN_REPEAT = 3
+
+    # Общая часть скриптов: поиск повторяющихся групп (findGroups) и разбор
+    # записи на поля (parse). Вставляется в начало тела RECORDS_JS и HARVEST_JS.
+    HELPERS_JS = """
+        const SKIP = new Set(['script', 'style', 'noscript', 'template', 'svg', 'iframe']);
+        const MAX_FIELDS = 12;
+        const clean = (s) => (s || '').replace(/\\s+/g, ' ').trim();
+        const visible = (el) => el.getClientRects().length > 0;
+        const signature = (el) =>
+            el.localName + [...el.classList]
+                .filter(c => !/\\d/.test(c))
+                .sort()
+                .map(c => '.' + CSS.escape(c))
+                .join('');
+        // vacancy-serp__vacancy-title -> vacancy-title, card--active -> card
+        const short = (value) =>
+            value.split('__').pop().split('--')[0].toLowerCase().slice(0, 30);
+        const fieldName = (el) => {
+            for (const attr of ['itemprop', 'data-field', 'data-qa', 'data-testid']) {
+                const value = el.getAttribute(attr);
+                if (value) return short(value);
+            }
+            const cls = [...el.classList].find(c => !/\\d/.test(c));
+            return cls ? short(cls) : null;
+        };
+
+        const fields = (root, add) => {
+            const heading = root.querySelector('h1, h2, h3, h4, h5, h6');
+            const link = root.matches('a[href]') ? root : root.querySelector('a[href]');
+            if (heading) add('title', clean(heading.innerText));
+            else if (link) add('title', clean(link.innerText));
+            if (link) add('url', link.href);
+            // Поле — элемент со своим текстом или лист; его потомки уже
+            // вошли в его текст и отдельными полями не становятся
+            const taken = [];
+            for (const el of root.querySelectorAll('*')) {
+                if (SKIP.has(el.localName) || !visible(el)) continue;
+                if (taken.some(t => t.contains(el))) continue;
+                const ownText = [...el.childNodes].some(n => n.nodeType === 3 && n.nodeValue.trim());
+                const leaf = [...el.children].every(child => !clean(child.textContent));
+                if (!ownText && !leaf) continue;
+                const text = clean(el.innerText);
+                if (!text) continue;
+                taken.push(el);
+                let name = null;
+                for (let node = el; node && node !== root && !name; node = node.parentElement) {
+                    name = fieldName(node);
+                }
+                add(name || (el.localName === 'time' ? 'time' : 'text'), text);
+            }
+        };
+
+        const record = (root, headers) => {
+            const result = {};
+            const values = new Set();
+            const add = (name, value) => {
+                if (!value || values.has(value) || Object.keys(result).length >= MAX_FIELDS) return;
+                let key = name;
+                for (let n = 2; key in result; n++) key = name + n;
+                result[key] = value.slice(0, 200);
+                values.add(value);
+            };
+            if (headers) {
+                [...root.cells].forEach((cell, i) =>
+                    add(headers[i] || `col${i + 1}`, clean(cell.innerText)));
+                const link = root.querySelector('a[href]');
+                if (link) add('url', link.href);
+            } else {
+                fields(root, add);
+            }
+            return result;
+        };
+
+        const tableGroup = (table) => {
+            const rows = [...table.rows].filter(visible);
+            let headers = null;
+            if (rows.length && [...rows[0].cells].every(c => c.localName === 'th')) {
+                headers = [...rows.shift().cells].map(c => clean(c.innerText).slice(0, 30));
+            }
+            const selector = table.id ? `table#${CSS.escape(table.id)}` : signature(table);
+            return { selector, items: rows, headers: headers || [], kind: 'table' };
+        };
+
+        // Чем больше текста и ссылок в записях, тем вероятнее это данные,
+        // а не меню из коротких пунктов
+        const score = (group) => group.items.reduce((sum, el) => {
+            const text = Math.min(clean(el.textContent).length, 400);
+            return sum + (text > 15 ? text : 0) * (el.querySelector('a[href]') ? 1.5 : 1);
+        }, 0);
+
+        // Группы повторяющихся записей, самые содержательные первыми
+        const findGroups = (selector, minRepeat) => {
+            const candidates = [];
+            if (selector) {
+                const items = [...document.querySelectorAll(selector)].filter(visible);
+                if (items.length && items[0].localName === 'table') candidates.push(tableGroup(items[0]));
+                else candidates.push({ selector, items, headers: null, kind: 'selector' });
+            } else if (document.body) {
+                for (const table of document.body.querySelectorAll('table')) {
+                    if (visible(table) && table.rows.length > minRepeat) candidates.push(tableGroup(table));
+                }
+                for (const parent of document.body.querySelectorAll('*')) {
+                    if (parent.children.length < minRepeat || SKIP.has(parent.localName)) continue;
+                    if (['table', 'tbody', 'thead', 'tr'].includes(parent.localName)) continue;
+                    const bySignature = new Map();
+                    for (const child of parent.children) {
+                        if (SKIP.has(child.localName)) continue;
+                        const key = signature(child);
+                        if (!bySignature.has(key)) bySignature.set(key, []);
+                        bySignature.get(key).push(child);
+                    }
+                    for (const [key, items] of bySignature) {
+                        const shown = items.filter(visible);
+                        if (shown.length >= minRepeat) {
+                            candidates.push({ selector: key, items: shown, headers: null, kind: 'list' });
+                        }
+                    }
+                }
+            }
+            for (const group of candidates) group.score = score(group);
+            return candidates.sort((a, b) => b.score - a.score);
+        };
+
+        const parse = (group, el) => record(el, group.kind === 'table' ? group.headers : null);
+    """
+
+    RECORDS_JS = (
+        """
+    ([selector, limit, minRepeat]) => {
+    """
+        + HELPERS_JS
+        + """
+        const candidates = findGroups(selector, minRepeat);
+
+        const next = (() => {
+            const rel = document.querySelector('a[rel~="next"][href], link[rel~="next"][href]');
+            if (rel) return rel.href;
+            for (const a of document.querySelectorAll('a[href]')) {
+                const label = clean(a.innerText || a.getAttribute('aria-label')).toLowerCase();
+                if (/^(next|след|далее|вперёд|вперед|›|»|→)/.test(label) && visible(a)) return a.href;
+            }
+            return null;
+        })();
+
+        const best = candidates[0];
+        return {
+            url: location.href,
+            title: document.title,
+            selector: best ? best.selector : selector,
+            kind: best ? best.kind : null,
+            total: best ? best.items.length : 0,
+            records: best ? best.items.slice(0, limit).map(el => parse(best, el)) : [],
+            others: candidates.slice(1, 5).filter(g => g.score > 0).map(g => ({
+                selector: g.selector,
+                count: g.items.length,
+            })),
+            next,
+        };
+    }
+    """
+    )
+
+    # Прокрутка ленты внутри страницы: после каждой прокрутки ждём, пока DOM
+    # успокоится, и добавляем новые записи. Ключ записи не зависит от DOM-узла
+    # (виртуальные списки переиспользуют узлы): data-id/data-key/data-index,
+    # id, ссылка записи или, в крайнем случае, её поля целиком.
+    HARVEST_JS = (
+        """
+    async ([selector, maxItems, stopText, maxScrolls, quiet, minRepeat]) => {
+    """
+        + HELPERS_JS
+        + """
+        const settle = (cap) => new Promise(resolve => {
+            let timer;
+            const done = () => {
+                observer.disconnect();
+                clearTimeout(timer);
+                clearTimeout(limit);
+                resolve();
+            };
+            const observer = new MutationObserver(() => {
+                clearTimeout(timer);
+                timer = setTimeout(done, quiet);
+            });
+            observer.observe(document.documentElement, { subtree: true, childList: true });
+            timer = setTimeout(done, quiet);
+            const limit = setTimeout(done, cap);
+        });
+
+        const KEY_ATTRS = ['data-id', 'data-key', 'data-item-id', 'data-index', 'data-row-key', 'id', 'aria-posinset'];
+        const keyOf = (el, rec) => {
+            for (const attr of KEY_ATTRS) {
+                const value = el.getAttribute(attr);
+                if (value) return `${attr}:${value}`;
+            }
+            return rec.url ? `url:${rec.url}` : JSON.stringify(rec);
+        };
+
+        const first = findGroups(selector, minRepeat)[0];
+        const result = {
+            url: location.href,
+            title: document.title,
+            selector: first ? first.selector : selector,
+            records: [],
+            scrolls: 0,
+            reason: 'none',
+        };
+        if (!first || !first.items.length) return result;
+
+        // Виртуальный список прокручивается в своём контейнере, а не в окне
+        let scroller = document.scrollingElement;
+        for (let node = first.items[0].parentElement; node && node !== document.body; node = node.parentElement) {
+            const overflow = getComputedStyle(node).overflowY;
+            if ((overflow === 'auto' || overflow === 'scroll') && node.scrollHeight > node.clientHeight) {
+                scroller = node;
+                break;
+            }
+        }
+
+        const seen = new Map();
+        const needle = (stopText || '').toLowerCase();
+        let stopped = false;
+        // Узлы, уже разобранные с тем же текстом: повторно не парсим
+        // (в виртуальном списке переиспользованный узел получит новый текст)
+        const parsed = new WeakMap();
+        const collect = () => {
+            const group = findGroups(result.selector, minRepeat)[0];
+            let added = 0;
+            for (const el of group ? group.items : []) {
+                const text = el.textContent;
+                if (parsed.get(el) === text) continue;
+                parsed.set(el, text);
+                const rec = parse(group, el);
+                const key = keyOf(el, rec);
+                if (seen.has(key)) continue;
+                seen.set(key, rec);
+                added++;
+                if (needle && clean(text).toLowerCase().includes(needle)) stopped = true;
+            }
+            return added;
+        };
+
+        collect();
+        let idle = 0;
+        while (true) {
+            if (seen.size >= maxItems) { result.reason = 'limit'; break; }
+            if (stopped) { result.reason = 'stop'; break; }
+            if (result.scrolls >= maxScrolls) { result.reason = 'scrolls'; break; }
+            scroller.scrollTop += scroller.clientHeight * 0.9;
+            result.scrolls++;
+            await settle(quiet * 10);
+            const added = collect();
+            const atEnd = scroller.scrollTop + scroller.clientHeight >= scroller.scrollHeight - 2;
+            if (added || !atEnd) { idle = 0; continue; }
+            // Внизу и ничего нового: даём подгрузке ещё шанс, потом — конец ленты
+            if (++idle >= 2) { result.reason = 'end'; break; }
+            await settle(quiet * 10);
+        }
+
+        result.records = [...seen.values()].slice(0, maxItems);
+        return result;
+    }
+    """
+    )
+
+    HARVEST_REASONS = {
+        "limit": "набрано нужное число записей",
+        "stop": "найден искомый текст",
+        "scrolls": "достигнут лимит прокруток",
+        "end": "лента закончилась",
+        "none": "повторяющихся записей нет",
+    }
+
+    def __init__(self):
+        # Последний сбор на странице: selector вызова и результат
+        self._harvests: weakref.WeakKeyDictionary["Page", tuple[str | None, dict]] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def reset(self):
+        self._harvests = weakref.WeakKeyDictionary()
+
+    @traced("records.extract", "analyzer")
+    async def extract(
+        self, page: "Page", selector: str | None = None, limit: int = MAX_RECORDS
+    ) -> dict:
+        """Записи самой содержательной повторяющейся группы страницы (или
+        элементов, совпавших с selector) и ссылка на следующую страницу."""
+        result = await page.evaluate(
+            self.RECORDS_JS, [selector, min(limit, self.MAX_RECORDS), self.MIN_REPEAT]
+        )
+        annotate(records=len(result["records"]), total=result["total"])
+        return result
+
+    @traced("records.harvest", "analyzer")
+    async def harvest(
+        self,
+        page: "Page",
+        selector: str | None = None,
+        max_items: int = MAX_RECORDS,
+        stop_text: str | None = None,
+        max_scrolls: int = MAX_SCROLLS,
+    ) -> dict:
+        """Листает ленту внутри страницы, собирая записи без повторов, пока не
+        наберётся max_items, не встретится stop_text или лента не кончится."""
+        result = await page.evaluate(
+            self.HARVEST_JS,
+            [
+                selector,
+                min(max_items, self.MAX_HARVEST),
+                stop_text,
+                min(max_scrolls, self.MAX_SCROLLS),
+                self.HARVEST_QUIET_MS,
+                self.MIN_REPEAT,
+            ],
+        )
+        annotate(
+            records=len(result["records"]),
+            scrolls=result["scrolls"],
+            reason=result["reason"],
+        )
+        result = {**result, "total": len(result["records"]), "others": [], "next": None}
+        self._harvests[page] = (selector, result)
+        return result
+
+    def harvested(self, page: "Page", selector: str | None = None) -> dict | None:
+        """Последний сбор на этой странице с тем же selector, если страница
+        с тех пор не сменилась, — чтобы показать следующие записи без
+        повторной прокрутки."""
+        selector_used, result = self._harvests.get(page, (None, None))
+        if result is None or selector_used != selector or page.url != result["url"]:
+            return None
+        return result
+
+    @staticmethod
+    def merge(collected: dict | None, page: dict) -> dict:
+        """Добавляет записи следующей страницы, пропуская уже виденные."""
+        if collected is None:
+            return {**page, "records": list(page["records"]), "pages": 1}
+        seen = {json.dumps(r, sort_keys=True) for r in collected["records"]}
+        for record in page["records"]:
+            key = json.dumps(record, sort_keys=True)
+            if key not in seen:
+                seen.add(key)
+                collected["records"].append(record)
+        collected["url"], collected["title"] = page["url"], page["title"]
+        collected["total"] += page["total"]
+        collected["next"] = page["next"]
+        collected["pages"] += 1
+        return collected
+
+    def format_for_llm(
+        self,
+        result: dict,
+        limit: int = MAX_RECORDS,
+        offset: int = 0,
+        more: str | None = None,
+    ) -> str:
+        """Записи компактно: список полей один раз, дальше строка JSON-массивом
+        на запись (null — поля в записи нет).
+
+        Показываются записи с offset, пока ответ укладывается в
+        RECORDS_TOKENS; сколько осталось, пишется в конце вместе с more —
+        подсказкой, как получить следующие (в ней подставляется {offset}).
+        """
+        records = result["records"][offset : offset + limit]
+        lines = [f"URL: {result['url']}", f"Заголовок: {result['title']}", ""]
+        omitted = 0
+        if not records:
+            lines.append(
+                "Повторяющихся записей не найдено."
+                if not offset
+                else f"Записей после {offset} нет."
+            )
+        else:
+            columns: list[str] = []
+            for record in records:
+                columns.extend(name for name in record if name not in columns)
+            used = count_tokens("\n".join(lines)) + count_tokens(", ".join(columns))
+            rows = []
+            for record in records:
+                row = json.dumps([record.get(c) for c in columns], ensure_ascii=False)
+                used += count_tokens(row)
+                if rows and used > self.RECORDS_TOKENS:
+                    break
+                rows.append(row)
+            omitted = len(result["records"][offset:]) - len(rows)
+
+            details = [result["selector"]]
+            if result.get("pages", 1) > 1:
+                details.append(f"страниц: {result['pages']}")
+            if "scrolls" in result:
+                details.append(f"прокруток: {result['scrolls']}")
+            shown = (
+                f"{len(rows)}" if not offset else f"{offset + 1}–{offset + len(rows)}"
+            )
+            lines.append(
+                f"=== Записи: {shown} из {result['total']} "
+                f"({', '.join(details)}) ==="
+            )
+            lines.append("поля: " + ", ".join(columns))
+            lines.extend(rows)
+        if omitted > 0:
+            hint = (
+                more.format(offset=offset + len(rows))
+                if more
+                else "уточни selector"
+            )
+            lines.append(f"Не показано собранных записей: {omitted}. Дальше: {hint}")
+        if "reason" in result:
+            lines.append(f"Сбор остановлен: {self.HARVEST_REASONS[result['reason']]}")
+        if result["others"]:
+            lines.append(
+                "Другие повторяющиеся блоки (для selector): "
+                + ", ".join(f"{g['selector']} ({g['count']})" for g in result["others"])
+            )
+        if result["next"]:
+            lines.append(f"Следующая страница: {result['next']}")
+        return "\n".join(lines)
@@ -0,0 +1,86 @@
+import math
+import re
+from collections import Counter
+
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Грубый стемминг: у длинных слов отбрасываем окончание, чтобы "погода",
+# "погоду" и "погоды" совпадали без морфологического словаря
+STEM_LENGTH = 6
+
+
+def tokenize(text: str) -> list[str]:
+    return [
+        word[:STEM_LENGTH]
+        for word in TOKEN_RE.findall(text.lower())
+        if len(word) > 1 or word.isdigit()
+    ]
+
+
+class BM25:
+    """Okapi BM25 по небольшому набору документов (блоков одной страницы)."""
+
+    def __init__(self, documents: list[list[str]], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.frequencies = [Counter(doc) for doc in documents]
+        self.lengths = [len(doc) for doc in documents]
+        self.average_length = sum(self.lengths) / len(documents) if documents else 0
+        df = Counter(term for doc in self.frequencies for term in doc)
+        n = len(documents)
+        self.idf = {
+            term: math.log(1 + (n - count + 0.5) / (count + 0.5))
+            for term, count in df.items()
+        }
+
+    def scores(self, query: list[str]) -> list[float]:
+        terms = [t for t in set(query) if t in self.idf]
+        result = []
+        for freq, length in zip(self.frequencies, self.lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / (self.average_length or 1))
+            result.append(
+                sum(
+                    self.idf[t] * freq[t] * (self.k1 + 1) / (freq[t] + norm)
+                    for t in terms
+                    if t in freq
+                )
+            )
+        return result
+
+
+def dedupe(items: list, key) -> list:
+    """Убирает повторы (например, навигацию, продублированную в подвале)."""
+    seen = set()
+    result = []
+    for item in items:
+        k = key(item)
+        if k in seen:
+            continue
+        seen.add(k)
+        result.append(item)
+    return result
+
+
+def rank(texts: list[str], query: str, bonus: list[float] | None = None) -> list[float]:
+    """Оценки релевантности текстов запросу; нули, если запрос пуст."""
+    query_tokens = tokenize(query)
+    if not texts or not query_tokens:
+        return [0.0] * len(texts)
+    scores = BM25([tokenize(t) for t in texts]).scores(query_tokens)
+    if bonus:
+        scores = [s + b for s, b in zip(scores, bonus)]
+    return scores
+
+
+def pack(sizes: list[int], scores: list[float], budget: int) -> list[int]:
+    """Номера элементов, влезающих в бюджет: лучшие по оценке, при равенстве —
+    раньше на странице. Возвращаются в исходном порядке."""
+    order = sorted(range(len(sizes)), key=lambda i: (-scores[i], i))
+    chosen, used = [], 0
+    for i in order:
+        if used + sizes[i] > budget:
+            continue
+        chosen.append(i)
+        used += sizes[i]
+    return sorted(chosen)
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import re
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+
+# Действия, которые можно повторить без модели
+REPLAYABLE_TOOLS = {
+    "goto",
+    "click",
+    "fill",
+    "press",
+    "scroll",
+    "new_tab",
+    "switch_tab",
+    "close_tab",
+}
+
+# Инструменты, после которых запись повторять нельзя (ответ зависит от человека)
+UNREPLAYABLE_TOOLS = {"ask_user"}
+
+
+@dataclass
+class Step:
+    tool: str
+    args: dict
+    fingerprint: dict | None = None
+
+
+def is_failed_result(result: str) -> bool:
+    return result.startswith(("Ошибка", "Действие отменено"))
+
+
+def fingerprint(element: dict | None) -> dict | None:
+    """Признаки элемента, по которым его можно найти в новом снимке страницы."""
+    if element is None:
+        return None
+    return {key: element.get(key) for key in ("tag", "text", "href", "type")}
+
+
+def match_element(print_: dict, elements: list[dict]) -> dict | None:
+    """Лучший элемент снимка под отпечаток; None, если ничего похожего нет."""
+    best, best_score = None, 0
+    for el in elements:
+        if el["tag"] != print_["tag"]:
+            continue
+        score = 0
+        if print_.get("text") and el.get("text") == print_["text"]:
+            score += 3
+        if print_.get("href") and el.get("href") == print_["href"]:
+            score += 2
+        if print_.get("type") and el.get("type") == print_["type"]:
+            score += 1
+        required = 3 if print_.get("text") else 2 if print_.get("href") else 1
+        if score >= required and score > best_score:
+            best, best_score = el, score
+    return best
+
+
+class Recorder:
+    """Копит успешно выполненные действия текущего запуска."""
+
+    def __init__(self):
+        self.steps: list[Step] = []
+        self.replayable = True
+
+    def record(self, tool: str, args: dict, element: dict | None, result: str):
+        if tool in UNREPLAYABLE_TOOLS:
+            self.replayable = False
+        if str(args.get("selector", "")).startswith("aria-ref="):
+            # Ссылки дерева доступности живут до следующего снимка
+            self.replayable = False
+        if tool not in REPLAYABLE_TOOLS or is_failed_result(result):
+            return
+        self.steps.append(Step(tool, dict(args), fingerprint(element)))
+
+
+class RecordingStore:
+    """Записи успешных запусков: один JSON-файл на формулировку задачи."""
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+
+    def _path(self, task: str) -> Path:
+        normalized = re.sub(r"\s+", " ", task.strip().lower())
+        digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+        return self.directory / f"{digest}.json"
+
+    def load(self, task: str) -> dict | None:
+        path = self._path(task)
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            recording = json.load(f)
+        recording["steps"] = [Step(**step) for step in recording["steps"]]
+        return recording
+
+    def save(self, task: str, steps: list[Step], summary: str):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self._path(task), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "task": task,
+                    "summary": summary,
+                    "steps": [asdict(step) for step in steps],
+                },
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
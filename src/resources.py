@@ -0,0 +1,196 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    from playwright.async_api import BrowserContext, Request, Route
+
+
+DEFAULT_BLOCKED_DOMAINS = {
+    "doubleclick.net",
+    "googlesyndication.com",
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googleadservices.com",
+    "facebook.net",
+    "mc.yandex.ru",
+    "an.yandex.ru",
+    "adfox.ru",
+    "top-fwz1.mail.ru",
+    "criteo.com",
+    "hotjar.com",
+    "scorecardresearch.com",
+}
+
+# Типы ресурсов, ответы на которые можно переиспользовать между контекстами
+CACHEABLE_TYPES = {"script", "stylesheet", "font", "image"}
+
+
+@dataclass
+class LoadProfile:
+    """Что не грузить: типы ресурсов Playwright и домены (с поддоменами)."""
+
+    block_types: set[str] = field(default_factory=lambda: {"image", "media", "font"})
+    block_domains: set[str] = field(
+        default_factory=lambda: set(DEFAULT_BLOCKED_DOMAINS)
+    )
+    cache_static: bool = True
+
+
+PROFILES = {
+    "full": None,
+    "light": LoadProfile(),
+    "text": LoadProfile(block_types={"image", "media", "font", "stylesheet"}),
+}
+
+
+def resolve_profile(profile: "str | LoadProfile | None") -> LoadProfile | None:
+    if isinstance(profile, str):
+        if profile not in PROFILES:
+            raise ValueError(
+                f"Неизвестный профиль загрузки {profile!r}, доступны: {', '.join(PROFILES)}"
+            )
+        return PROFILES[profile]
+    return profile
+
+
+class StaticCache:
+    """Короткоживущий кэш статических ответов, общий для всех контекстов."""
+
+    def __init__(self, ttl: float = 300.0, max_bytes: int = 50 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[float, int, dict, bytes]] = OrderedDict()
+        self._size = 0
+
+    def get(self, url: str) -> tuple[int, dict, bytes] | None:
+        entry = self._entries.get(url)
+        if entry is None:
+            return None
+        expires, status, headers, body = entry
+        if expires < time.monotonic():
+            self._drop(url)
+            return None
+        self._entries.move_to_end(url)
+        return status, headers, body
+
+    def put(self, url: str, status: int, headers: dict, body: bytes):
+        if len(body) > self.max_bytes // 10:
+            return
+        if url in self._entries:
+            self._drop(url)
+        self._entries[url] = (time.monotonic() + self.ttl, status, headers, body)
+        self._size += len(body)
+        while self._size > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, url: str):
+        _, _, _, body = self._entries.pop(url)
+        self._size -= len(body)
+
+
+@dataclass
+class ResourceStats:
+    blocked: int = 0
+    blocked_by_type: dict[str, int] = field(default_factory=dict)
+    cache_hits: int = 0
+    cache_bytes: int = 0
+    fetched_bytes: int = 0
+
+
+class ResourceBlocker:
+    """Перехват запросов контекста через route по профилю загрузки."""
+
+    def __init__(self, profile: LoadProfile, cache: StaticCache | None = None):
+        self.profile = profile
+        self.cache = cache if profile.cache_static else None
+        self.stats = ResourceStats()
+
+    async def install(self, context: "BrowserContext"):
+        await context.route("**/*", self._handle)
+
+    def _is_blocked_domain(self, url: str) -> bool:
+        host = urlsplit(url).hostname or ""
+        parts = host.split(".")
+        return any(
+            ".".join(parts[i:]) in self.profile.block_domains
+            for i in range(len(parts) - 1)
+        )
+
+    async def _handle(self, route: "Route", request: "Request"):
+        kind = request.resource_type
+        if kind in self.profile.block_types or self._is_blocked_domain(request.url):
+            self.stats.blocked += 1
+            self.stats.blocked_by_type[kind] = self.stats.blocked_by_type.get(kind, 0) + 1
+            await route.abort("blockedbyclient")
+            return
+
+        if self.cache is None or kind not in CACHEABLE_TYPES or request.method != "GET":
+            await route.continue_()
+            return
+
+        cached = self.cache.get(request.url)
+        if cached is not None:
+            status, headers, body = cached
+            self.stats.cache_hits += 1
+            self.stats.cache_bytes += len(body)
+            try:
+                await route.fulfill(status=status, headers=headers, body=body)
+            except Exception:
+                await self._continue(route)
+            return
+
+        try:
+            response = await route.fetch()
+            body = await response.body()
+        except Exception:
+            # Не удалось забрать ответ через route — пусть браузер грузит сам
+            await self._continue(route)
+            return
+        self.stats.fetched_bytes += len(body)
+        headers = {
+            k: v
+            for k, v in response.headers.items()
+            if k.lower() not in ("content-encoding", "content-length")
+        }
+        if response.status == 200 and self._is_shareable(headers):
+            self.cache.put(request.url, response.status, headers, body)
+        try:
+            await route.fulfill(response=response, body=body)
+        except Exception:
+            await self._continue(route)
+
+    @staticmethod
+    def _is_shareable(headers: dict) -> bool:
+        """Ответ можно отдавать другим контекстам: он не зависит от куки и
+        не привязан к пользователю."""
+        headers = {k.lower(): v.lower() for k, v in headers.items()}
+        cache_control = headers.get("cache-control", "")
+        vary = headers.get("vary", "")
+        return not (
+            "no-store" in cache_control
+            or "private" in cache_control
+            or "set-cookie" in headers
+            or "cookie" in vary
+            or "authorization" in vary
+            or "*" in vary
+        )
+
+    @staticmethod
+    async def _continue(route: "Route"):
+        try:
+            await route.continue_()
+        except Exception:
+            # Запрос уже обработан или страница закрыта
+            pass
+
+    def report(self) -> str:
+        s = self.stats
+        by_type = ", ".join(f"{k}: {v}" for k, v in sorted(s.blocked_by_type.items()))
+        return (
+            f"заблокировано запросов: {s.blocked}"
+            + (f" ({by_type})" if by_type else "")
+            + f"; из кэша статики: {s.cache_hits} ({s.cache_bytes / 1024:.0f} КБ)"
+        )
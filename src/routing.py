@@ -0,0 +1,143 @@
+import statistics
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable
+from .memory import result_text
+from .replay import is_failed_result
+
+
+@dataclass
+class ModelTier:
+    name: str
+    model: str
+    max_tokens: int
+
+
+@dataclass
+class RoutingRules:
+    """Когда шаг отдаётся большой модели, а не быстрой."""
+
+    # Шаг сразу после новых указаний: начало задачи, продолжение после
+    # падения, неудачный повтор записи
+    plan_on_instructions: bool = True
+    # Прошлое действие завершилось ошибкой или отказом пользователя
+    escalate_on_error: bool = True
+    # Пользователь ответил на вопрос агента
+    escalate_on_answer: bool = True
+    # Пришёл полный снимок страницы: на новой странице нужно заново решать,
+    # что делать
+    escalate_on_snapshot: bool = True
+    # Быстрая модель ответила текстом без действия — переспросить большую
+    escalate_on_text: bool = True
+    # Большая модель хотя бы раз за столько подряд идущих быстрых шагов
+    # (0 — не ограничивать)
+    replan_every: int = 6
+
+
+class ModelRouter:
+    """Выбирает модель для каждого шага агента.
+
+    Рутинные шаги (нажать Enter после fill, прокрутить, вызвать done)
+    уходят быстрой модели, планирование и разбор ошибок — большой. Без
+    быстрой модели все шаги идут большой. Кэш промпта у моделей свой,
+    поэтому переключения между ними стоят одного чтения истории без кэша.
+    """
+
+    def __init__(
+        self,
+        large: ModelTier,
+        small: ModelTier | None = None,
+        rules: RoutingRules | None = None,
+    ):
+        self.large = large
+        self.small = small
+        self.rules = rules or RoutingRules()
+        self.decisions: list[tuple[str, str]] = []
+        self._latencies: dict[str, list[float]] = defaultdict(list)
+        # Токены по моделям: [вход, выход]
+        self._tokens: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+        self._small_streak = 0
+        self._preferred: str | None = None
+
+    def reset(self):
+        self.decisions = []
+        self._latencies = defaultdict(list)
+        self._tokens = defaultdict(lambda: [0, 0])
+        self._small_streak = 0
+        self._preferred = None
+
+    def prefer_small(self, reason: str):
+        """Отдаёт следующий шаг быстрой модели, даже если по правилам он
+        достался бы большой (например, итог после повтора записи)."""
+        self._preferred = reason
+
+    def choose(
+        self, messages: list[dict], is_snapshot: Callable[[str], bool]
+    ) -> tuple[ModelTier, str]:
+        """Модель для следующего шага и причина выбора."""
+        if self.small is None:
+            return self._pick(self.large, "единственная модель")
+        if self._preferred is not None:
+            reason, self._preferred = self._preferred, None
+            return self._pick(self.small, reason)
+        reason = self._escalation(messages, is_snapshot)
+        if reason is not None:
+            return self._pick(self.large, reason)
+        if self.rules.replan_every and self._small_streak >= self.rules.replan_every:
+            return self._pick(self.large, "плановая проверка")
+        return self._pick(self.small, "рутинный шаг")
+
+    def escalate(self, tier: ModelTier, response) -> tuple[ModelTier, str] | None:
+        """Большая модель, если после ответа быстрой шаг нужно переспросить."""
+        if (
+            tier is self.small
+            and self.rules.escalate_on_text
+            and response.stop_reason != "tool_use"
+        ):
+            return self._pick(self.large, "ответ без действия")
+        return None
+
+    def record(
+        self, tier: ModelTier, seconds: float, input_tokens: int = 0, output_tokens: int = 0
+    ):
+        self._latencies[tier.name].append(seconds)
+        tokens = self._tokens[tier.name]
+        tokens[0] += input_tokens
+        tokens[1] += output_tokens
+
+    def report(self) -> str:
+        """Разбивка запросов задачи по моделям: число, медиана задержки и
+        токены. Переспрос большой модели считается отдельным запросом."""
+        return ", ".join(
+            f"{name}: запросов {len(times)}, медиана {statistics.median(times):.2f} с, "
+            f"вход {self._tokens[name][0]}, выход {self._tokens[name][1]}"
+            for name, times in self._latencies.items()
+        )
+
+    def _pick(self, tier: ModelTier, reason: str) -> tuple[ModelTier, str]:
+        self._small_streak = self._small_streak + 1 if tier is self.small else 0
+        self.decisions.append((tier.name, reason))
+        return tier, reason
+
+    def _escalation(
+        self, messages: list[dict], is_snapshot: Callable[[str], bool]
+    ) -> str | None:
+        rules = self.rules
+        if not messages:
+            return "планирование" if rules.plan_on_instructions else None
+        content = messages[-1]["content"]
+        if isinstance(content, str):
+            return "планирование" if rules.plan_on_instructions else None
+
+        texts = [result_text(b["content"]) for b in content if b["type"] == "tool_result"]
+        if rules.plan_on_instructions and any(b["type"] == "text" for b in content):
+            return "планирование"
+        if rules.escalate_on_error and any(is_failed_result(t) for t in texts):
+            return "ошибка действия"
+        if rules.escalate_on_answer and any(
+            t.startswith("Пользователь ответил") for t in texts
+        ):
+            return "ответ пользователя"
+        if rules.escalate_on_snapshot and any(is_snapshot(t) for t in texts):
+            return "новая страница"
+        return None
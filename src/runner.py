@@ -0,0 +1,131 @@
+import asyncio
+import json
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from rich.console import Console
+from .agent import Agent, create_client
+from .pool import ContextPool
+
+
+console = Console()
+
+
+@dataclass
+class TaskResult:
+    id: str
+    task: str
+    status: str
+    summary: str | None
+    error: str | None
+    seconds: float
+    steps: int
+    input_tokens: int
+    output_tokens: int
+
+
+# В пакетном режиме отвечать некому: консольный ввод заблокировал бы все
+# задачи разом. Вопросы остаются без ответа, опасные действия отклоняются —
+# как в серверном режиме по истечении reply_timeout
+async def batch_ask_user(question: str) -> str:
+    return "(нет ответа — действуй самостоятельно)"
+
+
+async def batch_confirm(tool_name: str, args: dict, reason: str) -> bool:
+    console.print(f"[yellow]⚠️  Отклонено без подтверждения: {tool_name} ({reason})[/]")
+    return False
+
+
+def load_tasks(path: str | Path) -> list[dict]:
+    """Читает задачи из JSONL: строка — {"id": ..., "task": ...} или просто строка."""
+    tasks = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"task": item}
+            item.setdefault("id", str(line_no))
+            tasks.append(item)
+    return tasks
+
+
+async def _run_one(
+    pool: ContextPool, api_key: str | None, item: dict, agent_options: dict
+) -> TaskResult:
+    started = time.perf_counter()
+    agent = None
+    summary, error = None, None
+    try:
+        async with pool.lease() as browser:
+            agent = Agent(api_key=api_key, browser=browser, **agent_options)
+            summary = await agent.run(item["task"])
+    except Exception as e:
+        error = str(e)
+
+    memory = agent.memory if agent else None
+    return TaskResult(
+        id=str(item["id"]),
+        task=item["task"],
+        status="error" if error else ("done" if summary is not None else "stopped"),
+        summary=summary,
+        error=error,
+        seconds=round(time.perf_counter() - started, 3),
+        steps=memory.steps if memory else 0,
+        input_tokens=memory.total_input_tokens if memory else 0,
+        output_tokens=memory.total_output_tokens if memory else 0,
+    )
+
+
+async def run_batch(
+    tasks: list[dict],
+    api_key: str | None,
+    output: str | Path,
+    concurrency: int = 4,
+    headless: bool = True,
+    load_profile: str | None = None,
+    **agent_options,
+) -> list[TaskResult]:
+    """Выполняет задачи параллельно, каждую — в своём контексте из пула.
+
+    Результаты дописываются в output (JSONL) по мере завершения задач.
+    agent_options передаются в конструктор Agent (client, trace_dir и т.д.);
+    ask_user и confirm по умолчанию не спрашивают человека, см. batch_ask_user
+    и batch_confirm.
+    """
+    agent_options = {"ask_user": batch_ask_user, "confirm": batch_confirm, **agent_options}
+    pool = ContextPool(size=concurrency, headless=headless, load_profile=load_profile)
+    started = time.perf_counter()
+    results = []
+
+    if agent_options.get("client") is None:
+        # SDK импортируется в потоке, пока запускается Chromium; один клиент
+        # на весь пакет — общий пул HTTP-соединений
+        client, _ = await asyncio.gather(
+            asyncio.to_thread(create_client, api_key), pool.start()
+        )
+        agent_options = {**agent_options, "client": client}
+    else:
+        await pool.start()
+    try:
+        with open(output, "a", encoding="utf-8") as out:
+            jobs = [_run_one(pool, api_key, item, agent_options) for item in tasks]
+            for job in asyncio.as_completed(jobs):
+                result = await job
+                results.append(result)
+                out.write(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+                out.flush()
+                console.print(
+                    f"[bold]{result.id}[/] {result.status} за {result.seconds:.1f}s"
+                )
+    finally:
+        await pool.close()
+
+    elapsed = time.perf_counter() - started
+    console.print(
+        f"\n[bold green]Готово:[/] {len(results)} задач за {elapsed:.1f}s "
+        f"(параллельно {concurrency}, {len(results) / elapsed * 60:.1f} задач/мин)"
+    )
+    return results
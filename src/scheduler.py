@@ -0,0 +1,72 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+from .tools import INTERACTIVE_TOOLS, READ_ONLY_TOOLS, SNAPSHOT_TOOLS, is_dangerous_action
+
+
+READ = "read"
+SNAPSHOT = "snapshot"
+BARRIER = "barrier"
+
+
+@dataclass
+class _Scheduled:
+    task: asyncio.Task
+    kind: str
+
+
+class ToolScheduler:
+    """Запускает tool_use-блоки одного хода с учётом зависимостей.
+
+    Чистые чтения идут параллельно друг с другом и со снимками страницы,
+    снимки между собой — по очереди. Действия, меняющие страницу, а также
+    интерактивные (ask_user, подтверждение опасного действия) — барьеры:
+    ждут всё, что было запланировано до них, и всё последующее ждёт их.
+    Ввод в поля — тоже барьер: fill в Playwright фокусирует поле и печатает
+    через page.keyboard, то есть в элемент, который в этот момент в фокусе,
+    поэтому два fill на одной странице параллельно путают поля.
+    """
+
+    def __init__(self, parallel: bool = True):
+        self.parallel = parallel
+        self._scheduled: list[_Scheduled] = []
+
+    @property
+    def tasks(self) -> list[asyncio.Task]:
+        return [item.task for item in self._scheduled]
+
+    def classify(self, name: str, args: dict) -> str:
+        if not self.parallel or name in INTERACTIVE_TOOLS:
+            return BARRIER
+        if is_dangerous_action(name, args)[0]:
+            return BARRIER
+        if name in READ_ONLY_TOOLS:
+            return READ
+        if name in SNAPSHOT_TOOLS:
+            return SNAPSHOT
+        return BARRIER
+
+    @staticmethod
+    def _conflicts(earlier: _Scheduled, kind: str) -> bool:
+        if BARRIER in (earlier.kind, kind):
+            return True
+        return not (READ in (earlier.kind, kind) and {earlier.kind, kind} <= {READ, SNAPSHOT})
+
+    def schedule(
+        self, name: str, args: dict, run: Callable[[], Awaitable]
+    ) -> asyncio.Task:
+        kind = self.classify(name, args)
+        deps = [item.task for item in self._scheduled if self._conflicts(item, kind)]
+        task = asyncio.create_task(self._run_after(deps, run))
+        self._scheduled.append(_Scheduled(task, kind))
+        return task
+
+    @staticmethod
+    async def _run_after(deps: list[asyncio.Task], run: Callable[[], Awaitable]):
+        if deps:
+            await asyncio.wait(deps)
+        return await run()
+
+    def cancel(self):
+        for item in self._scheduled:
+            item.task.cancel()
@@ -0,0 +1,214 @@
+import asyncio
+import itertools
+import json
+import time
+from rich.console import Console
+from .agent import Agent, create_client
+from .pool import ContextPool
+
+
+console = Console()
+
+DEFAULT_SOCKET = "/tmp/ai-browser-agent.sock"
+
+
+class AgentServer:
+    """Долгоживущий сервер задач с тёплым браузером.
+
+    Протокол — JSON по строке в обе стороны через Unix-сокет (или TCP).
+    Клиент шлёт {"task": "...", "id": "..."}; сервер отвечает потоком
+    событий агента и итоговым {"type": "result", ...}. Вопросы ask_user и
+    подтверждения опасных действий приходят клиенту событиями "question" и
+    "confirm" с полем prompt_id; ответ — {"prompt_id": ..., "answer": "..."}
+    или {"prompt_id": ..., "approve": true}. Ответ без prompt_id текущего
+    вопроса отбрасывается: опоздавшее «да» не подтвердит следующее действие.
+    Без ответа за reply_timeout секунд вопрос считается без ответа,
+    действие — отклонённым.
+    """
+
+    def __init__(
+        self,
+        api_key: str | None,
+        pool_size: int = 2,
+        headless: bool = True,
+        reply_timeout: float = 120.0,
+        load_profile: str | None = None,
+        **agent_options,
+    ):
+        self.api_key = api_key
+        self.pool = ContextPool(
+            size=pool_size, headless=headless, load_profile=load_profile
+        )
+        self.reply_timeout = reply_timeout
+        self.agent_options = agent_options
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(
+        self, path: str | None = DEFAULT_SOCKET, host: str | None = None, port: int = 0
+    ):
+        if self.agent_options.get("client") is None:
+            # Импорт SDK в потоке параллельно с запуском Chromium
+            self.agent_options["client"], _ = await asyncio.gather(
+                asyncio.to_thread(create_client, self.api_key), self.pool.start()
+            )
+        else:
+            await self.pool.start()
+        if host:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        else:
+            self._server = await asyncio.start_unix_server(self._handle, path)
+        address = f"{host}:{port}" if host else path
+        console.print(f"[green]✓ Сервер агента слушает {address}[/]")
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.pool.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        tasks: asyncio.Queue[dict | None] = asyncio.Queue()
+        replies: asyncio.Queue[dict] = asyncio.Queue()
+
+        def send(event: dict):
+            writer.write((json.dumps(event, ensure_ascii=False) + "\n").encode())
+
+        async def read_loop():
+            while line := await reader.readline():
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    send({"type": "error", "error": "некорректный JSON"})
+                    continue
+                (tasks if "task" in message else replies).put_nowait(message)
+            tasks.put_nowait(None)
+
+        reader_task = asyncio.create_task(read_loop())
+        try:
+            while (request := await tasks.get()) is not None:
+                await self._run_task(request, send, replies)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            reader_task.cancel()
+            writer.close()
+
+    async def _run_task(self, request: dict, send, replies: asyncio.Queue):
+        prompt_ids = itertools.count(1)
+
+        async def prompt(event: dict) -> dict | None:
+            """Отправляет вопрос и ждёт ответа именно на него."""
+            # Опоздавшие ответы на прошлые вопросы больше не нужны
+            while not replies.empty():
+                replies.get_nowait()
+            prompt_id = next(prompt_ids)
+            send({**event, "prompt_id": prompt_id})
+            deadline = time.monotonic() + self.reply_timeout
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    reply = await asyncio.wait_for(replies.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if reply.get("prompt_id") == prompt_id:
+                    return reply
+                send({"type": "error", "error": "ответ не на текущий вопрос отброшен"})
+            return None
+
+        async def ask_user(question: str) -> str:
+            reply = await prompt({"type": "question", "question": question})
+            if reply is None:
+                return "(нет ответа — действуй самостоятельно)"
+            return str(reply.get("answer", ""))
+
+        async def confirm(tool_name: str, args: dict, reason: str) -> bool:
+            reply = await prompt(
+                {"type": "confirm", "tool": tool_name, "args": args, "reason": reason}
+            )
+            return bool(reply and reply.get("approve"))
+
+        task_id = str(request.get("id", ""))
+        started = time.perf_counter()
+        summary, error = None, None
+        try:
+            async with self.pool.lease() as browser:
+                agent = Agent(
+                    api_key=self.api_key,
+                    browser=browser,
+                    ask_user=ask_user,
+                    confirm=confirm,
+                    on_event=lambda event: send({**event, "id": task_id}),
+                    **self.agent_options,
+                )
+                summary = await agent.run(request["task"])
+        except Exception as e:
+            error = str(e)
+
+        if error:
+            status = "error"
+        else:
+            status = "done" if summary is not None else "stopped"
+        send(
+            {
+                "type": "result",
+                "id": task_id,
+                "status": status,
+                "summary": summary,
+                "error": error,
+                "seconds": round(time.perf_counter() - started, 3),
+            }
+        )
+
+
+async def submit(
+    task: str, path: str | None = DEFAULT_SOCKET, host: str | None = None, port: int = 0
+) -> dict | None:
+    """Клиент: отправляет задачу серверу, печатает события, отвечает на вопросы."""
+    if host:
+        reader, writer = await asyncio.open_connection(host, port)
+    else:
+        reader, writer = await asyncio.open_unix_connection(path)
+
+    def send(message: dict):
+        writer.write((json.dumps(message, ensure_ascii=False) + "\n").encode())
+
+    send({"task": task, "id": "cli"})
+    await writer.drain()
+
+    result = None
+    while line := await reader.readline():
+        event = json.loads(line)
+        kind = event["type"]
+        if kind == "tool":
+            console.print(f"[yellow]🔧 {event['name']}[/]: {event['input']}")
+        elif kind == "tool_result":
+            console.print(f"[dim]→ {event['result'][:200]}[/]")
+        elif kind == "question":
+            console.print(f"\n[bold cyan]❓ Агент спрашивает:[/] {event['question']}")
+            answer = console.input("[bold]Ваш ответ: [/]")
+            send({"prompt_id": event["prompt_id"], "answer": answer})
+        elif kind == "confirm":
+            console.print(f"\n[bold red]⚠️  ВНИМАНИЕ: {event['reason']}[/]")
+            console.print(f"Действие: {event['tool']} с параметрами {event['args']}")
+            answer = console.input("[bold]Выполнить? (y/n): [/]")
+            send(
+                {
+                    "prompt_id": event["prompt_id"],
+                    "approve": answer.lower() in ("y", "yes", "да", "д"),
+                }
+            )
+        elif kind == "result":
+            result = event
+            console.print(
+                f"\n[bold green]{event['status']}[/] за {event['seconds']:.1f}s\n"
+                f"{event['summary'] or event['error'] or ''}"
+            )
+            break
+        await writer.drain()
+
+    writer.close()
+    return result
@@ -12,25 +12,38 @@ TOOLS = [
     },
     {
         "name": "click",
-        "description": "Кликнуть на элемент по CSS-селектору",
+        "description": (
+            "Кликнуть на элемент: по номеру из analyze_page (предпочтительно) "
+            "или по CSS-селектору"
+        ),
         "input_schema": {
             "type": "object",
             "properties": {
-                "selector": {"type": "string", "description": "CSS-селектор элемента"}
+                "index": {
+                    "type": "integer",
+                    "description": "Номер элемента из списка analyze_page",
+                },
+                "selector": {"type": "string", "description": "CSS-селектор элемента"},
             },
-            "required": ["selector"],
         },
     },
     {
         "name": "fill",
-        "description": "Ввести текст в поле ввода",
+        "description": (
+            "Ввести текст в поле ввода: по номеру из analyze_page (предпочтительно) "
+            "или по CSS-селектору"
+        ),
         "input_schema": {
             "type": "object",
             "properties": {
+                "index": {
+                    "type": "integer",
+                    "description": "Номер поля из списка analyze_page",
+                },
                 "selector": {"type": "string", "description": "CSS-селектор поля"},
                 "text": {"type": "string", "description": "Текст для ввода"},
             },
-            "required": ["selector", "text"],
+            "required": ["text"],
         },
     },
     {
@@ -65,10 +78,199 @@ TOOLS = [
         },
     },
     {
-        "name": "analyze_page",
-        "description": "Получить содержимое текущей страницы (текст и интерактивные элементы)",
+        "name": "list_tabs",
+        "description": "Показать открытые вкладки с номерами; активная помечена",
         "input_schema": {"type": "object", "properties": {}},
     },
+    {
+        "name": "new_tab",
+        "description": "Открыть новую вкладку (по желанию сразу с URL) и сделать её активной",
+        "input_schema": {
+            "type": "object",
+            "properties": {"url": {"type": "string", "description": "URL для перехода"}},
+        },
+    },
+    {
+        "name": "switch_tab",
+        "description": "Сделать активной вкладку с указанным номером",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "tab": {"type": "integer", "description": "Номер вкладки из list_tabs"}
+            },
+            "required": ["tab"],
+        },
+    },
+    {
+        "name": "close_tab",
+        "description": "Закрыть вкладку (по умолчанию активную)",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "tab": {"type": "integer", "description": "Номер вкладки из list_tabs"}
+            },
+        },
+    },
+    {
+        "name": "analyze_page",
+        "description": (
+            "Получить содержимое текущей страницы (текст и интерактивные элементы). "
+            "После навигации возвращается полный снимок, иначе — только изменения "
+            "с прошлого анализа. Элементы в снимке: [номер]код — a ссылка, "
+            "b кнопка, i поле (i:email — с типом), s список, t текст; "
+            "[10-14]a ×5 — серия однотипных элементов подряд; /путь — ссылка "
+            "этого сайта, @x/путь — домен из строк @x=… в начале списка"
+        ),
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "full": {
+                    "type": "boolean",
+                    "description": "Вернуть полный снимок вместо изменений",
+                    "default": False,
+                }
+            },
+        },
+    },
+    {
+        "name": "observe_page",
+        "description": (
+            "Компактный снимок страницы: дерево доступности (роли и подписи "
+            "элементов) и, по желанию, уменьшенный скриншот видимой области. "
+            "Элементы из дерева адресуй в click/fill селектором aria-ref=eN"
+        ),
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "screenshot": {
+                    "type": "boolean",
+                    "description": "Приложить скриншот видимой области",
+                    "default": False,
+                },
+                "max_image_kb": {
+                    "type": "integer",
+                    "description": "Предел размера скриншота в КБ",
+                    "default": 60,
+                },
+            },
+        },
+    },
+    {
+        "name": "extract_records",
+        "description": (
+            "Извлечь со страницы повторяющиеся записи (строки таблицы, карточки "
+            "результатов, пункты списка) в виде полей со ссылками — одним вызовом "
+            "вместо чтения текста страницы. По желанию проходит следующие "
+            "страницы выдачи"
+        ),
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "selector": {
+                    "type": "string",
+                    "description": (
+                        "CSS-селектор одной записи; без него выбирается самый "
+                        "содержательный повторяющийся блок"
+                    ),
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Сколько записей нужно",
+                    "default": 20,
+                },
+                "pages": {
+                    "type": "integer",
+                    "description": "Сколько страниц выдачи пройти по ссылке «Далее»",
+                    "default": 1,
+                },
+            },
+        },
+    },
+    {
+        "name": "harvest_records",
+        "description": (
+            "Собрать записи бесконечной ленты (письма, посты, вакансии): страница "
+            "прокручивается сама, пока не наберётся max_items записей, не "
+            "встретится stop_text или лента не кончится. Повторы отбрасываются. "
+            "Заменяет цикл scroll → analyze_page одним вызовом"
+        ),
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "selector": {
+                    "type": "string",
+                    "description": (
+                        "CSS-селектор одной записи; без него выбирается самый "
+                        "содержательный повторяющийся блок"
+                    ),
+                },
+                "max_items": {
+                    "type": "integer",
+                    "description": "Сколько записей собрать",
+                    "default": 50,
+                },
+                "stop_text": {
+                    "type": "string",
+                    "description": "Остановиться, когда появится запись с этим текстом",
+                },
+                "max_scrolls": {
+                    "type": "integer",
+                    "description": "Предел числа прокруток",
+                    "default": 30,
+                },
+                "offset": {
+                    "type": "integer",
+                    "description": (
+                        "С какой записи показывать: для следующей порции уже "
+                        "собранных записей, если ответ сообщил о непоказанных"
+                    ),
+                    "default": 0,
+                },
+            },
+        },
+    },
+    {
+        "name": "run_actions",
+        "description": (
+            "Выполнить подряд несколько действий (goto, click, fill, press, scroll) "
+            "за один вызов, например заполнить форму и отправить её. Шаги идут по "
+            "порядку; на первой ошибке выполнение останавливается. В конце, по "
+            "желанию, возвращаются изменения страницы, как у analyze_page"
+        ),
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "actions": {
+                    "type": "array",
+                    "description": "Шаги по порядку",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "tool": {
+                                "type": "string",
+                                "enum": ["goto", "click", "fill", "press", "scroll"],
+                                "description": "Действие",
+                            },
+                            "index": {"type": "integer"},
+                            "selector": {"type": "string"},
+                            "url": {"type": "string"},
+                            "text": {"type": "string"},
+                            "key": {"type": "string"},
+                            "direction": {"type": "string", "enum": ["up", "down"]},
+                            "amount": {"type": "integer"},
+                        },
+                        "required": ["tool"],
+                    },
+                },
+                "observe": {
+                    "type": "boolean",
+                    "description": "Вернуть изменения страницы после шагов",
+                    "default": True,
+                },
+            },
+            "required": ["actions"],
+        },
+    },
     {
         "name": "ask_user",
         "description": "Задать вопрос пользователю, если нужна дополнительная информация",
@@ -96,6 +298,20 @@ TOOLS = [
     },
 ]
 
+# Инструменты, которые только читают состояние и могут идти параллельно
+READ_ONLY_TOOLS = {"list_tabs"}
+
+# Снимки страницы читают её, но меняют состояние агента (номера элементов,
+# кэш снимков, заглушки в памяти, предзагрузку): друг с другом — по очереди
+SNAPSHOT_TOOLS = {"analyze_page", "observe_page"}
+
+# Требуют участия пользователя: выполняются строго по одному
+INTERACTIVE_TOOLS = {"ask_user"}
+
+# Действия, допустимые внутри run_actions
+BATCH_TOOLS = {"goto", "click", "fill", "press", "scroll"}
+MAX_BATCH_ACTIONS = 10
+
 DANGEROUS_ACTIONS = {
     "click": [
         "удалить",
@@ -114,6 +330,13 @@ DANGEROUS_ACTIONS = {
 }
 
 
+def element_target(args: dict) -> str | int:
+    """Цель click/fill: номер элемента из analyze_page или CSS-селектор."""
+    if args.get("index") is not None:
+        return int(args["index"])
+    return args["selector"]
+
+
 def is_dangerous_action(tool_name: str, args: dict) -> tuple[bool, str]:
     """Проверяет, является ли действие потенциально опасным."""
     if tool_name not in DANGEROUS_ACTIONS:
@@ -0,0 +1,157 @@
+import asyncio
+import functools
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from rich.table import Table
+
+
+@dataclass
+class Span:
+    name: str
+    cat: str
+    start_ms: float
+    duration_ms: float = 0.0
+    track: int = 0
+    args: dict = field(default_factory=dict)
+
+
+_current_tracer: ContextVar["Tracer | None"] = ContextVar("tracer", default=None)
+_current_span: ContextVar[Span | None] = ContextVar("span", default=None)
+
+
+class Tracer:
+    """Собирает замеры одной задачи: время шагов, токены, размеры данных.
+
+    Трассировщик активируется через activate() и виден всем корутинам и
+    задачам, созданным внутри; компоненты пишут в него через span()
+    и annotate(), не зная о нём напрямую.
+    """
+
+    def __init__(self, task: str = ""):
+        self.task = task
+        self.spans: list[Span] = []
+        self._origin = time.perf_counter()
+        self._tracks: dict[int, int] = {}
+
+    @contextmanager
+    def activate(self):
+        token = _current_tracer.set(self)
+        try:
+            yield self
+        finally:
+            _current_tracer.reset(token)
+
+    def _track(self) -> int:
+        # Отдельная дорожка на каждую asyncio-задачу, чтобы спаны вкладывались
+        try:
+            key = id(asyncio.current_task())
+        except RuntimeError:
+            key = 0
+        return self._tracks.setdefault(key, len(self._tracks))
+
+    def to_dict(self) -> dict:
+        return {"task": self.task, "spans": [asdict(s) for s in self.spans]}
+
+    def export_json(self, path: str | Path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def export_chrome(self, path: str | Path):
+        """Формат Chrome trace-event: открывается в chrome://tracing и Perfetto."""
+        events = [
+            {
+                "name": s.name,
+                "cat": s.cat,
+                "ph": "X",
+                "ts": round(s.start_ms * 1000),
+                "dur": round(s.duration_ms * 1000),
+                "pid": 1,
+                "tid": s.track,
+                "args": s.args,
+            }
+            for s in self.spans
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events}, f, ensure_ascii=False)
+
+    def summary_table(self) -> Table:
+        table = Table(title=f"Профиль задачи: {self.task}")
+        for column in ("Шаг", "Вызовов", "Всего, мс", "Среднее, мс", "Макс, мс"):
+            table.add_column(column, justify="left" if column == "Шаг" else "right")
+
+        groups: dict[str, list[float]] = {}
+        for s in self.spans:
+            groups.setdefault(s.name, []).append(s.duration_ms)
+        for name, durations in sorted(groups.items(), key=lambda kv: -sum(kv[1])):
+            table.add_row(
+                name,
+                str(len(durations)),
+                f"{sum(durations):.0f}",
+                f"{sum(durations) / len(durations):.0f}",
+                f"{max(durations):.0f}",
+            )
+
+        tokens = self.totals("input_tokens", "output_tokens", "cache_read_tokens")
+        table.caption = (
+            f"токены: вход {tokens['input_tokens']}, выход {tokens['output_tokens']}, "
+            f"из кэша {tokens['cache_read_tokens']}"
+        )
+        return table
+
+    def totals(self, *keys: str) -> dict[str, float]:
+        return {
+            key: sum(s.args.get(key, 0) for s in self.spans) for key in keys
+        }
+
+
+@contextmanager
+def span(name: str, cat: str = "agent", **args):
+    """Замеряет блок кода, если в текущем контексте активен Tracer."""
+    tracer = _current_tracer.get()
+    if tracer is None:
+        yield None
+        return
+
+    started = time.perf_counter()
+    item = Span(
+        name=name,
+        cat=cat,
+        start_ms=(started - tracer._origin) * 1000,
+        track=tracer._track(),
+        args=dict(args),
+    )
+    token = _current_span.set(item)
+    try:
+        yield item
+    finally:
+        _current_span.reset(token)
+        item.duration_ms = (time.perf_counter() - started) * 1000
+        tracer.spans.append(item)
+
+
+def annotate(**args):
+    """Добавляет данные к текущему спану (если трассировка включена)."""
+    item = _current_span.get()
+    if item is not None:
+        item.args.update(args)
+
+
+def traced(name: str, cat: str):
+    """Декоратор для async-методов: спан на каждый вызов и размер результата."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name, cat) as item:
+                result = await func(*args, **kwargs)
+                if item is not None and isinstance(result, str):
+                    item.args["result_chars"] = len(result)
+                return result
+
+        return wrapper
+
+    return decorator
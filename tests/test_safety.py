@@ -0,0 +1,70 @@
+import asyncio
+
+from src.agent import Agent
+from src.fake_llm import FakeLLM
+from benchmarks.fakes import SleepBrowser
+
+
+AX_SNAPSHOT = """- main [ref=e1]:
+  - heading "Письма" [level=1] [ref=e2]
+  - listitem [ref=e10]:
+    - link "Отчёт за март" [ref=e11] [cursor=pointer]
+    - button "Удалить" [ref=e12] [cursor=pointer]
+  - button [ref=e13]:
+    - text: Оплатить заказ
+  - button "Обновить" [ref=e14]"""
+
+
+class AxLocator:
+    async def aria_snapshot(self, mode=None):
+        return AX_SNAPSHOT
+
+
+class AxPage:
+    url = "https://mail.local/inbox"
+
+    def locator(self, selector):
+        return AxLocator()
+
+    async def title(self):
+        return "Почта"
+
+
+def make_agent(confirmed: list) -> Agent:
+    async def confirm(tool_name, args, reason):
+        confirmed.append((tool_name, args, reason))
+        return False
+
+    browser = SleepBrowser(0)
+    browser.page = AxPage()
+    return Agent(api_key=None, browser=browser, client=FakeLLM([]), confirm=confirm)
+
+
+def run_click(ref: str) -> tuple[str, list]:
+    confirmed = []
+    agent = make_agent(confirmed)
+
+    async def scenario():
+        await agent.analyzer.accessibility_tree(agent.browser.page)
+        return await agent._guarded_execute("click", {"selector": f"aria-ref={ref}"})
+
+    return asyncio.run(scenario()), confirmed
+
+
+def test_aria_ref_click_on_delete_button_asks_confirmation():
+    result, confirmed = run_click("e12")
+    assert result == "Действие отменено пользователем"
+    assert len(confirmed) == 1
+    assert "Удалить" in confirmed[0][1]["element"]
+
+
+def test_aria_ref_button_named_by_child_text_asks_confirmation():
+    result, confirmed = run_click("e13")
+    assert result == "Действие отменено пользователем"
+    assert "Оплатить" in confirmed[0][1]["element"]
+
+
+def test_aria_ref_click_on_harmless_button_runs_without_confirmation():
+    result, confirmed = run_click("e14")
+    assert confirmed == []
+    assert result.startswith("Кликнул")